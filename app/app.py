@@ -3,29 +3,176 @@ Flask application for French Residence Permit Renewal Tracker.
 Enhanced with profile selection, notes, and due dates.
 """
 
+import hashlib
+import io
+import json
 import os
+import queue
+from typing import Any, Callable
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, g, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
 
-from config_loader import get_categories, get_important_links, get_metadata
+import compression
+import metrics
+from connection_pool import PoolTimeout
+from checklist import (
+    FORMATS,
+    build_context,
+    checklist_renderer,
+    generated_date,
+    pdf_available,
+)
+from config_loader import (
+    get_categories,
+    get_config_version,
+    get_important_links,
+    get_metadata,
+    pin_snapshot,
+    unpin_snapshot,
+)
+from config_watcher import CONFIG_WATCH_S, config_watcher
 from database import (
+    DEFAULT_USER_ID,
+    STATUS_VIEW_FIELDS,
+    apply_document_updates,
     get_available_profiles,
-    get_documents_with_status,
+    get_bootstrap_data,
+    get_client_config_version,
+    get_deadlines,
+    get_expiring,
+    get_config_version as get_applied_config_version,
+    get_or_create_user,
+    get_document_history,
+    get_documents_json,
     get_permit_types,
     get_progress,
+    get_status_changes,
+    get_status_validator,
+    get_statuses_at,
+    get_timeline,
     get_user_settings,
-    init_db,
+    import_dossier,
+    init_schema,
+    iter_export,
     mark_document_complete,
     mark_document_incomplete,
     reset_progress,
+    search_documents,
+    select_document_fields,
+    undo_status_change,
     update_document_due_date,
     update_document_notes,
+    update_user_permit_type,
     update_user_profiles,
 )
+from deadlines import digest_scheduler
+from startup import config_seeder, readiness
+from events import (
+    EVENTS_KEEPALIVE_S,
+    KEEPALIVE,
+    event_bus,
+    format_event,
+    replay,
+    stream_preamble,
+)
 
 app = Flask(__name__, static_folder="static", static_url_path="")
 CORS(app)
+metrics.init_app(app)
+compression.init_app(app)
+
+# Request header identifying the caller (set by the authenticating proxy).
+# Requests without it act on the default user.
+USER_ID_HEADER = os.environ.get("USER_ID_HEADER", "X-User-Id")
+
+IMPORTANT_LINKS_ETAG = hashlib.sha1(
+    json.dumps(get_important_links(), sort_keys=True).encode()
+).hexdigest()
+
+
+@app.before_request
+def pin_config():
+    """Serve the whole request from one config snapshot, even across a reload."""
+    pin_snapshot()
+
+
+@app.teardown_request
+def unpin_config(exc):
+    unpin_snapshot()
+
+
+# Routes answered from the config snapshot alone, before any seeding
+CONFIG_ENDPOINTS = {
+    "api_get_profiles",
+    "api_get_categories",
+    "api_get_important_links",
+    "api_get_metadata",
+}
+
+
+@app.before_request
+def wait_for_seeding():
+    """Answer 503 from routes reading the seeded tables until a config is seeded."""
+    if not request.path.startswith("/api/") or request.endpoint in CONFIG_ENDPOINTS:
+        return None
+    if readiness.serving():
+        return None
+    return unavailable("Starting up")
+
+
+def unavailable(message: str):
+    """A 503 asking the client to retry shortly."""
+    response = jsonify({"success": False, "error": message})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def error_response(e: Exception):
+    """Answer a failed request: 503 if no database connection was free, else 500."""
+    if isinstance(e, PoolTimeout):
+        return unavailable(str(e))
+    return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.errorhandler(PoolTimeout)
+def database_busy(e):
+    """The same 503 for a pool timeout raised outside a route's try block."""
+    return unavailable(str(e))
+
+
+@app.before_request
+def resolve_user():
+    """Scope API requests to the user named in USER_ID_HEADER."""
+    if not request.path.startswith("/api/"):
+        return None
+    external_id = request.headers.get(USER_ID_HEADER, "").strip()
+    if len(external_id) > 128:
+        return jsonify({"success": False, "error": "User id too long"}), 400
+    g.user_id = get_or_create_user(external_id) if external_id else DEFAULT_USER_ID
+    return None
+
+
+def conditional_json(etag: str, build: Callable[[], Any], raw: bool = False):
+    """
+    Return ``{"success": True, "data": build()}`` tagged with ``etag``.
+
+    If the request's If-None-Match already holds ``etag``, answer 304
+    without building or serializing the payload. With ``raw``, ``build``
+    returns the data already serialized as JSON. The ETag is weak, since
+    the same data may be sent with different content encodings.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    elif raw:
+        response = app.response_class(
+            f'{{"data":{build()},"success":true}}\n', mimetype="application/json"
+        )
+    else:
+        response = jsonify({"success": True, "data": build()})
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @app.route("/")
@@ -34,34 +181,51 @@ def index():
     return send_from_directory(app.static_folder, "index.html")
 
 
+@app.route("/healthz/live", methods=["GET"])
+def healthz_live():
+    """Liveness: the worker is up and answering."""
+    return jsonify({"status": "alive"})
+
+
+@app.route("/healthz/ready", methods=["GET"])
+def healthz_ready():
+    """Readiness: the config this worker loaded is seeded in the database."""
+    try:
+        if readiness.ready():
+            return jsonify({"status": "ready"})
+        return jsonify({"status": "seeding"}), 503
+    except Exception as e:
+        return jsonify({"status": "error", "error": str(e)}), 503
+
+
 @app.route("/api/permit-types", methods=["GET"])
 def api_get_permit_types():
     """Get all available permit types."""
     try:
-        permit_types = get_permit_types()
-        return jsonify({"success": True, "data": permit_types})
+        etag = f"permit-types-{get_applied_config_version()}"
+        return conditional_json(etag, get_permit_types)
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/profiles", methods=["GET"])
 def api_get_profiles():
     """Get all available applicant profiles."""
     try:
-        profiles = get_available_profiles()
-        return jsonify({"success": True, "data": profiles})
+        etag = f"profiles-{get_config_version('profiles.yaml')}"
+        return conditional_json(etag, get_available_profiles)
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/user-settings", methods=["GET"])
 def api_get_user_settings():
     """Get user's current settings."""
     try:
-        settings = get_user_settings()
+        settings = get_user_settings(g.user_id)
         return jsonify({"success": True, "data": settings})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/user-settings/profiles", methods=["POST"])
@@ -70,10 +234,49 @@ def api_update_user_profiles():
     try:
         data = request.get_json()
         profiles = data.get("profiles", ["common"])
-        success = update_user_profiles(profiles)
+        success = update_user_profiles(profiles, g.user_id)
+        return jsonify({"success": success})
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/user-settings/permit-type", methods=["POST"])
+def api_update_user_permit_type():
+    """Update user's selected permit type."""
+    try:
+        data = request.get_json()
+        success = update_user_permit_type(data.get("permit_type"), g.user_id)
         return jsonify({"success": success})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
+
+
+@app.route("/api/bootstrap", methods=["GET"])
+def api_get_bootstrap():
+    """Get config, settings and (optionally) a permit type's checklist in one call."""
+    try:
+        profiles_param = request.args.get("profiles")
+        selected_profiles = profiles_param.split(",") if profiles_param else None
+        permit_type = request.args.get("permit_type")
+
+        # Everything the payload is built from: the config, the settings
+        # and, for the checklist, the status validator
+        settings = get_user_settings(g.user_id)
+        key = [get_client_config_version(), json.dumps(settings, sort_keys=True)]
+        checklist_type = permit_type or settings.get("selected_permit_type")
+        if checklist_type:
+            profiles = selected_profiles or settings.get("selected_profiles")
+            key += [
+                checklist_type,
+                get_status_validator(checklist_type, profiles, g.user_id),
+            ]
+        etag = "bootstrap-" + hashlib.sha1("|".join(key).encode()).hexdigest()
+        return conditional_json(
+            etag,
+            lambda: get_bootstrap_data(permit_type, selected_profiles, g.user_id),
+        )
+    except Exception as e:
+        return error_response(e)
 
 
 @app.route("/api/documents/<permit_type>", methods=["GET"])
@@ -85,33 +288,122 @@ def api_get_documents(permit_type):
         if profiles_param:
             selected_profiles = profiles_param.split(",")
         else:
-            settings = get_user_settings()
+            settings = get_user_settings(g.user_id)
             selected_profiles = settings.get("selected_profiles", ["common"])
 
-        documents = get_documents_with_status(permit_type, selected_profiles)
-        return jsonify({"success": True, "data": documents})
+        # ?view=status returns just the status fields, for refreshes;
+        # otherwise ?fields= and ?lang= narrow the fields returned
+        view = request.args.get("view", "full")
+        if view == "status":
+            fields = STATUS_VIEW_FIELDS
+        elif view == "full":
+            fields_param = request.args.get("fields")
+            fields = select_document_fields(
+                fields_param.split(",") if fields_param else None,
+                request.args.get("lang") or None,
+            )
+        else:
+            raise ValueError(f"Unknown view: {view}")
+
+        validator = get_status_validator(permit_type, selected_profiles, g.user_id)
+        etag = f"documents-{validator}"
+        if fields is not None:
+            etag += "-" + hashlib.sha1(",".join(fields).encode()).hexdigest()[:12]
+        return conditional_json(
+            etag,
+            lambda: get_documents_json(
+                permit_type, selected_profiles, g.user_id, fields
+            ),
+            raw=True,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
+
+
+@app.route("/api/sync", methods=["GET"])
+def api_sync():
+    """Get the status rows changed since ?since=<revision> (0: all of them)."""
+    try:
+        since = request.args.get("since", "0")
+        if not since.isdigit():
+            raise ValueError(f"Invalid revision: {since}")
+        data = get_status_changes(int(since), g.user_id)
+        return jsonify({"success": True, "data": data})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """Search document names, descriptions and the user's notes (?q=)."""
+    try:
+        limit = request.args.get("limit", "20")
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            return jsonify({"success": False, "error": "limit must be 1-100"}), 400
+        profiles_param = request.args.get("profiles")
+        if profiles_param:
+            selected_profiles = profiles_param.split(",")
+        else:
+            settings = get_user_settings(g.user_id)
+            selected_profiles = settings.get("selected_profiles", ["common"])
+
+        results = search_documents(
+            request.args.get("q", ""),
+            request.args.get("permit_type") or None,
+            selected_profiles,
+            g.user_id,
+            int(limit),
+        )
+        return jsonify({"success": True, "data": results})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/documents/batch", methods=["POST"])
+def api_batch_update_documents():
+    """Apply several document status updates in one transaction."""
+    try:
+        data = request.get_json()
+        operations = data.get("operations", []) if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not all(
+            isinstance(op, dict) for op in operations
+        ):
+            return (
+                jsonify(
+                    {"success": False, "error": "operations must be a list of objects"}
+                ),
+                400,
+            )
+        results = apply_document_updates(operations, g.user_id)
+        return jsonify({"success": all(r["success"] for r in results), "data": results})
+    except Exception as e:
+        return error_response(e)
 
 
 @app.route("/api/documents/<document_id>/complete", methods=["POST"])
 def api_complete_document(document_id):
     """Mark a document as complete."""
     try:
-        success = mark_document_complete(document_id)
+        success = mark_document_complete(document_id, g.user_id)
         return jsonify({"success": success})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/documents/<document_id>/incomplete", methods=["POST"])
 def api_incomplete_document(document_id):
     """Mark a document as incomplete."""
     try:
-        success = mark_document_incomplete(document_id)
+        success = mark_document_incomplete(document_id, g.user_id)
         return jsonify({"success": success})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/documents/<document_id>/notes", methods=["POST"])
@@ -120,10 +412,10 @@ def api_update_notes(document_id):
     try:
         data = request.get_json()
         notes = data.get("notes", "")
-        success = update_document_notes(document_id, notes)
+        success = update_document_notes(document_id, notes, g.user_id)
         return jsonify({"success": success})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/documents/<document_id>/due-date", methods=["POST"])
@@ -132,10 +424,58 @@ def api_update_due_date(document_id):
     try:
         data = request.get_json()
         due_date = data.get("due_date")  # Can be null to clear
-        success = update_document_due_date(document_id, due_date)
+        success = update_document_due_date(document_id, due_date, g.user_id)
         return jsonify({"success": success})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/checklist/<permit_type>.<any(html, pdf):fmt>", methods=["GET"])
+def api_get_checklist(permit_type, fmt):
+    """Get a printable checklist (HTML print view or PDF), filtered by profiles."""
+    try:
+        if fmt == "pdf" and not pdf_available():
+            return (
+                jsonify({"success": False, "error": "PDF output is not available"}),
+                501,
+            )
+        profiles_param = request.args.get("profiles")
+        if profiles_param:
+            selected_profiles = profiles_param.split(",")
+        else:
+            settings = get_user_settings(g.user_id)
+            selected_profiles = settings.get("selected_profiles", ["common"])
+        lang = request.args.get("lang") or None
+        if lang not in (None, "fr", "en"):
+            raise ValueError(f"Unknown language: {lang}")
+
+        if permit_type not in {p["id"] for p in get_permit_types()}:
+            return jsonify({"success": False, "error": "Unknown permit type"}), 404
+
+        validator = get_status_validator(permit_type, selected_profiles, g.user_id)
+        # The date is printed on the checklist, so yesterday's file is stale
+        generated = generated_date()
+        name = f"{validator}-{lang or 'all'}-{generated}"
+        path = checklist_renderer.render(
+            name,
+            fmt,
+            lambda: build_context(
+                permit_type, selected_profiles, g.user_id, lang, generated
+            ),
+        )
+        return send_file(
+            path,
+            mimetype=FORMATS[fmt][0],
+            download_name=f"checklist-{permit_type}.{fmt}",
+            etag=name,
+            max_age=0,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/progress/<permit_type>", methods=["GET"])
@@ -147,57 +487,234 @@ def api_get_progress(permit_type):
         if profiles_param:
             selected_profiles = profiles_param.split(",")
         else:
-            settings = get_user_settings()
+            settings = get_user_settings(g.user_id)
             selected_profiles = settings.get("selected_profiles", ["common"])
 
-        progress = get_progress(permit_type, selected_profiles)
-        return jsonify({"success": True, "data": progress})
+        breakdown = request.args.get("breakdown", "").lower() in ("1", "true")
+        validator = get_status_validator(permit_type, selected_profiles, g.user_id)
+        etag = f"progress-{int(breakdown)}-{validator}"
+        return conditional_json(
+            etag,
+            lambda: get_progress(permit_type, selected_profiles, breakdown, g.user_id),
+        )
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/reset/<permit_type>", methods=["POST"])
 def api_reset_progress(permit_type):
     """Reset all progress for a permit type."""
     try:
-        success = reset_progress(permit_type)
+        success = reset_progress(permit_type, g.user_id)
         return jsonify({"success": success})
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
+
+
+def _history_page():
+    """Parse ?limit= (1-500) and ?before= (an event id) for history listings."""
+    limit = request.args.get("limit", "50")
+    before = request.args.get("before")
+    if not limit.isdigit() or not 1 <= int(limit) <= 500:
+        raise ValueError("limit must be 1-500")
+    if before is not None and not before.isdigit():
+        raise ValueError("before must be an event id")
+    return int(limit), int(before) if before else None
+
+
+@app.route("/api/history/<document_id>", methods=["GET"])
+def api_get_history(document_id):
+    """Get the logged states of a document, newest first."""
+    try:
+        limit, before = _history_page()
+        data = get_document_history(document_id, g.user_id, limit, before)
+        return jsonify({"success": True, "data": data})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/timeline/<permit_type>", methods=["GET"])
+def api_get_timeline(permit_type):
+    """
+    Get the status changes across a permit type, newest first; with ?at=
+    (an ISO timestamp), also the status of every document at that time.
+    """
+    try:
+        limit, before = _history_page()
+        data = {"events": get_timeline(permit_type, g.user_id, limit, before)}
+        at = request.args.get("at")
+        if at:
+            data["at"] = at
+            data["statuses"] = get_statuses_at(at, permit_type, g.user_id)
+        return jsonify({"success": True, "data": data})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/undo", methods=["POST"])
+def api_undo():
+    """Revert the most recent status change (or that of {"document_id"})."""
+    try:
+        data = request.get_json(silent=True) or {}
+        undone = undo_status_change(g.user_id, data.get("document_id"))
+        if undone is None:
+            return jsonify({"success": False, "error": "Nothing to undo"}), 404
+        return jsonify({"success": True, "data": undone})
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/deadlines", methods=["GET"])
+def api_get_deadlines():
+    """Get overdue and upcoming incomplete documents across permit types."""
+    try:
+        within_days = request.args.get("within_days", "14")
+        if not within_days.isdigit() or int(within_days) > 3650:
+            return (
+                jsonify({"success": False, "error": "within_days must be 0-3650"}),
+                400,
+            )
+        data = get_deadlines(int(within_days), g.user_id)
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/expiring", methods=["GET"])
+def api_get_expiring():
+    """Get completed documents that have expired or expire soon."""
+    try:
+        within_days = request.args.get("within_days", "30")
+        if not within_days.isdigit() or int(within_days) > 3650:
+            return (
+                jsonify({"success": False, "error": "within_days must be 0-3650"}),
+                400,
+            )
+        data = get_expiring(
+            int(within_days), request.args.get("permit_type"), g.user_id
+        )
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/deadlines/digest", methods=["GET"])
+def api_get_deadline_digest():
+    """Get the precomputed cross-user deadline digest (for dashboards)."""
+    try:
+        digest = digest_scheduler.get()
+        etag = f"deadline-digest-{digest['generated_at']}"
+        return conditional_json(etag, lambda: digest)
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/export", methods=["GET"])
+def api_export():
+    """Stream the user's settings and document statuses as NDJSON."""
+    return app.response_class(
+        iter_export(g.user_id),
+        mimetype="application/x-ndjson",
+        headers={
+            "Content-Disposition": 'attachment; filename="residence-export.ndjson"'
+        },
+    )
+
+
+@app.route("/api/import", methods=["POST"])
+def api_import():
+    """Restore an NDJSON export for the user (?mode=replace to overwrite)."""
+    try:
+        replace = request.args.get("mode") == "replace"
+        # request.stream reads lines a byte at a time; buffer it
+        lines = io.BufferedReader(request.stream, buffer_size=64 * 1024)
+        result = import_dossier(lines, g.user_id, replace)
+        return jsonify({"success": True, "data": result})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+
+@app.route("/api/events", methods=["GET"])
+def api_events():
+    """
+    Stream the user's status changes as server-sent events.
+
+    asgi.py serves this route on its event loop; this version holds a
+    thread per stream and is meant for the development server.
+    """
+    user_id = g.user_id
+    updates: queue.Queue = queue.Queue()
+    event_bus.subscribe(user_id, updates.put)
+    try:
+        missed, last_id = replay(user_id, request.headers.get("Last-Event-ID"))
+    except Exception as e:
+        event_bus.unsubscribe(user_id, updates.put)
+        return error_response(e)
+
+    def stream():
+        sent = last_id
+        try:
+            yield stream_preamble() + b"".join(format_event(e) for e in missed)
+            while True:
+                try:
+                    event = updates.get(timeout=EVENTS_KEEPALIVE_S)
+                except queue.Empty:
+                    yield KEEPALIVE
+                    continue
+                if event[0] > sent:
+                    sent = event[0]
+                    yield format_event(event)
+        finally:
+            event_bus.unsubscribe(user_id, updates.put)
+
+    return app.response_class(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/categories", methods=["GET"])
 def api_get_categories():
     """Get category definitions."""
     try:
-        categories = get_categories()
-        return jsonify({"success": True, "data": categories})
+        etag = f"categories-{get_config_version('profiles.yaml')}"
+        return conditional_json(etag, get_categories)
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 @app.route("/api/important-links", methods=["GET"])
 def api_get_important_links():
     """Get important links for the application process."""
-    return jsonify({"success": True, "data": get_important_links()})
+    return conditional_json(IMPORTANT_LINKS_ETAG, get_important_links)
 
 
 @app.route("/api/metadata", methods=["GET"])
 def api_get_metadata():
     """Get configuration metadata (last verified date, source)."""
     try:
-        metadata = get_metadata()
-        return jsonify({"success": True, "data": metadata})
+        etag = f"metadata-{get_config_version('profiles.yaml')}"
+        return conditional_json(etag, get_metadata)
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return error_response(e)
 
 
 if __name__ == "__main__":
     # Ensure data directory exists
     os.makedirs("/app/data", exist_ok=True)
 
-    # Initialize database
-    init_db()
+    # Create the schema, then seed the config while the server starts
+    init_schema()
+    config_seeder.start()
+    if CONFIG_WATCH_S > 0:
+        config_watcher.start()
 
     # Run the application
     app.run(host="0.0.0.0", port=5000, debug=False)
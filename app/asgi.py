@@ -0,0 +1,154 @@
+"""
+Production ASGI entry point for the residence permit tracker.
+Serves the Flask app from the uvicorn worker processes started by
+server.py; each request's blocking work (SQLite, YAML) runs on a bounded
+per-worker thread pool, so a slow fsync holds one pool thread instead of
+the event loop. The /api/events stream is served directly on the event
+loop, so an idle subscriber holds a queue rather than a pool thread.
+"""
+
+import asyncio
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import USER_ID_HEADER, app as flask_app
+from config_watcher import CONFIG_WATCH_S, config_watcher
+from connection_pool import POOL_SIZE
+from database import DEFAULT_USER_ID, get_or_create_user
+from events import (
+    EVENTS_KEEPALIVE_S,
+    KEEPALIVE,
+    event_bus,
+    format_event,
+    replay,
+    stream_preamble,
+)
+
+# Threads per worker running request handlers. Defaults to the connection
+# pool size so every thread can hold a connection without waiting.
+DB_EXECUTOR_THREADS = int(os.environ.get("DB_EXECUTOR_THREADS", str(POOL_SIZE)))
+
+# Events a slow stream may fall behind by before it is closed; the client
+# reconnects and catches up from its Last-Event-ID
+EVENTS_QUEUE_SIZE = 256
+
+wsgi_application = WSGIMiddleware(flask_app, workers=DB_EXECUTOR_THREADS)
+
+# Hot-reload config/*.yaml; CONFIG_WATCH_S=0 disables it. Every worker
+# serves its own in-memory snapshot, so each one watches; importing the app
+# alone (scripts, benchmarks) starts no thread.
+if CONFIG_WATCH_S > 0:
+    config_watcher.start()
+
+
+async def _send_json(send, status: int, body: dict) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+
+async def event_stream(scope, receive, send) -> None:
+    """Stream the user's status changes as server-sent events."""
+    if scope["method"] != "GET":
+        await _send_json(send, 405, {"success": False, "error": "Method not allowed"})
+        return
+    headers = {
+        k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]
+    }
+    external_id = headers.get(USER_ID_HEADER.lower(), "").strip()
+    if len(external_id) > 128:
+        await _send_json(send, 400, {"success": False, "error": "User id too long"})
+        return
+
+    loop = asyncio.get_running_loop()
+    # Unbounded so the disconnect marker always fits; enqueue() enforces the limit
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def enqueue(event) -> None:
+        if queue.qsize() >= EVENTS_QUEUE_SIZE:
+            event = None
+        queue.put_nowait(event)
+
+    def deliver(event) -> None:
+        loop.call_soon_threadsafe(enqueue, event)
+
+    try:
+        user_id = (
+            await loop.run_in_executor(None, get_or_create_user, external_id)
+            if external_id
+            else DEFAULT_USER_ID
+        )
+        await loop.run_in_executor(None, event_bus.subscribe, user_id, deliver)
+    except Exception as e:
+        await _send_json(send, 500, {"success": False, "error": str(e)})
+        return
+
+    async def watch_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        queue.put_nowait(None)
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        missed, last_id = await loop.run_in_executor(
+            None, replay, user_id, headers.get("last-event-id")
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        body = stream_preamble() + b"".join(format_event(e) for e in missed)
+        while True:
+            if body:
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                body = KEEPALIVE
+                continue
+            # Send everything already queued in one write
+            events = [event]
+            while event is not None and not queue.empty():
+                event = queue.get_nowait()
+                events.append(event)
+            if None in events:
+                break
+            fresh = [e for e in events if e[0] > last_id]
+            if fresh:
+                last_id = fresh[-1][0]
+            body = b"".join(format_event(e) for e in fresh)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        event_bus.unsubscribe(user_id, deliver)
+        watcher.cancel()
+
+
+async def application(scope, receive, send) -> None:
+    """Serve /api/events on the event loop and everything else through Flask."""
+    if scope["type"] == "http" and scope["path"] == "/api/events":
+        await event_stream(scope, receive, send)
+    else:
+        await wsgi_application(scope, receive, send)
+
+
+if __name__ == "__main__":
+    # server.py starts the workers without importing the app first
+    from server import main
+
+    main()
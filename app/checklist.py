@@ -0,0 +1,264 @@
+"""
+Printable checklists: a user's checklist as an HTML print view or a PDF.
+
+Renders run in a pool of CHECKLIST_WORKERS processes, started on first
+use (see checklist_render.py), so laying out a PDF neither holds the GIL
+of the worker serving API requests nor lets a burst of downloads use more
+than that many cores. The output is cached on disk in CHECKLIST_CACHE_DIR
+under the checklist's status validator (user, permit type, profiles,
+status revision, config version), language and date (it prints the day it
+was generated), so repeat downloads are served from the file.
+Concurrent requests for a file that is not cached yet share one render;
+the least recently used files beyond CHECKLIST_CACHE_FILES are deleted.
+PDF output needs the optional reportlab package, which is imported by the
+render processes only, on their first PDF.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from checklist_render import FORMATS, exit_with, render_file
+from config_loader import get_categories, get_profiles
+from database import (
+    DATABASE_PATH,
+    DEFAULT_USER_ID,
+    get_documents_with_status,
+    get_permit_types,
+    select_document_fields,
+)
+
+CHECKLIST_CACHE_DIR = os.environ.get("CHECKLIST_CACHE_DIR") or os.path.join(
+    os.path.dirname(DATABASE_PATH), "checklists"
+)
+CHECKLIST_WORKERS = int(os.environ.get("CHECKLIST_WORKERS", "2"))
+CHECKLIST_CACHE_FILES = int(os.environ.get("CHECKLIST_CACHE_FILES", "1000"))
+# Found without importing it: the import alone takes over 0.1 s
+_HAS_REPORTLAB = importlib.util.find_spec("reportlab") is not None
+# Part of every cache file name; bump it when the layout changes
+RENDER_VERSION = 1
+# Modules the forkserver imports once, for every render process it forks.
+# Not __main__: the forkserver would run the entry script in its own process.
+# The render processes still import it (as __mp_main__), as with any
+# forkserver or spawn pool, so entry scripts need a __name__ guard.
+_RENDER_PRELOAD = ["checklist_render"]
+
+LABELS = {
+    "en": {
+        "title": "Document checklist",
+        "profiles": "Profiles",
+        "progress": "{completed} of {total} documents ready",
+        "generated": "Generated on {date}",
+        "due": "Due {date}",
+        "expired": "Expired {date}",
+        "valid_until": "Valid until {date}",
+        "valid_for": "Valid for {days} days",
+        "notes": "Notes",
+        "other": "Other",
+    },
+    "fr": {
+        "title": "Liste des pièces",
+        "profiles": "Profils",
+        "progress": "{completed} pièces prêtes sur {total}",
+        "generated": "Générée le {date}",
+        "due": "À fournir avant le {date}",
+        "expired": "Expiré le {date}",
+        "valid_until": "Valable jusqu'au {date}",
+        "valid_for": "Valable {days} jours",
+        "notes": "Notes",
+        "other": "Autres",
+    },
+}
+
+
+def pdf_available() -> bool:
+    return _HAS_REPORTLAB
+
+
+def generated_date() -> str:
+    """Today's (UTC) date, as printed on a checklist and part of its cache key."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _name(item: Dict[str, Any], lang: Optional[str]) -> str:
+    """An item's name in ``lang``, or both names when no language is given."""
+    if lang is not None:
+        return item.get(f"name_{lang}") or item.get("name_en") or ""
+    names = [item.get("name_fr"), item.get("name_en")]
+    return " / ".join(n for n in names if n)
+
+
+def build_context(
+    permit_type: str,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+    lang: Optional[str] = None,
+    generated: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Gather what the checklist of an existing permit type shows.
+
+    ``lang`` ('fr' or 'en') picks the language of names and labels; by
+    default names are shown in both, with English labels. ``generated`` is
+    the date printed on it, today's by default.
+    """
+    permit = next(p for p in get_permit_types() if p["id"] == permit_type)
+    documents = get_documents_with_status(
+        permit_type, selected_profiles, user_id, select_document_fields(None, lang)
+    )
+    labels = LABELS[lang or "en"]
+    categories = get_categories()
+
+    groups: Dict[str, Dict[str, Any]] = {
+        key: {"name": _name(category, lang), "documents": []}
+        for key, category in categories.items()
+    }
+    for doc in documents:
+        key = doc["category"] if doc["category"] in groups else "other"
+        if key not in groups:
+            groups[key] = {"name": labels["other"], "documents": []}
+        hints = []
+        if doc["due_date"]:
+            hints.append(labels["due"].format(date=doc["due_date"]))
+        if doc["expired"]:
+            hints.append(labels["expired"].format(date=doc["expires_at"][:10]))
+        elif doc["is_complete"] and doc["expires_at"]:
+            hints.append(labels["valid_until"].format(date=doc["expires_at"][:10]))
+        elif doc["validity_days"]:
+            hints.append(labels["valid_for"].format(days=doc["validity_days"]))
+        groups[key]["documents"].append(
+            {
+                "name": _name(doc, lang),
+                "description": doc["description"] or "",
+                "done": bool(doc["is_complete"]) and not doc["expired"],
+                "hints": hints,
+                "notes": (doc["notes"] or "").strip(),
+            }
+        )
+
+    profiles = get_profiles()
+    # Counted like the ticks: an expired document is not ready
+    completed = sum(
+        1 for group in groups.values() for doc in group["documents"] if doc["done"]
+    )
+    return {
+        "lang": lang or "en",
+        "labels": labels,
+        "permit": _name(permit, lang),
+        "profiles": [
+            _name(profiles.get(p, {"name_en": p}), lang)
+            for p in sorted(set(selected_profiles or []) | {"common"})
+        ],
+        "progress": labels["progress"].format(
+            completed=completed, total=len(documents)
+        ),
+        "generated": labels["generated"].format(date=generated or generated_date()),
+        "categories": [g for g in groups.values() if g["documents"]],
+    }
+
+
+class ChecklistRenderer:
+    """Renders checklists on a process pool into a bounded on-disk cache."""
+
+    def __init__(
+        self,
+        cache_dir: str = CHECKLIST_CACHE_DIR,
+        workers: int = CHECKLIST_WORKERS,
+        max_files: int = CHECKLIST_CACHE_FILES,
+    ):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._rendering: Dict[str, Future] = {}
+        self.hits = 0
+        self.renders = 0
+
+    def render(self, name: str, fmt: str, build: Callable[[], Dict[str, Any]]) -> str:
+        """
+        Get the path of checklist ``name`` in format ``fmt``.
+
+        A cached file is returned as is; otherwise ``build()`` supplies the
+        context and the checklist is rendered on the pool.
+        """
+        path = os.path.join(self.cache_dir, f"{name}-v{RENDER_VERSION}.{fmt}")
+        try:
+            # Refresh the access time the LRU eviction goes by
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+        context = build()
+        with self._lock:
+            future = self._rendering.get(path)
+            if future is None:
+                future = self._submit(path, fmt, context)
+                self._rendering[path] = future
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                if self._rendering.get(path) is future:
+                    del self._rendering[path]
+
+    def _submit(self, path: str, fmt: str, context: Dict[str, Any]) -> Future:
+        """Queue a render (caller holds the lock)."""
+        if self._pool is not None:
+            try:
+                future = self._pool.submit(render_file, path, fmt, context)
+            except BrokenProcessPool:
+                # A render process died: start over with a new pool
+                self._pool = None
+            else:
+                future.add_done_callback(self._rendered)
+                return future
+        # Forked from a forkserver, a single-threaded process started (by
+        # fork and exec) on first use: forking this multi-threaded process
+        # directly could leave a child holding a lock another thread had
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(_RENDER_PRELOAD)
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=mp_context,
+            initializer=exit_with,
+            initargs=(os.getpid(),),
+        )
+        future = self._pool.submit(render_file, path, fmt, context)
+        future.add_done_callback(self._rendered)
+        return future
+
+    def _rendered(self, future: Future) -> None:
+        if future.exception() is None:
+            self.renders += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used files beyond max_files."""
+        with os.scandir(self.cache_dir) as entries:
+            files = [
+                (e.stat().st_mtime, e.path)
+                for e in entries
+                if e.is_file() and not e.name.endswith(".tmp")
+            ]
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+checklist_renderer = ChecklistRenderer()
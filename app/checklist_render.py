@@ -0,0 +1,133 @@
+"""
+Rendering of printable checklists, run in the checklist render processes.
+
+Kept apart from checklist.py so that the render processes, forked from a
+forkserver (see ChecklistRenderer), need only this module, the template
+engine and, for their first PDF, reportlab. They exit with the process
+that started them: a web worker stopped by a signal never gets to shut
+its pool down.
+"""
+
+import io
+import os
+import select
+import tempfile
+import threading
+import time
+from typing import Any, Dict
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATES = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+    autoescape=select_autoescape(["html"]),
+)
+
+
+def render_html(context: Dict[str, Any]) -> bytes:
+    return TEMPLATES.get_template("checklist.html").render(context).encode()
+
+
+def render_pdf(context: Dict[str, Any]) -> bytes:
+    """Lay the checklist out on A4 pages (needs reportlab)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    styles = getSampleStyleSheet()
+    body = ParagraphStyle("body", parent=styles["BodyText"], fontSize=9, leading=11)
+    small = ParagraphStyle("small", parent=body, fontSize=8, textColor=colors.grey)
+    name = ParagraphStyle("name", parent=body, fontName="Helvetica-Bold")
+
+    def text(value: str, style):
+        value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return Paragraph(value.replace("\n", "<br/>"), style)
+
+    labels = context["labels"]
+    story = [
+        text(context["permit"], styles["Title"]),
+        text(labels["title"], styles["Heading2"]),
+        text(f"{labels['profiles']}: {', '.join(context['profiles'])}", body),
+        text(f"{context['progress']} · {context['generated']}", small),
+        Spacer(1, 4 * mm),
+    ]
+    for category in context["categories"]:
+        story.append(text(category["name"], styles["Heading3"]))
+        rows = []
+        for doc in category["documents"]:
+            cell = [text(doc["name"], name)]
+            if doc["description"]:
+                cell.append(text(doc["description"], body))
+            if doc["hints"]:
+                cell.append(text(" · ".join(doc["hints"]), small))
+            if doc["notes"]:
+                cell.append(text(f"{labels['notes']}: {doc['notes']}", small))
+            mark = '<font name="ZapfDingbats">\u2714</font>' if doc["done"] else ""
+            rows.append([Paragraph(mark, body), cell])
+        table = Table(rows, colWidths=[8 * mm, None])
+        table.setStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("BOX", (0, 0), (0, -1), 0.5, colors.black),
+                ("INNERGRID", (0, 0), (0, -1), 0.5, colors.black),
+                ("LINEBELOW", (1, 0), (1, -1), 0.25, colors.lightgrey),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+            ]
+        )
+        story.append(table)
+
+    output = io.BytesIO()
+    SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        title=f"{context['permit']} - {labels['title']}",
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=15 * mm,
+        bottomMargin=15 * mm,
+    ).build(story)
+    return output.getvalue()
+
+
+# Media type and renderer of each output format
+FORMATS: Dict[str, tuple] = {
+    "html": ("text/html", render_html),
+    "pdf": ("application/pdf", render_pdf),
+}
+
+
+def render_file(path: str, fmt: str, context: Dict[str, Any]) -> str:
+    """Render a checklist into ``path`` (runs in a pool process)."""
+    data = FORMATS[fmt][1](context)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written aside and renamed, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def exit_with(pid: int) -> None:
+    """Exit this process when process ``pid`` exits (pool initializer)."""
+    threading.Thread(
+        target=_wait_and_exit, args=(pid,), name="render-parent", daemon=True
+    ).start()
+
+
+def _wait_and_exit(pid: int) -> None:
+    try:
+        fd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # No pidfds (before Linux 5.3): poll instead
+        while True:
+            time.sleep(1)
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+    else:
+        select.select([fd], [], [])
+    os._exit(0)
@@ -0,0 +1,67 @@
+"""
+Content-Encoding negotiation for JSON responses.
+
+Responses of at least COMPRESS_MIN_BYTES are compressed with brotli (when
+the optional ``brotli`` package is installed) or gzip, whichever the
+client's Accept-Encoding prefers. Streamed responses (the NDJSON export,
+server-sent events) are left alone.
+"""
+
+import gzip
+import os
+from typing import Optional
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smallest JSON body worth compressing; 0 disables compression
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# Fast settings: responses are compressed on every request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def available_encodings() -> tuple:
+    """Encodings the server can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate(accept_encoding) -> Optional[str]:
+    """Pick an encoding from a parsed Accept-Encoding header (None: identity)."""
+    return accept_encoding.best_match(available_encodings())
+
+
+def init_app(app: Flask) -> None:
+    """Compress eligible responses of ``app``."""
+    if COMPRESS_MIN_BYTES <= 0:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype != "application/json"
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if response.content_length and response.content_length < COMPRESS_MIN_BYTES:
+            return response
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,44 @@
+"""
+Compile the YAML configuration into a precompiled bundle.
+
+Discovers every permit file in the config directory, validates it against
+the schema and writes CONFIG_BUNDLE, which config_loader uses to skip YAML
+parsing at startup. Exits non-zero if the configuration is invalid.
+
+    python config_compiler.py [--config-dir DIR] [--output PATH]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config-dir", help="defaults to CONFIG_DIR")
+    parser.add_argument("--output", help="bundle path, defaults to CONFIG_BUNDLE")
+    parser.add_argument(
+        "--check", action="store_true", help="validate only, do not write a bundle"
+    )
+    args = parser.parse_args()
+
+    if args.config_dir:
+        os.environ["CONFIG_DIR"] = args.config_dir
+    # Imported after CONFIG_DIR is set, which config_loader reads at import
+    from config_loader import ConfigError, compile_config, validate_config
+
+    try:
+        if args.check:
+            validate_config()
+            print("Configuration is valid")
+        else:
+            print(json.dumps(compile_config(args.output), indent=2))
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
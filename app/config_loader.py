@@ -1,20 +1,405 @@
 """
 YAML configuration loader for residence permit documents.
 Loads document definitions from YAML files for easier maintenance.
+
+Every ``*.yaml`` file in CONFIG_DIR other than the shared files below
+defines one permit type. ``config_compiler.py`` validates them and writes a
+precompiled bundle which is used to warm the cache at startup; any file
+that changed since the bundle was built is parsed from YAML as usual.
+
+Readers are served from an immutable ConfigSnapshot of the whole
+directory, held in memory, so they never touch disk. A new snapshot is
+built off the request path (by init_db or the config watcher) and
+swapped in with a single reference assignment.
 """
 
+import hashlib
+import json
 import os
-import yaml
-from typing import Dict, List, Any, Optional
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Any, Mapping, NamedTuple, Optional, Tuple
+
+import metrics
 
 CONFIG_DIR = os.environ.get("CONFIG_DIR", "/app/config")
 
+# Use the libyaml-backed loader when PyYAML was built with it.
+# Set CONFIG_USE_LIBYAML=0 to force the pure-Python loader.
+USE_LIBYAML = os.environ.get("CONFIG_USE_LIBYAML", "1") != "0"
+
+# Precompiled bundle written by config_compiler.py
+CONFIG_BUNDLE = os.environ.get(
+    "CONFIG_BUNDLE", os.path.join(CONFIG_DIR, ".config.bundle")
+)
+_BUNDLE_MAGIC = b"RPTCFG2\n"
+
+# Config files that are not permit types
+SHARED_CONFIG_FILES = ("profiles.yaml",)
+
+CacheEntry = Tuple[Tuple[int, int], Any, str]
+
+
+class ConfigError(ValueError):
+    """Raised when config files do not match the expected schema."""
+
+
+class ConfigCache:
+    """
+    In-process cache of parsed YAML config files.
+
+    Each file is parsed once and kept in memory together with a SHA-256 of
+    its contents; it is only re-parsed when its mtime or size changes on
+    disk. Cached trees are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, use_libyaml: bool = USE_LIBYAML):
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+        self.use_libyaml = use_libyaml
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.preloaded = 0
+
+    @property
+    def loader(self):
+        """YAML loader class used for parsing."""
+        import yaml
+
+        if self.use_libyaml and hasattr(yaml, "CSafeLoader"):
+            return yaml.CSafeLoader
+        return yaml.SafeLoader
+
+    def load(self, filepath: str) -> Any:
+        """Return the parsed contents of a file, re-parsing only if it changed."""
+        return self._entry(filepath)[1]
+
+    def digest(self, filepath: str) -> str:
+        """Return the SHA-256 hex digest of a file's current contents."""
+        return self._entry(filepath)[2]
+
+    def entry(self, filepath: str) -> CacheEntry:
+        """Return the ``(signature, data, sha256)`` entry for a file."""
+        return self._entry(filepath)
+
+    def preload(self, entries: Dict[str, CacheEntry]) -> None:
+        """
+        Seed the cache with already parsed entries (e.g. from a bundle).
+
+        Entries carry the mtime/size signature of the file they were checked
+        against, so one whose file changes afterwards is re-parsed on use.
+        """
+        with self._lock:
+            for filepath, entry in entries.items():
+                if filepath not in self._entries:
+                    self._entries[filepath] = entry
+                    self.preloaded += 1
+
+    def _entry(self, filepath: str) -> CacheEntry:
+        st = os.stat(filepath)
+        signature = (st.st_mtime_ns, st.st_size)
+
+        entry = self._entries.get(filepath)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(filepath)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry
+
+            start = time.perf_counter()
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            # Imported here, as a worker served from the bundle never parses
+            import yaml
+
+            data = yaml.load(raw.decode("utf-8"), Loader=self.loader)
+            metrics.observe(
+                "config_yaml_load_duration_seconds",
+                time.perf_counter() - start,
+                (("file", os.path.basename(filepath)),),
+            )
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            entry = (signature, data, hashlib.sha256(raw).hexdigest())
+            self._entries[filepath] = entry
+            return entry
+
+    def clear(self) -> None:
+        """Drop all cached files (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters.
+
+        ``libyaml`` is None while yaml is not imported (no file parsed from
+        YAML yet): /metrics and /healthz read these and should not import it.
+        """
+        yaml = sys.modules.get("yaml")
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "preloaded": self.preloaded,
+            "files": len(self._entries),
+            "libyaml": None if yaml is None else self.loader is not yaml.SafeLoader,
+        }
+
+
+_config_cache = ConfigCache()
+metrics.gauge(
+    "config_cache_hits", "Config reads served from cache.", lambda: _config_cache.hits
+)
+metrics.gauge(
+    "config_cache_misses",
+    "Config files parsed for the first time.",
+    lambda: _config_cache.misses,
+)
+metrics.gauge(
+    "config_cache_reloads",
+    "Config files re-parsed after changing on disk.",
+    lambda: _config_cache.reloads,
+)
+
+
+class ConfigSnapshot(NamedTuple):
+    """A fully parsed, read-only view of CONFIG_DIR."""
+
+    # filename -> (signature, data, sha256)
+    files: Mapping[str, CacheEntry]
+    permit_types: Tuple[str, ...]
+    generation: int
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+_snapshot_lock = threading.Lock()
+_pinned = threading.local()
+
+
+def load_snapshot(generation: int = 0) -> ConfigSnapshot:
+    """
+    Build a snapshot of CONFIG_DIR as it is on disk now.
+
+    Unchanged files are taken from the cache (or the bundle) without being
+    parsed again.
+    """
+    _ensure_bundle()
+    files: Dict[str, CacheEntry] = {}
+    permit_types = _scan_permit_types()
+    for filename in [*SHARED_CONFIG_FILES, *(f"{p}.yaml" for p in permit_types)]:
+        try:
+            files[filename] = _config_cache.entry(os.path.join(CONFIG_DIR, filename))
+        except FileNotFoundError:
+            # Removed since the directory was listed
+            continue
+    permit_types = [p for p in permit_types if f"{p}.yaml" in files]
+    return ConfigSnapshot(MappingProxyType(files), tuple(permit_types), generation)
+
+
+def get_snapshot() -> ConfigSnapshot:
+    """Return the snapshot pinned to this thread, or else the current one."""
+    return getattr(_pinned, "snapshot", None) or _current_snapshot()
+
+
+def _current_snapshot() -> ConfigSnapshot:
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = load_snapshot()
+            snapshot = _snapshot
+    return snapshot
+
+
+def swap_snapshot(snapshot: ConfigSnapshot) -> None:
+    """Make ``snapshot`` the current config for every thread."""
+    global _snapshot
+    _snapshot = snapshot
+
+
+def pin_snapshot() -> ConfigSnapshot:
+    """Serve this thread's config reads from the current snapshot until unpinned."""
+    _pinned.snapshot = _current_snapshot()
+    return _pinned.snapshot
+
+
+def unpin_snapshot() -> None:
+    _pinned.snapshot = None
+
+
+@contextmanager
+def pinned_snapshot(
+    snapshot: Optional[ConfigSnapshot] = None,
+) -> Iterator[ConfigSnapshot]:
+    """
+    Serve every config read on this thread from one snapshot for a block.
+
+    Defaults to the current snapshot, so a request that reads several files
+    sees them all from the same version even if a reload lands meanwhile.
+    """
+    previous = getattr(_pinned, "snapshot", None)
+    _pinned.snapshot = snapshot or get_snapshot()
+    try:
+        yield _pinned.snapshot
+    finally:
+        _pinned.snapshot = previous
+
+
+def snapshot_is_stale(snapshot: ConfigSnapshot) -> bool:
+    """Whether CONFIG_DIR on disk differs from ``snapshot`` (stats files only)."""
+    permit_types = _scan_permit_types()
+    if tuple(permit_types) != snapshot.permit_types:
+        return True
+    for filename, entry in snapshot.files.items():
+        try:
+            st = os.stat(os.path.join(CONFIG_DIR, filename))
+        except FileNotFoundError:
+            return True
+        if (st.st_mtime_ns, st.st_size) != entry[0]:
+            return True
+    return False
+
+
+def reload_snapshot() -> Optional[ConfigSnapshot]:
+    """
+    Build the next snapshot if CONFIG_DIR changed, without swapping it in.
+
+    Returns None if nothing changed. Only files that changed are parsed.
+    """
+    current = _snapshot
+    if current is None:
+        return load_snapshot()
+    if not snapshot_is_stale(current):
+        return None
+    return load_snapshot(current.generation + 1)
+
+
+_bundle_loaded = False
+
+
+def _ensure_bundle() -> None:
+    """
+    Warm the config cache from the compiled bundle, once per process.
+
+    Only files whose current contents still hash to what was compiled are
+    taken from the bundle; any other file is parsed from YAML as usual.
+    """
+    global _bundle_loaded
+    if _bundle_loaded:
+        return
+    _bundle_loaded = True
+    compiled = read_bundle(CONFIG_BUNDLE)
+    if not compiled:
+        return
+    entries = {}
+    for name, (digest, data) in compiled.items():
+        filepath = os.path.join(CONFIG_DIR, name)
+        try:
+            # Stat first: a file replaced after this is re-parsed on use
+            st = os.stat(filepath)
+            with open(filepath, "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        if hashlib.sha256(raw).hexdigest() == digest:
+            entries[filepath] = ((st.st_mtime_ns, st.st_size), data, digest)
+    _config_cache.preload(entries)
+
+
+def read_bundle(path: str) -> Optional[Dict[str, Tuple[str, Any]]]:
+    """
+    Read a compiled bundle, returning ``{filename: (sha256, data)}``.
+
+    The bundle is plain JSON, so reading it cannot run code. Returns None
+    if the file is missing, unreadable or written by another format version.
+    """
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if not blob.startswith(_BUNDLE_MAGIC):
+        return None
+    try:
+        files = json.loads(blob[len(_BUNDLE_MAGIC) :])["files"]
+        return {name: (f["sha256"], f["data"]) for name, f in files.items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_bundle(path: str, entries: Dict[str, CacheEntry]) -> int:
+    """Atomically write a compiled bundle; returns its size in bytes."""
+    files = {
+        name: {"sha256": digest, "data": data}
+        for name, (_, data, digest) in entries.items()
+    }
+    try:
+        payload = json.dumps({"files": files}, separators=(",", ":"))
+    except TypeError as e:
+        raise ConfigError(f"Config cannot be compiled to a bundle: {e}") from e
+    # JSON silently turns e.g. integer keys into strings
+    if json.loads(payload)["files"] != files:
+        raise ConfigError("Config cannot be compiled to a bundle: not plain JSON data")
+    blob = _BUNDLE_MAGIC + payload.encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(blob)
+
+
+def _snapshot_entry(filename: str) -> CacheEntry:
+    entry = get_snapshot().files.get(filename)
+    if entry is None:
+        raise FileNotFoundError(os.path.join(CONFIG_DIR, filename))
+    return entry
+
 
 def load_yaml_file(filename: str) -> Dict[str, Any]:
-    """Load a YAML file from the config directory."""
-    filepath = os.path.join(CONFIG_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    """Load a YAML file from the config directory (as of the current snapshot)."""
+    return _snapshot_entry(filename)[1]
+
+
+def get_config_hash(filename: str) -> str:
+    """Return the SHA-256 of a config file's contents (as of the current snapshot)."""
+    return _snapshot_entry(filename)[2]
+
+
+def get_config_version(*filenames: str) -> str:
+    """Return a combined digest of the given config files' contents."""
+    digest = hashlib.sha1()
+    for filename in filenames:
+        digest.update(f"{filename}:{get_config_hash(filename)};".encode())
+    return digest.hexdigest()
+
+
+def get_permit_config_version() -> str:
+    """
+    Return the combined digest of every permit type file.
+
+    Matches database.get_config_version() once this config is seeded.
+    """
+    permit_files = sorted(f"{p}.yaml" for p in discover_permit_types())
+    return get_config_version(*permit_files)
+
+
+def get_config_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss/reload counters for the config cache."""
+    return _config_cache.stats()
 
 
 def get_profiles() -> Dict[str, Any]:
@@ -52,7 +437,7 @@ def get_documents_for_permit(
     Load documents for a permit type, optionally filtered by profiles.
 
     Args:
-        permit_type: Either 'carte_resident' or 'titre_sejour'
+        permit_type: Permit type id (the name of its config file)
         selected_profiles: List of profile IDs to include. If None, returns all.
                           Always includes 'common' profile.
 
@@ -84,11 +469,31 @@ def get_documents_for_permit(
         return []
 
 
+def discover_permit_types() -> List[str]:
+    """Return the ids of all permit types, one per YAML file in CONFIG_DIR."""
+    return list(get_snapshot().permit_types)
+
+
+def _scan_permit_types() -> List[str]:
+    """List the permit type files currently on disk."""
+    try:
+        names = os.listdir(CONFIG_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        name[: -len(".yaml")]
+        for name in names
+        if name.endswith(".yaml")
+        and not name.startswith(".")
+        and name not in SHARED_CONFIG_FILES
+    )
+
+
 def get_all_permit_types() -> List[Dict[str, Any]]:
     """Load all permit type definitions."""
     permit_types = []
 
-    for permit_id in ["carte_resident", "titre_sejour"]:
+    for permit_id in discover_permit_types():
         config = get_permit_type_config(permit_id)
         if config:
             permit_types.append(config)
@@ -118,3 +523,139 @@ def get_important_links() -> List[Dict[str, Any]]:
             "description": "Official portal to purchase the required tax stamp online.",
         },
     ]
+
+
+# field -> (accepted types, required); optional fields may also be null
+PERMIT_TYPE_SCHEMA: Dict[str, Tuple[tuple, bool]] = {
+    "id": ((str,), True),
+    "name_en": ((str,), True),
+    "name_fr": ((str,), True),
+    "description": ((str,), False),
+    "official_url": ((str,), False),
+    "cost": ((int, float), False),
+    "last_verified": ((str,), False),
+}
+
+DOCUMENT_SCHEMA: Dict[str, Tuple[tuple, bool]] = {
+    "id": ((str,), True),
+    "profiles": ((list,), True),
+    "category": ((str,), True),
+    "name_fr": ((str,), True),
+    "name_en": ((str,), True),
+    "description": ((str,), False),
+    "link": ((str,), False),
+    "link_text": ((str,), False),
+    "validity_days": ((int,), False),
+}
+
+
+def _check_fields(
+    obj: Any, schema: Dict[str, Tuple[tuple, bool]], where: str, errors: List[str]
+) -> bool:
+    if not isinstance(obj, dict):
+        errors.append(f"{where}: expected a mapping")
+        return False
+    for field, (types, required) in schema.items():
+        value = obj.get(field)
+        if value is None:
+            if required:
+                errors.append(f"{where}: missing '{field}'")
+        elif isinstance(value, bool) or not isinstance(value, types):
+            expected = " or ".join(t.__name__ for t in types)
+            errors.append(f"{where}: '{field}' must be {expected}")
+    return True
+
+
+def validate_permit_file(
+    permit_type: str, data: Any, profiles: Dict[str, Any], categories: Dict[str, Any]
+) -> List[str]:
+    """Check one permit file against the schema; returns a list of errors."""
+    filename = f"{permit_type}.yaml"
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        return [f"{filename}: expected a mapping at the top level"]
+
+    permit = data.get("permit_type")
+    if _check_fields(permit, PERMIT_TYPE_SCHEMA, f"{filename}: permit_type", errors):
+        if permit.get("id") not in (None, permit_type):
+            errors.append(f"{filename}: permit_type.id must be '{permit_type}'")
+
+    documents = data.get("documents")
+    if not isinstance(documents, list):
+        errors.append(f"{filename}: 'documents' must be a list")
+        return errors
+
+    seen = set()
+    for i, doc in enumerate(documents):
+        where = f"{filename}: documents[{i}]"
+        if not _check_fields(doc, DOCUMENT_SCHEMA, where, errors):
+            continue
+        doc_id = doc.get("id")
+        if doc_id in seen:
+            errors.append(f"{where}: duplicate id '{doc_id}'")
+        seen.add(doc_id)
+        doc_profiles = doc.get("profiles")
+        if isinstance(doc_profiles, list):
+            if not doc_profiles:
+                errors.append(f"{where}: 'profiles' must not be empty")
+            for profile in doc_profiles:
+                if profile not in profiles:
+                    errors.append(f"{where}: unknown profile '{profile}'")
+        category = doc.get("category")
+        if isinstance(category, str) and category not in categories:
+            errors.append(f"{where}: unknown category '{category}'")
+    return errors
+
+
+def validate_config(permit_types: Optional[List[str]] = None) -> None:
+    """
+    Validate all permit files (or the given ones) against the schema.
+
+    Document ids must also be unique across permit types, since they share
+    one table. Raises ConfigError listing every problem found.
+    """
+    if permit_types is None:
+        permit_types = discover_permit_types()
+    profiles = get_profiles()
+    categories = get_categories()
+
+    errors: List[str] = []
+    owners: Dict[str, str] = {}
+    for permit_type in permit_types:
+        data = load_yaml_file(f"{permit_type}.yaml")
+        errors.extend(validate_permit_file(permit_type, data, profiles, categories))
+        documents = data.get("documents") if isinstance(data, dict) else None
+        for doc in documents if isinstance(documents, list) else []:
+            doc_id = doc.get("id") if isinstance(doc, dict) else None
+            if doc_id is None:
+                continue
+            owner = owners.setdefault(doc_id, permit_type)
+            if owner != permit_type:
+                errors.append(
+                    f"{permit_type}.yaml: document id '{doc_id}' "
+                    f"is already used by {owner}.yaml"
+                )
+    if errors:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(errors))
+
+
+def compile_config(bundle_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate CONFIG_DIR and write every config file into one bundle.
+
+    The bundle stores each file's parsed tree and the SHA-256 of its
+    source, so loading it skips YAML parsing for files whose contents are
+    unchanged. Only this build step writes it; workers just read it.
+    """
+    bundle_path = bundle_path or CONFIG_BUNDLE
+    snapshot = load_snapshot()
+    with pinned_snapshot(snapshot):
+        validate_config()
+
+    size = write_bundle(bundle_path, dict(snapshot.files))
+    return {
+        "bundle": bundle_path,
+        "bytes": size,
+        "files": list(snapshot.files),
+        "permit_types": list(snapshot.permit_types),
+    }
@@ -0,0 +1,61 @@
+"""
+Background watcher that hot-reloads the YAML configuration.
+
+A daemon thread polls CONFIG_DIR every CONFIG_WATCH_S seconds (directory
+listing and stat calls only). When a file is added, removed or changed it
+calls database.reload_config(), which parses only the changed files,
+re-seeds the database and then swaps in the new config snapshot. An
+invalid config is logged, kept in last_error and retried on the next
+change; the previous config keeps being served meanwhile.
+"""
+
+import logging
+import os
+from typing import Callable, Optional
+
+from database import reload_config
+from periodic import PeriodicWorker
+
+CONFIG_WATCH_S = float(os.environ.get("CONFIG_WATCH_S", "2"))
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher:
+    """Polls CONFIG_DIR from a daemon thread and applies changes."""
+
+    def __init__(
+        self,
+        reload: Callable[[], bool] = reload_config,
+        interval_s: float = CONFIG_WATCH_S,
+    ):
+        self._reload = reload
+        self.interval_s = interval_s
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._worker = PeriodicWorker("config-watcher", self.check, interval_s)
+
+    def check(self) -> bool:
+        """Apply pending config changes now; returns whether any were applied."""
+        try:
+            changed = self._reload()
+        except Exception as e:
+            if str(e) != self.last_error:
+                logger.warning("Config reload failed, keeping current config: %s", e)
+            self.last_error = str(e)
+            return False
+        self.last_error = None
+        if changed:
+            self.reloads += 1
+        return changed
+
+    def start(self) -> None:
+        """Start the polling thread (idempotent)."""
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        self._worker.stop()
+
+
+config_watcher = ConfigWatcher()
@@ -0,0 +1,163 @@
+"""
+Bounded SQLite connection pool for the residence permit tracker.
+Connections are opened lazily, configured once (WAL, cache, mmap, busy
+timeout) and reused across requests instead of reconnecting per call.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import metrics
+
+POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "8192"))
+MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+# How long a checkout waits for a connection when all are in use (0 = forever)
+POOL_TIMEOUT_S = int(os.environ.get("SQLITE_POOL_TIMEOUT_S", "10"))
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection became free in time."""
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execution time to ``metrics``."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose shortcut methods go through ``InstrumentedCursor``."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def open_connection(path: str) -> sqlite3.Connection:
+    """Open a connection and apply the per-connection PRAGMA setup."""
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        # Plain connections unless timing is on, so disabled metrics cost nothing
+        factory=InstrumentedConnection if metrics.INSTRUMENT else sqlite3.Connection,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections to a single database file.
+
+    At most ``size`` connections are open at once; callers block until one
+    is returned, for up to ``timeout`` seconds (0 waits forever). A size of 0 disables pooling: every checkout opens a fresh
+    connection which is closed again on release.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, timeout: int = POOL_TIMEOUT_S):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.opened = 0
+        self.closed = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """
+        Check out a connection, opening one if the pool is not yet full.
+
+        Waits up to ``timeout`` seconds (default: the pool's) for a connection
+        to be returned, then raises PoolTimeout.
+        """
+        if timeout is None:
+            timeout = self.timeout or None
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self.size <= 0 or self._created < self.size
+            if can_open:
+                self._created += 1
+        if can_open:
+            try:
+                conn = open_connection(self.path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self.opened += 1
+            metrics.inc("sqlite_connections_opened_total")
+            return conn
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeout("Timed out waiting for a database connection")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding any open transaction."""
+        if conn.in_transaction:
+            conn.rollback()
+        if self.size <= 0:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+        self.closed += 1
+        metrics.inc("sqlite_connections_closed_total")
+        with self._lock:
+            self._created -= 1
@@ -3,33 +3,166 @@ SQLite database operations for residence permit application tracker.
 Enhanced with notes, due dates, and profile selection.
 """
 
+import hashlib
+import json
+import re
 import sqlite3
 import os
-from datetime import datetime, date
-from typing import Optional, List, Dict, Any
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta, timezone
+from typing import (
+    Callable,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Optional,
+    List,
+    Dict,
+    Any,
+    Tuple,
+)
 
+from connection_pool import ConnectionPool
+from document_cache import skeleton_cache, status_cache
 from config_loader import (
+    discover_permit_types,
+    get_config_hash,
     get_documents_for_permit,
-    get_all_permit_types,
+    get_important_links,
+    get_metadata,
+    get_permit_config_version,
+    get_permit_type_config,
     get_profiles,
     get_categories,
+    pinned_snapshot,
+    reload_snapshot,
+    swap_snapshot,
+    validate_config,
 )
 
 DATABASE_PATH = os.environ.get("DATABASE_PATH", "/app/data/residence.db")
 
+# User that owns progress when the caller does not identify itself
+DEFAULT_USER_ID = 1
+
+# How long events stay available to reconnecting /api/events clients
+EVENTS_RETENTION_S = int(os.environ.get("EVENTS_RETENTION_S", "300"))
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+# Called after a transaction that recorded events commits
+_event_listeners: List[Callable[[], None]] = []
+
+
+def get_pool() -> ConnectionPool:
+    """Return the connection pool for DATABASE_PATH, creating it on first use."""
+    global _pool
+    pool = _pool
+    if pool is None or pool.path != DATABASE_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.path != DATABASE_PATH:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(DATABASE_PATH)
+            pool = _pool
+    return pool
+
+
+def close_pool() -> None:
+    """Close all pooled connections."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
 
-def get_db_connection():
-    """Create a database connection."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+
+@contextmanager
+def get_db_connection() -> Iterator[sqlite3.Connection]:
+    """
+    Check out a pooled database connection for the duration of a block.
+
+    The outermost block is one transaction: it commits when the block
+    exits and rolls back if it raises. Nested calls on the same thread
+    reuse the outer block's connection and join its transaction, so a
+    multi-step write that calls other database functions stays atomic.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+
+    with get_pool().connection() as conn:
+        _local.conn = conn
+        try:
+            with conn:
+                yield conn
+        finally:
+            _local.conn = None
 
 
 def init_db():
     """Initialize the database schema and seed data."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    init_schema()
+    seed_config()
+
+
+def init_schema() -> None:
+    """Create (or migrate) the schema, without seeding the config."""
+    with get_db_connection() as conn:
+        _create_schema(conn.cursor())
+    # Possibly another database (revisions restart there)
+    skeleton_cache.clear()
+    status_cache.clear()
+    # Processes without event subscribers never prune, so start clean
+    prune_events(EVENTS_RETENTION_S)
+
 
+def seed_config() -> None:
+    """Seed permit types and documents from the config on disk."""
+    # Pick up config edits made since this process last read CONFIG_DIR
+    snapshot = reload_snapshot()
+    with pinned_snapshot(snapshot), get_db_connection() as conn:
+        # Workers may already be serving from this database (see startup.py)
+        conn.execute("BEGIN IMMEDIATE")
+        _seed_config(conn.cursor())
+    if snapshot is not None:
+        swap_snapshot(snapshot)
+
+
+def reload_config() -> bool:
+    """
+    Apply config changes made on disk since the current snapshot was loaded.
+
+    Changed files are parsed and validated, permit types and documents are
+    re-seeded incrementally, and only after that commits is the new
+    snapshot swapped in, so readers see either the old config or the new
+    one. Returns whether anything changed. Raises ConfigError (or a YAML
+    error) and keeps the current config if the new files are invalid.
+    """
+    snapshot = reload_snapshot()
+    if snapshot is None:
+        return False
+    with pinned_snapshot(snapshot):
+        # Covers profiles.yaml, which seeding alone does not look at
+        validate_config()
+        with get_db_connection() as conn:
+            # Other workers may be applying the same change; queue for the
+            # write lock now instead of failing to upgrade a read later
+            conn.execute("BEGIN IMMEDIATE")
+            _seed_config(conn.cursor())
+    swap_snapshot(snapshot)
+    # Entries of the old config version would never be hit again
+    skeleton_cache.clear()
+    return True
+
+
+def _create_schema(cursor: sqlite3.Cursor) -> None:
+    """Create tables and default rows if they do not exist."""
     # Create tables
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS permit_types (
@@ -51,7 +184,6 @@ def init_db():
             name_en TEXT NOT NULL,
             description TEXT,
             category TEXT,
-            profiles TEXT,
             link TEXT,
             link_text TEXT,
             validity_days INTEGER,
@@ -60,294 +192,2205 @@ def init_db():
         )
     """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_permit_sort
+        ON documents (permit_type, sort_order)
+    """)
+
+    # Which profiles each document applies to. The primary key covers
+    # "profiles of a document"; the reverse index covers "documents of a
+    # profile".
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_profiles (
+            document_id TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            PRIMARY KEY (document_id, profile),
+            FOREIGN KEY (document_id) REFERENCES documents(id)
+        ) WITHOUT ROWID
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_document_profiles_profile
+        ON document_profiles (profile, document_id)
+    """)
+
+    _migrate_document_profiles(cursor)
+
+    # Content hash of each config file last applied by _seed_config()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS config_versions (
+            filename TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            applied_at TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            external_id TEXT NOT NULL UNIQUE,
+            selected_profiles TEXT DEFAULT 'common',
+            selected_permit_type TEXT,
+            status_revision INTEGER NOT NULL DEFAULT 0,
+            sync_floor INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+
+    # Callers that do not identify themselves share the default user
+    cursor.execute(
+        "INSERT OR IGNORE INTO users (id, external_id) VALUES (?, 'default')",
+        (DEFAULT_USER_ID,),
+    )
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS document_status (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
             document_id TEXT NOT NULL,
             is_complete INTEGER DEFAULT 0,
             completed_at TEXT,
             notes TEXT,
             due_date TEXT,
+            expires_at TEXT,
+            revision INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id),
             FOREIGN KEY (document_id) REFERENCES documents(id),
-            UNIQUE(document_id)
+            UNIQUE(user_id, document_id)
         )
     """)
 
+    _migrate_single_user(cursor)
+    _migrate_expires_at(cursor)
+    _migrate_sync_revision(cursor)
+
+    # Lets progress counts read is_complete straight from the index
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_settings (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            selected_profiles TEXT DEFAULT 'common',
-            selected_permit_type TEXT
-        )
+        CREATE INDEX IF NOT EXISTS idx_document_status_user_complete
+        ON document_status (user_id, document_id, is_complete)
     """)
 
-    # Initialize user settings if not exists
+    # Range scans over due dates for the deadlines endpoint and digest
     cursor.execute("""
-        INSERT OR IGNORE INTO user_settings (id, selected_profiles)
-        VALUES (1, 'common')
+        CREATE INDEX IF NOT EXISTS idx_document_status_due
+        ON document_status (due_date, is_complete)
     """)
 
-    # Seed permit types from YAML
-    for permit in get_all_permit_types():
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO permit_types 
-            (id, name_fr, name_en, description, official_url, cost, last_verified)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                permit.get("id"),
-                permit.get("name_fr"),
-                permit.get("name_en"),
-                permit.get("description"),
-                permit.get("official_url"),
-                permit.get("cost"),
-                permit.get("last_verified"),
-            ),
-        )
+    # A user's completed documents by expiry, for /api/expiring and the
+    # expired flag
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_document_status_expires
+        ON document_status (user_id, expires_at) WHERE expires_at IS NOT NULL
+    """)
 
-    # Seed documents for each permit type from YAML
-    for permit_type in ["carte_resident", "titre_sejour"]:
-        documents = get_documents_for_permit(permit_type)
-        for order, doc in enumerate(documents):
-            profiles_str = ",".join(doc.get("profiles", ["common"]))
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO documents 
-                (id, permit_type, name_fr, name_en, description, category, 
-                 profiles, link, link_text, validity_days, sort_order)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    # Any change to a user's status rows bumps their status revision in the
+    # same transaction and stamps the row with it, so /api/sync can return
+    # the rows changed after a revision. A delta cannot express a deleted
+    # row, so deletes raise the user's sync_floor instead: clients synced
+    # before it get a full resync.
+    stamp = """
+        UPDATE users SET status_revision = status_revision + 1
+        WHERE id = NEW.user_id;
+        UPDATE document_status SET revision = (
+            SELECT status_revision FROM users WHERE id = NEW.user_id
+        ) WHERE id = NEW.id;
+    """
+    triggers = {
+        "trg_document_status_insert_sync": (
+            "AFTER INSERT ON document_status",
+            stamp,
+        ),
+        # Not on revision itself, which the stamp writes
+        "trg_document_status_update_sync": (
+            "AFTER UPDATE OF user_id, document_id, is_complete, completed_at, "
+            "notes, due_date, expires_at ON document_status",
+            stamp,
+        ),
+        "trg_document_status_delete_sync": (
+            "AFTER DELETE ON document_status",
+            """
+            UPDATE users SET status_revision = status_revision + 1,
+                sync_floor = status_revision + 1
+            WHERE id = OLD.user_id;
             """,
-                (
-                    doc.get("id"),
-                    permit_type,
-                    doc.get("name_fr"),
-                    doc.get("name_en"),
-                    doc.get("description"),
-                    doc.get("category"),
-                    profiles_str,
-                    doc.get("link"),
-                    doc.get("link_text"),
-                    doc.get("validity_days"),
-                    order,
-                ),
-            )
+        ),
+    }
+    for event in ("insert", "update", "delete"):
+        # Superseded by the triggers above
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_document_status_{event}_revision")
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
 
-            # Initialize status for each document
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO document_status (document_id, is_complete)
-                VALUES (?, 0)
-            """,
-                (doc.get("id"),),
-            )
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_document_status_user_revision
+        ON document_status (user_id, revision)
+    """)
 
-    conn.commit()
-    conn.close()
+    # Change log behind /api/events, written in the transaction of each
+    # mutation and pruned after EVENTS_RETENTION_S
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            data TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_user
+        ON events (user_id, id)
+    """)
 
-def get_permit_types() -> List[Dict[str, Any]]:
-    """Get all available permit types."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM permit_types")
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    # Latest deadline digest, written by the one process that computes it
+    # (see deadlines.py) and read by every worker
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deadline_digest (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            digest TEXT NOT NULL
+        )
+    """)
 
+    _create_search_index(cursor)
+    _create_status_history(cursor)
 
-def get_user_settings() -> Dict[str, Any]:
-    """Get user settings including selected profiles."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM user_settings WHERE id = 1")
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        settings = dict(row)
-        # Convert comma-separated profiles to list
-        profiles_str = settings.get("selected_profiles", "common")
-        settings["selected_profiles"] = (
-            profiles_str.split(",") if profiles_str else ["common"]
-        )
-        return settings
-    return {"selected_profiles": ["common"], "selected_permit_type": None}
 
+def _create_status_history(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the append-only status history, written by triggers.
 
-def update_user_profiles(profiles: List[str]) -> bool:
-    """Update user's selected profiles."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    profiles_str = ",".join(profiles) if profiles else "common"
-    cursor.execute(
+    Each mutation function opens a status_changes row (user, action) in
+    its transaction; every resulting change to a document_status row then
+    appends a status_events row holding the new values, the previous ones
+    (for undo) and the id of that change. status_snapshots hold a user's
+    whole status at some event id, so the state at a point in time is the
+    latest snapshot before it plus the events since. Events reverted by
+    undo_status_change point to the undoing change in undone_by.
+    """
+    existing = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'status_events'"
+    ).fetchone()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS status_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_changes_user
+        ON status_changes (user_id, id)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS status_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            change_id INTEGER,
+            user_id INTEGER NOT NULL,
+            document_id TEXT NOT NULL,
+            is_complete INTEGER NOT NULL,
+            completed_at TEXT,
+            notes TEXT,
+            due_date TEXT,
+            previous TEXT,
+            undone_by INTEGER,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_events_user
+        ON status_events (user_id, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_events_document
+        ON status_events (user_id, document_id, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_events_change
+        ON status_events (change_id)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS status_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_snapshots_user
+        ON status_snapshots (user_id, event_id)
+    """)
+
+    # Only the fields a user edits are history; expires_at is derived
+    def event(row: str, previous: str) -> str:
+        return f"""
+            INSERT INTO status_events (change_id, user_id, document_id,
+                is_complete, completed_at, notes, due_date, previous)
+            VALUES (
+                (SELECT MAX(id) FROM status_changes WHERE user_id = {row}.user_id),
+                {row}.user_id, {row}.document_id, {previous});
         """
-        UPDATE user_settings SET selected_profiles = ? WHERE id = 1
-    """,
-        (profiles_str,),
+
+    new_values = (
+        "COALESCE(NEW.is_complete, 0), NEW.completed_at, NEW.notes, NEW.due_date"
     )
-    conn.commit()
-    conn.close()
-    return True
+    old_values = (
+        "json_array(OLD.is_complete, OLD.completed_at, OLD.notes, OLD.due_date)"
+    )
+    triggers = {
+        "trg_status_events_insert": (
+            "AFTER INSERT ON document_status",
+            event("NEW", f"{new_values}, NULL"),
+        ),
+        "trg_status_events_update": (
+            "AFTER UPDATE ON document_status WHEN "
+            "OLD.is_complete IS NOT NEW.is_complete "
+            "OR OLD.completed_at IS NOT NEW.completed_at "
+            "OR OLD.notes IS NOT NEW.notes OR OLD.due_date IS NOT NEW.due_date",
+            event("NEW", f"{new_values}, {old_values}"),
+        ),
+        "trg_status_events_delete": (
+            "AFTER DELETE ON document_status",
+            event("OLD", f"0, NULL, NULL, NULL, {old_values}"),
+        ),
+    }
+    for name, (trigger_event, body) in triggers.items():
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {trigger_event} BEGIN {body} END"
+        )
 
+    # Progress recorded before the history existed becomes its baseline
+    if not existing:
+        cursor.execute(f"""
+            INSERT INTO status_snapshots (user_id, event_id, state)
+            SELECT user_id, 0, {_SNAPSHOT_STATE}
+            FROM document_status GROUP BY user_id
+        """)
 
-def get_documents_with_status(
-    permit_type: str, selected_profiles: Optional[List[str]] = None
-) -> List[Dict[str, Any]]:
-    """Get all documents for a permit type with their completion status."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    # Build query with optional profile filtering
-    query = """
-        SELECT d.*, ds.is_complete, ds.completed_at, ds.notes, ds.due_date
-        FROM documents d
-        LEFT JOIN document_status ds ON d.id = ds.document_id
-        WHERE d.permit_type = ?
+# A user's status rows as {document_id: [is_complete, completed_at, notes,
+# due_date]}, aggregated over document_status
+_SNAPSHOT_STATE = """json_group_object(document_id,
+    json_array(is_complete, completed_at, notes, due_date))"""
+
+
+# Case- and accent-insensitive: "sejour" matches "séjour"
+_FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+
+def _create_search_index(cursor: sqlite3.Cursor) -> None:
     """
+    Create the FTS5 indexes used by search_documents, kept in sync by triggers.
 
-    cursor.execute(query, (permit_type,))
-    rows = cursor.fetchall()
-    conn.close()
+    Both are contentless: search reads the text from documents and
+    document_status. documents_fts is keyed by documents.rowid and has a
+    scope column (the hex-encoded permit type) so a search within one permit
+    type is filtered by the index before ranking; a VACUUM can renumber
+    those rowids, so drop the table after one and init_db rebuilds it.
+    notes_fts is keyed by document_status.id and its owner column
+    ('u<user id>') keeps a search within one user's notes.
+    """
+    existing = {
+        row[0]
+        for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('documents_fts', 'notes_fts')"
+        )
+    }
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            name_fr, name_en, description, scope, content = '', {_FTS_OPTIONS}
+        )
+    """)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+            notes, owner, content = '', {_FTS_OPTIONS}
+        )
+    """)
 
-    documents = [dict(row) for row in rows]
+    # Both tables need the old values to remove a row from the index
+    doc_delete = """
+        INSERT INTO documents_fts
+            (documents_fts, rowid, name_fr, name_en, description, scope)
+        VALUES ('delete', OLD.rowid, OLD.name_fr, OLD.name_en, OLD.description,
+            hex(OLD.permit_type));
+    """
+    doc_insert = """
+        INSERT INTO documents_fts (rowid, name_fr, name_en, description, scope)
+        VALUES (NEW.rowid, NEW.name_fr, NEW.name_en, NEW.description,
+            hex(NEW.permit_type));
+    """
+    notes_delete = """
+        INSERT INTO notes_fts (notes_fts, rowid, notes, owner)
+        SELECT 'delete', OLD.id, OLD.notes, 'u' || OLD.user_id
+        WHERE COALESCE(OLD.notes, '') != '';
+    """
+    notes_insert = """
+        INSERT INTO notes_fts (rowid, notes, owner)
+        SELECT NEW.id, NEW.notes, 'u' || NEW.user_id
+        WHERE COALESCE(NEW.notes, '') != '';
+    """
+    triggers = {
+        "trg_documents_fts_insert": ("AFTER INSERT ON documents", doc_insert),
+        "trg_documents_fts_delete": ("AFTER DELETE ON documents", doc_delete),
+        "trg_documents_fts_update": (
+            "AFTER UPDATE OF name_fr, name_en, description, permit_type ON documents",
+            doc_delete + doc_insert,
+        ),
+        "trg_notes_fts_insert": ("AFTER INSERT ON document_status", notes_insert),
+        "trg_notes_fts_delete": ("AFTER DELETE ON document_status", notes_delete),
+        "trg_notes_fts_update": (
+            "AFTER UPDATE OF notes, user_id ON document_status "
+            "WHEN OLD.notes IS NOT NEW.notes OR OLD.user_id != NEW.user_id",
+            notes_delete + notes_insert,
+        ),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
 
-    # Filter by profiles if specified
-    if selected_profiles:
-        profiles_set = set(selected_profiles)
-        profiles_set.add("common")  # Always include common
+    # Index what is already there when upgrading an older database
+    if "documents_fts" not in existing:
+        cursor.execute("""
+            INSERT INTO documents_fts (rowid, name_fr, name_en, description, scope)
+            SELECT rowid, name_fr, name_en, description, hex(permit_type)
+            FROM documents
+        """)
+    if "notes_fts" not in existing:
+        cursor.execute("""
+            INSERT INTO notes_fts (rowid, notes, owner)
+            SELECT id, notes, 'u' || user_id FROM document_status
+            WHERE COALESCE(notes, '') != ''
+        """)
 
-        filtered = []
-        for doc in documents:
-            doc_profiles = set(doc.get("profiles", "common").split(","))
-            if doc_profiles & profiles_set:
-                filtered.append(doc)
-        documents = filtered
 
-    # Sort by sort_order
-    documents.sort(key=lambda x: x.get("sort_order", 0))
+def _migrate_single_user(cursor: sqlite3.Cursor) -> None:
+    """Move progress and settings from the single-user schema to the default user."""
+    tables = {
+        row[0]
+        for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
 
-    # Convert profiles string to list
-    for doc in documents:
-        doc["profiles"] = doc.get("profiles", "common").split(",")
+    if "user_settings" in tables:
+        cursor.execute(
+            """
+            UPDATE users SET
+                selected_profiles = (SELECT selected_profiles FROM user_settings),
+                selected_permit_type = (SELECT selected_permit_type FROM user_settings)
+            WHERE id = ? AND EXISTS (SELECT 1 FROM user_settings)
+        """,
+            (DEFAULT_USER_ID,),
+        )
+        cursor.execute("DROP TABLE user_settings")
 
-    return documents
+    # Single global revision counter, superseded by users.status_revision
+    cursor.execute("DROP TABLE IF EXISTS revisions")
 
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(document_status)")]
+    if "user_id" in columns:
+        return
 
-def mark_document_complete(document_id: str) -> bool:
-    """Mark a document as complete."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE document_status_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            document_id TEXT NOT NULL,
+            is_complete INTEGER DEFAULT 0,
+            completed_at TEXT,
+            notes TEXT,
+            due_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (document_id) REFERENCES documents(id),
+            UNIQUE(user_id, document_id)
+        )
+    """)
     cursor.execute(
         """
-        UPDATE document_status 
-        SET is_complete = 1, completed_at = datetime('now')
-        WHERE document_id = ?
+        INSERT INTO document_status_new
+            (user_id, document_id, is_complete, completed_at, notes, due_date)
+        SELECT ?, document_id, is_complete, completed_at, notes, due_date
+        FROM document_status
     """,
-        (document_id,),
+        (DEFAULT_USER_ID,),
     )
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return affected > 0
+    cursor.execute("DROP TABLE document_status")
+    cursor.execute("ALTER TABLE document_status_new RENAME TO document_status")
 
 
-def mark_document_incomplete(document_id: str) -> bool:
-    """Mark a document as incomplete."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        UPDATE document_status 
-        SET is_complete = 0, completed_at = NULL
-        WHERE document_id = ?
-    """,
-        (document_id,),
+def _migrate_expires_at(cursor: sqlite3.Cursor) -> None:
+    """Add document_status.expires_at and fill it for completed documents."""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(document_status)")}
+    if "expires_at" in columns:
+        return
+    cursor.execute("ALTER TABLE document_status ADD COLUMN expires_at TEXT")
+    cursor.execute(f"""
+        UPDATE document_status SET expires_at = (
+            SELECT {_expires_sql("document_status.completed_at", "d.validity_days")}
+            FROM documents d WHERE d.id = document_status.document_id
+        )
+        WHERE is_complete = 1
+    """)
+
+
+def _migrate_sync_revision(cursor: sqlite3.Cursor) -> None:
+    """Add document_status.revision and users.sync_floor for /api/sync."""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(document_status)")}
+    if "revision" not in columns:
+        # Rows from before are only returned by a full sync
+        cursor.execute(
+            "ALTER TABLE document_status ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"
+        )
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(users)")}
+    if "sync_floor" not in columns:
+        cursor.execute(
+            "ALTER TABLE users ADD COLUMN sync_floor INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+def _expires_sql(completed_at: str, validity_days: str) -> str:
+    """SQL for completed_at + validity_days (NULL when either is NULL)."""
+    return f"datetime({completed_at}, '+' || {validity_days} || ' days')"
+
+
+def _migrate_document_profiles(cursor: sqlite3.Cursor) -> None:
+    """Move the legacy comma-separated documents.profiles column into document_profiles."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(documents)")]
+    if "profiles" not in columns:
+        return
+
+    rows = cursor.execute("SELECT id, profiles FROM documents").fetchall()
+    cursor.executemany(
+        "INSERT OR IGNORE INTO document_profiles (document_id, profile) VALUES (?, ?)",
+        [
+            (doc_id, profile)
+            for doc_id, profiles_str in rows
+            for profile in (profiles_str or "common").split(",")
+        ],
     )
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return affected > 0
+    cursor.execute("ALTER TABLE documents DROP COLUMN profiles")
 
 
-def update_document_notes(document_id: str, notes: str) -> bool:
-    """Update notes for a document."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        UPDATE document_status 
-        SET notes = ?
-        WHERE document_id = ?
-    """,
-        (notes, document_id),
+# Document columns seeded from YAML, in the order used by _document_row()
+_DOCUMENT_COLUMNS = (
+    "permit_type",
+    "name_fr",
+    "name_en",
+    "description",
+    "category",
+    "link",
+    "link_text",
+    "validity_days",
+    "sort_order",
+)
+
+
+def _document_row(permit_type: str, order: int, doc: Dict[str, Any]) -> Tuple:
+    """Flatten a YAML document entry into _DOCUMENT_COLUMNS order."""
+    return (
+        permit_type,
+        doc.get("name_fr"),
+        doc.get("name_en"),
+        doc.get("description"),
+        doc.get("category"),
+        doc.get("link"),
+        doc.get("link_text"),
+        doc.get("validity_days"),
+        order,
     )
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return affected > 0
 
 
-def update_document_due_date(document_id: str, due_date: Optional[str]) -> bool:
-    """Update due date for a document."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        UPDATE document_status 
-        SET due_date = ?
-        WHERE document_id = ?
-    """,
-        (due_date, document_id),
+def _seed_config(cursor: sqlite3.Cursor) -> None:
+    """
+    Seed permit types and documents from the YAML config.
+
+    Every permit file in the config directory is seeded. Each file's content
+    hash is recorded in config_versions; files whose hash has not changed
+    since the last run are skipped entirely, and permit types whose file
+    was removed are dropped. Raises ConfigError if a file is invalid.
+    """
+    applied = dict(
+        cursor.execute("SELECT filename, content_hash FROM config_versions").fetchall()
     )
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return affected > 0
+    permit_types = discover_permit_types()
 
+    changed = []
+    for permit_type in permit_types:
+        filename = f"{permit_type}.yaml"
+        try:
+            content_hash = get_config_hash(filename)
+        except FileNotFoundError:
+            continue
+        if applied.get(filename) != content_hash:
+            changed.append((permit_type, filename, content_hash))
 
-def get_progress(
-    permit_type: str, selected_profiles: Optional[List[str]] = None
-) -> Dict[str, Any]:
-    """Get completion progress for a permit type."""
-    # Get filtered documents
-    documents = get_documents_with_status(permit_type, selected_profiles)
+    current = {f"{permit_type}.yaml" for permit_type in permit_types}
+    removed = [filename for filename in applied if filename not in current]
+    if not changed and not removed:
+        return
+    validate_config(permit_types)
 
-    total = len(documents)
-    completed = sum(1 for doc in documents if doc.get("is_complete"))
+    for filename in removed:
+        permit_type = filename[: -len(".yaml")]
+        _apply_permit_config(cursor, permit_type, {}, [])
+        cursor.execute("DELETE FROM permit_types WHERE id = ?", (permit_type,))
+        cursor.execute("DELETE FROM config_versions WHERE filename = ?", (filename,))
 
-    percentage = (completed / total * 100) if total > 0 else 0
-    return {
-        "total": total,
-        "completed": completed,
-        "remaining": total - completed,
-        "percentage": round(percentage, 1),
-    }
+    for permit_type, filename, content_hash in changed:
+        _apply_permit_config(
+            cursor,
+            permit_type,
+            get_permit_type_config(permit_type),
+            get_documents_for_permit(permit_type),
+        )
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO config_versions (filename, content_hash, applied_at)
+            VALUES (?, ?, datetime('now'))
+        """,
+            (filename, content_hash),
+        )
 
 
-def reset_progress(permit_type: str) -> bool:
-    """Reset all progress for a permit type."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        UPDATE document_status 
-        SET is_complete = 0, completed_at = NULL, notes = NULL, due_date = NULL
-        WHERE document_id IN (
-            SELECT id FROM documents WHERE permit_type = ?
+def _apply_permit_config(
+    cursor: sqlite3.Cursor,
+    permit_type: str,
+    permit: Dict[str, Any],
+    documents: List[Dict[str, Any]],
+) -> None:
+    """Diff one permit type's YAML against the database and apply the changes."""
+    if permit:
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO permit_types 
+            (id, name_fr, name_en, description, official_url, cost, last_verified)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+            (
+                permit.get("id"),
+                permit.get("name_fr"),
+                permit.get("name_en"),
+                permit.get("description"),
+                permit.get("official_url"),
+                permit.get("cost"),
+                permit.get("last_verified"),
+            ),
         )
+
+    columns = ", ".join(_DOCUMENT_COLUMNS)
+    existing = {
+        row[0]: tuple(row[1:])
+        for row in cursor.execute(
+            f"SELECT id, {columns} FROM documents WHERE permit_type = ?",
+            (permit_type,),
+        )
+    }
+    existing_profiles: Dict[str, set] = {}
+    for doc_id, profile in cursor.execute(
+        """
+        SELECT dp.document_id, dp.profile
+        FROM document_profiles dp
+        JOIN documents d ON d.id = dp.document_id
+        WHERE d.permit_type = ?
     """,
         (permit_type,),
-    )
-    conn.commit()
-    conn.close()
-    return True
+    ):
+        existing_profiles.setdefault(doc_id, set()).add(profile)
 
+    upserts = []
+    profile_rows = []
+    changed_profiles = []
+    for order, doc in enumerate(documents):
+        doc_id = doc.get("id")
+        row = _document_row(permit_type, order, doc)
+        if existing.get(doc_id) != row:
+            upserts.append((doc_id, *row))
+        profiles = set(doc.get("profiles", ["common"]))
+        if existing_profiles.get(doc_id) != profiles:
+            changed_profiles.append((doc_id,))
+            profile_rows.extend((doc_id, p) for p in profiles)
 
-def get_available_profiles() -> Dict[str, Any]:
-    """Get all available profiles from YAML config."""
-    return get_profiles()
+    # Completed statuses of documents whose validity changed (or that are
+    # back in the config) need their expiry recomputed
+    validity = _DOCUMENT_COLUMNS.index("validity_days")
+    expiry_updates = [
+        (doc_id, row[validity])
+        for doc_id, *row in upserts
+        if doc_id not in existing or existing[doc_id][validity] != row[validity]
+    ]
 
+    seen = {doc.get("id") for doc in documents}
+    # Status rows of removed documents are kept so progress survives a
+    # document being temporarily dropped from the config.
+    deletes = [(doc_id,) for doc_id in existing if doc_id not in seen]
 
-def get_available_categories() -> Dict[str, Any]:
-    """Get all available categories from YAML config."""
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in _DOCUMENT_COLUMNS)
+    placeholders = ", ".join("?" * (len(_DOCUMENT_COLUMNS) + 1))
+    cursor.executemany(
+        f"""
+        INSERT INTO documents (id, {columns}) VALUES ({placeholders})
+        ON CONFLICT(id) DO UPDATE SET {assignments}
+    """,
+        upserts,
+    )
+    cursor.executemany(
+        "DELETE FROM document_profiles WHERE document_id = ?",
+        changed_profiles + deletes,
+    )
+    cursor.executemany(
+        "INSERT INTO document_profiles (document_id, profile) VALUES (?, ?)",
+        profile_rows,
+    )
+    cursor.executemany("DELETE FROM documents WHERE id = ?", deletes)
+    expires = _expires_sql("completed_at", ":validity_days")
+    cursor.executemany(
+        f"""
+        UPDATE document_status SET expires_at = {expires}
+        WHERE document_id = :id AND is_complete = 1
+          AND expires_at IS NOT {expires}
+    """,
+        [{"id": doc_id, "validity_days": days} for doc_id, days in expiry_updates],
+    )
+
+
+def get_permit_types() -> List[Dict[str, Any]]:
+    """Get all available permit types."""
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT * FROM permit_types").fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_or_create_user(external_id: str) -> int:
+    """Get the internal id of a user, creating the user on first sight."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT id FROM users WHERE external_id = ?", (external_id,)
+        ).fetchone()
+        if row:
+            return row[0]
+        conn.execute(
+            """
+            INSERT INTO users (external_id) VALUES (?)
+            ON CONFLICT(external_id) DO NOTHING
+        """,
+            (external_id,),
+        )
+        row = conn.execute(
+            "SELECT id FROM users WHERE external_id = ?", (external_id,)
+        ).fetchone()
+    return row[0]
+
+
+def get_status_revision(user_id: int = DEFAULT_USER_ID) -> int:
+    """Get a user's status revision, which increases on every status change."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT status_revision FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def get_config_version() -> str:
+    """Get a digest of the config file hashes applied to the database."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT filename, content_hash FROM config_versions ORDER BY filename"
+        ).fetchall()
+    digest = hashlib.sha1()
+    for filename, content_hash in rows:
+        digest.update(f"{filename}:{content_hash};".encode())
+    return digest.hexdigest()
+
+
+def get_client_config_version() -> str:
+    """
+    Get the config version clients compare to drop their stored copies.
+
+    Covers the applied permit files and profiles.yaml, which holds the
+    profiles, categories and metadata of the stored bootstrap payload.
+    """
+    key = f"{get_config_version()}:{get_config_hash('profiles.yaml')}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def is_config_applied() -> bool:
+    """Whether the permit types of the current config snapshot are seeded."""
+    return get_config_version() == get_permit_config_version()
+
+
+def has_seeded_config() -> bool:
+    """Whether any config has been seeded yet (false on a new database)."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT 1 FROM config_versions LIMIT 1").fetchone()
+    return row is not None
+
+
+def get_status_validator(
+    permit_type: str,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> str:
+    """
+    Get a validator for a user's status-derived data of a permit type.
+
+    It changes whenever the user's status revision, the applied config, the
+    profile selection or the number of expired documents changes, so it can
+    be used as an ETag.
+    """
+    with get_db_connection() as conn:
+        revision = get_status_revision(user_id)
+        config_version = get_config_version()
+        # Documents expire without a write, so count them as well
+        expired = conn.execute(
+            """
+            SELECT COUNT(*) FROM document_status
+            WHERE user_id = ? AND expires_at <= datetime('now')
+        """,
+            (user_id,),
+        ).fetchone()[0]
+    profiles = ",".join(sorted(set(selected_profiles or []) | {"common"}))
+    key = f"{user_id}:{permit_type}:{profiles}:{revision}:{config_version}:{expired}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def get_user_settings(user_id: int = DEFAULT_USER_ID) -> Dict[str, Any]:
+    """Get user settings including selected profiles."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT id, selected_profiles, selected_permit_type
+            FROM users WHERE id = ?
+        """,
+            (user_id,),
+        ).fetchone()
+    if row:
+        settings = dict(row)
+        # Convert comma-separated profiles to list
+        profiles_str = settings.get("selected_profiles", "common")
+        settings["selected_profiles"] = (
+            profiles_str.split(",") if profiles_str else ["common"]
+        )
+        return settings
+    return {"selected_profiles": ["common"], "selected_permit_type": None}
+
+
+def update_user_profiles(profiles: List[str], user_id: int = DEFAULT_USER_ID) -> bool:
+    """Update user's selected profiles."""
+    profiles_str = ",".join(profiles) if profiles else "common"
+    with get_db_connection() as conn:
+        conn.execute(
+            """
+            UPDATE users SET selected_profiles = ? WHERE id = ?
+        """,
+            (profiles_str, user_id),
+        )
+        _record_event(
+            conn, user_id, "settings", {"selected_profiles": profiles_str.split(",")}
+        )
+    _events_committed()
+    return True
+
+
+def update_user_permit_type(
+    permit_type: Optional[str], user_id: int = DEFAULT_USER_ID
+) -> bool:
+    """Remember the user's selected permit type."""
+    with get_db_connection() as conn:
+        conn.execute(
+            "UPDATE users SET selected_permit_type = ? WHERE id = ?",
+            (permit_type or None, user_id),
+        )
+    return True
+
+
+def _profile_filter(selected_profiles: Optional[List[str]]) -> Tuple[str, List[str]]:
+    """
+    Build the SQL condition restricting documents (aliased ``d``) to profiles.
+
+    'common' is always included. Returns an empty condition when no
+    profiles are selected.
+    """
+    if not selected_profiles:
+        return "", []
+    profiles = sorted(set(selected_profiles) | {"common"})
+    placeholders = ",".join("?" * len(profiles))
+    sql = f"""
+        AND EXISTS (
+            SELECT 1 FROM document_profiles dp
+            WHERE dp.document_id = d.id AND dp.profile IN ({placeholders})
+        )
+    """
+    return sql, profiles
+
+
+def _progress_counts(total: int, completed: int, expired: int = 0) -> Dict[str, Any]:
+    """Shape total/completed/expired counts into a progress summary."""
+    percentage = (completed / total * 100) if total > 0 else 0
+    return {
+        "total": total,
+        "completed": completed,
+        "remaining": total - completed,
+        "expired": expired,
+        "percentage": round(percentage, 1),
+    }
+
+
+# Status columns overlaid on cached document skeletons, in response order
+_STATUS_COLUMNS = ("is_complete", "completed_at", "notes", "due_date", "expires_at")
+_NO_STATUS = (0, None, None, None, None)
+
+# Fields of the documents returned by get_documents_with_status, in order
+DOCUMENT_FIELDS = ("id", *_DOCUMENT_COLUMNS, "profiles")
+STATUS_FIELDS = (*_STATUS_COLUMNS, "expired")
+# Just what a client that already has the documents needs to refresh them
+STATUS_VIEW_FIELDS = ("id", "is_complete", "due_date", "notes", "expired")
+
+# A document's profiles, comma-separated. Aggregated from a sorted subquery
+# since group_concat() alone has no defined order, which would change
+# cached payloads and ETags between identical reads.
+_PROFILES_SQL = """(SELECT group_concat(profile) FROM (
+        SELECT dp.profile FROM document_profiles dp
+        WHERE dp.document_id = d.id ORDER BY dp.profile
+    )) AS profiles"""
+
+
+def select_document_fields(
+    fields: Optional[List[str]] = None, lang: Optional[str] = None
+) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve a field projection for get_documents_with_status.
+
+    ``fields`` picks fields from DOCUMENT_FIELDS and STATUS_FIELDS (all by
+    default); ``lang`` ('fr' or 'en') drops the name in the other
+    language. ``id`` is always included. Returns the fields in response
+    order, or None for every field. Raises ValueError on an unknown field
+    or language.
+    """
+    if lang not in (None, "fr", "en"):
+        raise ValueError(f"Unknown language: {lang}")
+    if fields is None and lang is None:
+        return None
+    known = DOCUMENT_FIELDS + STATUS_FIELDS
+    if fields is not None:
+        unknown = [f for f in fields if f not in known]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    wanted = set(fields or known) | {"id"}
+    if lang is not None:
+        wanted.discard("name_en" if lang == "fr" else "name_fr")
+    return tuple(f for f in known if f in wanted)
+
+
+def _document_skeleton(
+    permit_type: str,
+    selected_profiles: Optional[List[str]],
+    columns: Optional[Tuple[str, ...]] = None,
+) -> Tuple[Tuple[Dict[str, Any], str], ...]:
+    """
+    Get a permit type's documents for a profile set, without any status.
+
+    Only ``columns`` (from DOCUMENT_FIELDS; all by default) are selected.
+    Each document comes with its JSON serialization minus the closing
+    brace, so status fields can be appended. Cached per (permit type,
+    profile set, applied config version, columns); the returned dicts are
+    shared and must not be modified.
+    """
+    profiles = frozenset(selected_profiles) | {"common"} if selected_profiles else None
+    config_version = get_config_version()
+    key = (permit_type, profiles, config_version, columns)
+    skeleton = skeleton_cache.get(key)
+    if skeleton is not None:
+        return skeleton
+
+    if columns is None:
+        select = f"d.*, {_PROFILES_SQL}"
+    else:
+        select = ", ".join(
+            _PROFILES_SQL if c == "profiles" else f"d.{c}" for c in columns
+        )
+    query = f"""
+        SELECT {select}
+        FROM documents d
+        WHERE d.permit_type = ?
+    """
+    profile_sql, profile_params = _profile_filter(selected_profiles)
+    query += profile_sql + " ORDER BY d.sort_order"
+    with get_db_connection() as conn:
+        rows = conn.execute(query, [permit_type, *profile_params]).fetchall()
+
+    documents = []
+    for row in rows:
+        doc = dict(row)
+        if "profiles" in doc:
+            doc["profiles"] = (doc["profiles"] or "common").split(",")
+        documents.append((doc, json.dumps(doc, separators=(",", ":"))[:-1]))
+    skeleton = tuple(documents)
+    # A re-seed may have committed in between; only cache what matches the key
+    if get_config_version() == config_version:
+        skeleton_cache.put(key, skeleton)
+    return skeleton
+
+
+def _status_overlay(user_id: int) -> Dict[str, Tuple[Any, ...]]:
+    """
+    Get a user's status rows by document id, as _STATUS_COLUMNS tuples.
+
+    Cached per user and checked against the user's status revision, so
+    changes made by other processes are seen as well. The mutation
+    functions drop the entry of the user they change.
+    """
+    # Read before the rows: a concurrent write then leaves the entry stale
+    # (reloaded next time) rather than stamped with a revision it lacks
+    revision = get_status_revision(user_id)
+    statuses = status_cache.get(user_id, revision)
+    if statuses is not None:
+        return statuses
+    columns = ", ".join(_STATUS_COLUMNS)
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT document_id, {columns} FROM document_status WHERE user_id = ?",
+            (user_id,),
+        ).fetchall()
+    statuses = {row[0]: tuple(row[1:]) for row in rows}
+    status_cache.put(user_id, statuses, revision)
+    return statuses
+
+
+def _expired_ids(user_id: int) -> FrozenSet[str]:
+    """
+    Get the ids of a user's documents whose completion has expired.
+
+    Expiry depends on the clock rather than on the status revision, so it
+    is not part of the cached overlay; this one range scan on
+    idx_document_status_expires is made per read instead.
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT document_id FROM document_status
+            WHERE user_id = ? AND expires_at <= datetime('now')
+        """,
+            (user_id,),
+        ).fetchall()
+    return frozenset(row[0] for row in rows)
+
+
+def _status_fields(
+    status: Tuple[Any, ...], expired: bool, wanted: Tuple[str, ...] = STATUS_FIELDS
+) -> Dict[str, Any]:
+    fields = dict(zip(_STATUS_COLUMNS, status))
+    fields["expired"] = 1 if expired else 0
+    if wanted is not STATUS_FIELDS:
+        fields = {f: fields[f] for f in wanted}
+    return fields
+
+
+def _split_fields(
+    fields: Optional[Tuple[str, ...]],
+) -> Tuple[Optional[Tuple[str, ...]], Tuple[str, ...]]:
+    """Split a projection into document columns and status fields."""
+    if fields is None:
+        return None, STATUS_FIELDS
+    return (
+        tuple(f for f in fields if f in DOCUMENT_FIELDS),
+        tuple(f for f in fields if f in STATUS_FIELDS),
+    )
+
+
+def get_documents_with_status(
+    permit_type: str,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Get all documents for a permit type with a user's completion status.
+
+    ``fields`` (from select_document_fields) limits the fields returned.
+    """
+    columns, status_fields = _split_fields(fields)
+    skeleton = _document_skeleton(permit_type, selected_profiles, columns)
+    statuses = _status_overlay(user_id) if status_fields else {}
+    expired = _expired_ids(user_id) if statuses else frozenset()
+    documents = []
+    for doc, _ in skeleton:
+        document = dict(doc)
+        if "profiles" in document:
+            document["profiles"] = list(document["profiles"])
+        if status_fields:
+            status = statuses.get(doc["id"], _NO_STATUS)
+            document.update(_status_fields(status, doc["id"] in expired, status_fields))
+        documents.append(document)
+    return documents
+
+
+def get_documents_json(
+    permit_type: str,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> str:
+    """
+    Get get_documents_with_status() as a JSON array.
+
+    Only the status fields are serialized per call; the document fields
+    come pre-serialized from the skeleton cache.
+    """
+    columns, status_fields = _split_fields(fields)
+    skeleton = _document_skeleton(permit_type, selected_profiles, columns)
+    if not status_fields:
+        return f"[{','.join(prefix + '}' for _, prefix in skeleton)}]"
+    statuses = _status_overlay(user_id)
+    expired = _expired_ids(user_id) if statuses else frozenset()
+
+    def serialize(status: Tuple[Any, ...], is_expired: bool = False) -> str:
+        fields = _status_fields(status, is_expired, status_fields)
+        return json.dumps(fields, separators=(",", ":"))[1:]
+
+    no_status = serialize(_NO_STATUS)
+    parts = []
+    for doc, prefix in skeleton:
+        status = statuses.get(doc["id"])
+        if status is None:
+            parts.append(f"{prefix},{no_status}")
+        else:
+            parts.append(f"{prefix},{serialize(status, doc['id'] in expired)}")
+    return f"[{','.join(parts)}]"
+
+
+def get_status_changes(since: int, user_id: int = DEFAULT_USER_ID) -> Dict[str, Any]:
+    """
+    Get a user's status rows changed after status revision ``since``.
+
+    Returns the current ``revision`` (the ``since`` of the next call), the
+    changed ``statuses`` (document_id plus STATUS_FIELDS), the config
+    version and the user's settings. If ``since`` is 0, ahead of the
+    user's revision or older than a deleted row, ``full`` is true and
+    ``statuses`` holds every status row of the user instead: documents
+    without one have no status.
+    """
+    columns = ", ".join(_STATUS_COLUMNS)
+    with get_db_connection() as conn:
+        # Read before the rows: rows written in between are returned again
+        # by the next call rather than missed
+        row = conn.execute(
+            "SELECT status_revision, sync_floor FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+        revision, floor = row if row else (0, 0)
+        full = since <= 0 or since < floor or since > revision
+        rows = conn.execute(
+            f"""
+            SELECT document_id, {columns},
+                   COALESCE(expires_at <= datetime('now'), 0) AS expired
+            FROM document_status
+            WHERE user_id = ? AND revision > ?
+            ORDER BY revision
+        """,
+            (user_id, -1 if full else since),
+        ).fetchall()
+        config_version = get_client_config_version()
+        settings = get_user_settings(user_id)
+    return {
+        "revision": revision,
+        "full": full,
+        "config_version": config_version,
+        "user_settings": settings,
+        "statuses": [
+            {"document_id": row[0], **_status_fields(tuple(row[1:-1]), row[-1])}
+            for row in rows
+        ],
+    }
+
+
+# Words of a search query beyond this are ignored
+SEARCH_MAX_WORDS = 8
+
+
+def _match_expression(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = re.findall(r"\w+", text)[:SEARCH_MAX_WORDS]
+    if not words:
+        raise ValueError("Search query has no words")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_documents(
+    query: str,
+    permit_type: Optional[str] = None,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Search document names, descriptions and the user's notes.
+
+    Every word must match, as a prefix and ignoring case and accents.
+    Results are restricted to a permit type (if given) and profiles like
+    get_documents_with_status, and ranked best first by bm25, with name
+    matches weighing more than description or notes matches. Each hit says
+    whether it matched the ``document`` text, the ``notes`` or both.
+
+    Raises ValueError if the query has no searchable words.
+    """
+    match = _match_expression(query)
+    document_match = f"{{name_fr name_en description}} : ({match})"
+    if permit_type:
+        scope = permit_type.encode().hex().upper()
+        document_match = f'scope : "{scope}" AND {document_match}'
+    profile_sql, profile_params = _profile_filter(selected_profiles)
+    # Scope and owner only filter, so they get no weight in the ranking
+    sql = f"""
+        WITH hits (document_id, rank, source) AS (
+            SELECT d.id, bm25(documents_fts, 10.0, 10.0, 1.0, 0.0), 'document'
+            FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+            UNION ALL
+            SELECT ds.document_id, bm25(notes_fts, 1.0, 0.0), 'notes'
+            FROM notes_fts JOIN document_status ds ON ds.id = notes_fts.rowid
+            WHERE notes_fts MATCH ?
+        )
+        SELECT d.id, d.permit_type, d.category, d.name_fr, d.name_en, d.description,
+            COALESCE(ds.is_complete, 0) AS is_complete, ds.notes,
+            MIN(h.rank) AS rank, group_concat(DISTINCT h.source) AS matched
+        FROM hits h
+        JOIN documents d ON d.id = h.document_id
+        LEFT JOIN document_status ds ON ds.document_id = d.id AND ds.user_id = ?
+        WHERE d.permit_type = COALESCE(?, d.permit_type) {profile_sql}
+        GROUP BY d.id
+        ORDER BY rank, d.sort_order
+        LIMIT ?
+    """
+    params = [
+        document_match,
+        f"owner : u{user_id} AND notes : ({match})",
+        user_id,
+        permit_type,
+        *profile_params,
+        limit,
+    ]
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    results = []
+    for row in rows:
+        hit = dict(row)
+        hit["score"] = round(-hit.pop("rank"), 3)
+        hit["matched"] = sorted(hit["matched"].split(","))
+        results.append(hit)
+    return results
+
+
+def _status_upsert(columns: List[str], values: List[str]) -> str:
+    """
+    Build an upsert of a user's status row for an existing document.
+
+    Parameters are bound as (user_id, *values, document_id). Nothing is
+    written if the document does not exist.
+    """
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in columns)
+    return f"""
+        INSERT INTO document_status (user_id, document_id, {", ".join(columns)})
+        SELECT ?, id, {", ".join(values)} FROM documents WHERE id = ?
+        ON CONFLICT(user_id, document_id) DO UPDATE SET {assignments}
+    """
+
+
+# SQL for each status mutation, keyed by batch action name
+_STATUS_UPDATES = {
+    "complete": _status_upsert(
+        ["is_complete", "completed_at", "expires_at"],
+        ["1", "datetime('now')", _expires_sql("'now'", "validity_days")],
+    ),
+    "incomplete": _status_upsert(
+        ["is_complete", "completed_at", "expires_at"], ["0", "NULL", "NULL"]
+    ),
+    "notes": _status_upsert(["notes"], ["?"]),
+    "due_date": _status_upsert(["due_date"], ["?"]),
+}
+
+
+def _parse_due_date(value: Any) -> Optional[str]:
+    """Normalize a due date to YYYY-MM-DD (None clears it); ValueError if invalid."""
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid due date: {value!r}")
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid due date: {value!r}")
+
+
+def _update_status(
+    conn: sqlite3.Connection,
+    action: str,
+    document_id: str,
+    value: Any = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> bool:
+    """Apply one status mutation on an open connection (caller commits)."""
+    if action == "due_date":
+        value = _parse_due_date(value)
+    if action in ("complete", "incomplete"):
+        params = (user_id, document_id)
+    else:
+        params = (user_id, value, document_id)
+    cursor = conn.execute(_STATUS_UPDATES[action], params)
+    if cursor.rowcount <= 0:
+        return False
+    conn.execute(_STATUS_EVENT, (user_id, document_id))
+    return True
+
+
+def mark_document_complete(document_id: str, user_id: int = DEFAULT_USER_ID) -> bool:
+    """Mark a document as complete."""
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "complete")
+        success = _update_status(conn, "complete", document_id, user_id=user_id)
+    _status_committed(user_id)
+    return success
+
+
+def mark_document_incomplete(document_id: str, user_id: int = DEFAULT_USER_ID) -> bool:
+    """Mark a document as incomplete."""
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "incomplete")
+        success = _update_status(conn, "incomplete", document_id, user_id=user_id)
+    _status_committed(user_id)
+    return success
+
+
+def update_document_notes(
+    document_id: str, notes: str, user_id: int = DEFAULT_USER_ID
+) -> bool:
+    """Update notes for a document."""
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "notes")
+        success = _update_status(conn, "notes", document_id, notes, user_id)
+    _status_committed(user_id)
+    return success
+
+
+def update_document_due_date(
+    document_id: str, due_date: Optional[str], user_id: int = DEFAULT_USER_ID
+) -> bool:
+    """Update due date for a document."""
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "due_date")
+        success = _update_status(conn, "due_date", document_id, due_date, user_id)
+    _status_committed(user_id)
+    return success
+
+
+def apply_document_updates(
+    operations: List[Dict[str, Any]], user_id: int = DEFAULT_USER_ID
+) -> List[Dict[str, Any]]:
+    """
+    Apply several status mutations in a single transaction.
+
+    Args:
+        operations: Dicts with ``document_id`` and ``action`` (one of
+                    'complete', 'incomplete', 'notes', 'due_date'). The
+                    'notes' and 'due_date' actions read the value from the
+                    key of the same name.
+
+    Returns:
+        One result per operation, in order, with a ``success`` flag and an
+        ``error`` message for operations that could not be applied.
+    """
+    results = []
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "batch")
+        for op in operations:
+            document_id = op.get("document_id")
+            action = op.get("action")
+            result = {"document_id": document_id, "action": action}
+            if action not in _STATUS_UPDATES:
+                result.update(success=False, error=f"Unknown action: {action}")
+            elif not document_id:
+                result.update(success=False, error="Missing document_id")
+            else:
+                value = op.get(action)
+                if action == "notes" and value is None:
+                    value = ""
+                try:
+                    success = _update_status(conn, action, document_id, value, user_id)
+                except ValueError as e:
+                    result.update(success=False, error=str(e))
+                else:
+                    result["success"] = success
+                    if not success:
+                        result["error"] = "Document not found"
+            results.append(result)
+    _status_committed(user_id)
+    return results
+
+
+def get_progress(
+    permit_type: str,
+    selected_profiles: Optional[List[str]] = None,
+    breakdown: bool = False,
+    user_id: int = DEFAULT_USER_ID,
+) -> Dict[str, Any]:
+    """
+    Get a user's completion progress for a permit type.
+
+    Counts are computed by a single aggregate query. With ``breakdown``,
+    the same query is grouped by category and profile set, and the result
+    gains ``by_category`` and ``by_profile`` summaries.
+    """
+    profile_sql, profile_params = _profile_filter(selected_profiles)
+    params = [user_id, permit_type, *profile_params]
+
+    if not breakdown:
+        query = f"""
+            SELECT COUNT(*) AS total, COALESCE(SUM(ds.is_complete), 0) AS completed,
+                COALESCE(SUM(ds.expires_at <= datetime('now')), 0) AS expired
+            FROM documents d
+            LEFT JOIN document_status ds ON d.id = ds.document_id AND ds.user_id = ?
+            WHERE d.permit_type = ? {profile_sql}
+        """
+        with get_db_connection() as conn:
+            row = conn.execute(query, params).fetchone()
+        return _progress_counts(row["total"], row["completed"], row["expired"])
+
+    query = f"""
+        SELECT d.category, {_PROFILES_SQL},
+            COUNT(*) AS total,
+            COALESCE(SUM(ds.is_complete), 0) AS completed,
+            COALESCE(SUM(ds.expires_at <= datetime('now')), 0) AS expired
+        FROM documents d
+        LEFT JOIN document_status ds ON d.id = ds.document_id AND ds.user_id = ?
+        WHERE d.permit_type = ? {profile_sql}
+        GROUP BY d.category, profiles
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    wanted = set(profile_params)
+    totals = [0, 0, 0]
+    by_category: Dict[str, List[int]] = {}
+    by_profile: Dict[str, List[int]] = {}
+    for row in rows:
+        counts = (row["total"], row["completed"], row["expired"])
+        buckets = [
+            totals,
+            by_category.setdefault(row["category"] or "other", [0, 0, 0]),
+        ]
+        for profile in (row["profiles"] or "common").split(","):
+            if not wanted or profile in wanted:
+                buckets.append(by_profile.setdefault(profile, [0, 0, 0]))
+        for bucket in buckets:
+            for i, count in enumerate(counts):
+                bucket[i] += count
+
+    progress = _progress_counts(*totals)
+    progress["by_category"] = {k: _progress_counts(*v) for k, v in by_category.items()}
+    progress["by_profile"] = {k: _progress_counts(*v) for k, v in by_profile.items()}
+    return progress
+
+
+def reset_progress(permit_type: str, user_id: int = DEFAULT_USER_ID) -> bool:
+    """Reset all of a user's progress for a permit type."""
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "reset")
+        conn.execute(
+            """
+            UPDATE document_status 
+            SET is_complete = 0, completed_at = NULL, notes = NULL, due_date = NULL,
+                expires_at = NULL
+            WHERE user_id = ? AND document_id IN (
+                SELECT id FROM documents WHERE permit_type = ?
+            )
+        """,
+            (user_id, permit_type),
+        )
+        _record_event(conn, user_id, "reset", {"permit_type": permit_type})
+    _status_committed(user_id)
+    return True
+
+
+def get_deadlines(
+    within_days: int = 14,
+    user_id: int = DEFAULT_USER_ID,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Get a user's incomplete documents that are overdue or due soon.
+
+    Covers every permit type. Documents due before today are ``overdue``;
+    those due between today and ``within_days`` days from now are
+    ``upcoming``. Both lists are ordered by due date. Today is the UTC date,
+    as for the digest.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    horizon = today + timedelta(days=within_days)
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT ds.document_id, d.permit_type, d.category, d.name_fr, d.name_en,
+                   ds.due_date, CAST(julianday(ds.due_date) - julianday(?) AS INTEGER)
+                       AS days_left
+            FROM document_status ds
+            JOIN documents d ON d.id = ds.document_id
+            WHERE ds.user_id = ? AND ds.is_complete = 0
+              AND ds.due_date IS NOT NULL AND ds.due_date <= ?
+            ORDER BY ds.due_date, d.sort_order
+        """,
+            (today.isoformat(), user_id, horizon.isoformat()),
+        ).fetchall()
+
+    deadlines = [dict(row) for row in rows]
+    return {
+        "today": today.isoformat(),
+        "within_days": within_days,
+        "overdue": [d for d in deadlines if d["days_left"] < 0],
+        "upcoming": [d for d in deadlines if d["days_left"] >= 0],
+    }
+
+
+def get_expiring(
+    within_days: int = 30,
+    permit_type: Optional[str] = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's completed documents that have expired or expire soon.
+
+    Returns documents whose expires_at (completed_at + validity_days) is
+    within ``within_days`` days from now, earliest first, each with an
+    ``expired`` flag. Optionally limited to one permit type.
+    """
+    query = """
+        SELECT ds.document_id, d.permit_type, d.category, d.name_fr, d.name_en,
+               d.validity_days, ds.completed_at, ds.expires_at,
+               ds.expires_at <= datetime('now') AS expired
+        FROM document_status ds
+        JOIN documents d ON d.id = ds.document_id
+        WHERE ds.user_id = ? AND ds.expires_at <= datetime('now', ?)
+    """
+    params: List[Any] = [user_id, f"+{within_days} days"]
+    if permit_type:
+        query += " AND d.permit_type = ?"
+        params.append(permit_type)
+    query += " ORDER BY ds.expires_at"
+
+    with get_db_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def compute_deadline_digest(
+    today: Optional[date] = None, windows: Tuple[int, ...] = (7, 30)
+) -> Dict[str, Any]:
+    """
+    Summarize incomplete due dates across all users.
+
+    Counts overdue documents, documents due today and documents due within
+    each of ``windows`` days, in total and per permit type. The query is a
+    range scan on idx_document_status_due bounded by the largest window.
+    Dates are UTC, so every process agrees on when a day starts.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    bounds = [(today + timedelta(days=n)).isoformat() for n in windows]
+    window_sums = "".join(
+        f", SUM(ds.due_date >= :today AND ds.due_date <= :within_{n})"
+        f" AS due_within_{n}_days"
+        for n in windows
+    )
+    params = {"today": today.isoformat(), "horizon": max(bounds)}
+    params.update({f"within_{n}": bound for n, bound in zip(windows, bounds)})
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT d.permit_type,
+                   SUM(ds.due_date < :today) AS overdue,
+                   SUM(ds.due_date = :today) AS due_today
+                   {window_sums}
+            FROM document_status ds INDEXED BY idx_document_status_due
+            JOIN documents d ON d.id = ds.document_id
+            WHERE ds.due_date IS NOT NULL AND ds.due_date <= :horizon
+              AND ds.is_complete = 0
+            GROUP BY d.permit_type
+        """,
+            params,
+        ).fetchall()
+        users_with_overdue = conn.execute(
+            """
+            SELECT COUNT(DISTINCT user_id)
+            FROM document_status INDEXED BY idx_document_status_due
+            WHERE due_date IS NOT NULL AND due_date < ? AND is_complete = 0
+        """,
+            (params["today"],),
+        ).fetchone()[0]
+
+    by_permit_type = {row[0]: dict(row) for row in rows}
+    totals = {}
+    for counts in by_permit_type.values():
+        del counts["permit_type"]
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+
+    return {
+        "date": today.isoformat(),
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "overdue": totals.get("overdue", 0),
+        "due_today": totals.get("due_today", 0),
+        **{
+            f"due_within_{n}_days": totals.get(f"due_within_{n}_days", 0)
+            for n in windows
+        },
+        "users_with_overdue": users_with_overdue,
+        "by_permit_type": by_permit_type,
+    }
+
+
+def save_deadline_digest(digest: Dict[str, Any]) -> None:
+    """Store the latest deadline digest for every worker to serve."""
+    with get_db_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO deadline_digest (id, digest) VALUES (1, ?)",
+            (json.dumps(digest),),
+        )
+
+
+def get_deadline_digest() -> Optional[Dict[str, Any]]:
+    """Get the stored deadline digest, or None if none was computed yet."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT digest FROM deadline_digest WHERE id = 1").fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def get_available_profiles() -> Dict[str, Any]:
+    """Get all available profiles from YAML config."""
+    return get_profiles()
+
+
+def get_available_categories() -> Dict[str, Any]:
+    """Get all available categories from YAML config."""
     return get_categories()
+
+
+def get_bootstrap_data(
+    permit_type: Optional[str] = None,
+    selected_profiles: Optional[List[str]] = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> Dict[str, Any]:
+    """
+    Build everything the frontend needs for first render in one pass.
+
+    Config sections come from the config cache and all database reads share
+    one connection. If ``permit_type`` is not given, the user's saved
+    permit type is used; documents and progress are only included when a
+    permit type is known. ``selected_profiles`` defaults to the saved
+    profiles.
+    """
+    with get_db_connection():
+        settings = get_user_settings(user_id)
+        permit_types = get_permit_types()
+        permit_type = permit_type or settings.get("selected_permit_type")
+        if permit_type not in {p["id"] for p in permit_types}:
+            permit_type = None
+        profiles = selected_profiles or settings.get("selected_profiles", ["common"])
+
+        data = {
+            "categories": get_categories(),
+            "profiles": get_profiles(),
+            "metadata": get_metadata(),
+            "important_links": get_important_links(),
+            "permit_types": permit_types,
+            "user_settings": settings,
+            "permit_type": permit_type,
+        }
+        if permit_type:
+            data["documents"] = get_documents_with_status(
+                permit_type, profiles, user_id
+            )
+            data["progress"] = get_progress(permit_type, profiles, user_id=user_id)
+    return data
+
+
+# The status row after a mutation, as a delta for /api/events subscribers.
+# Bound as (user_id, document_id).
+_STATUS_EVENT = """
+    INSERT INTO events (user_id, type, data)
+    SELECT ds.user_id, 'status', json_object(
+        'document_id', ds.document_id, 'permit_type', d.permit_type,
+        'is_complete', ds.is_complete, 'completed_at', ds.completed_at,
+        'notes', ds.notes, 'due_date', ds.due_date, 'expires_at', ds.expires_at,
+        'expired', COALESCE(ds.expires_at <= datetime('now'), 0))
+    FROM document_status ds JOIN documents d ON d.id = ds.document_id
+    WHERE ds.user_id = ? AND ds.document_id = ?
+"""
+
+
+def _record_event(
+    conn: sqlite3.Connection, user_id: int, event_type: str, data: Dict[str, Any]
+) -> None:
+    """Append an event for a user on an open connection (caller commits)."""
+    conn.execute(
+        "INSERT INTO events (user_id, type, data) VALUES (?, ?, ?)",
+        (user_id, event_type, json.dumps(data, separators=(",", ":"))),
+    )
+
+
+def add_event_listener(listener: Callable[[], None]) -> None:
+    """Call ``listener`` after every commit that recorded events."""
+    _event_listeners.append(listener)
+
+
+def _events_committed() -> None:
+    for listener in _event_listeners:
+        listener()
+
+
+def _status_committed(user_id: int) -> None:
+    """Follow up a committed change to a user's status rows."""
+    status_cache.invalidate(user_id)
+    _events_committed()
+
+
+def get_last_event_id() -> int:
+    """Get the id of the newest event ever recorded (0 if none)."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'events'"
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def get_events(after_id: int, limit: int = 500) -> List[Tuple[int, int, str, str]]:
+    """Get events recorded after ``after_id``, oldest first, as (id, user_id, type, data)."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, user_id, type, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit),
+        ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def get_user_events(
+    user_id: int, after_id: int
+) -> Optional[List[Tuple[int, int, str, str]]]:
+    """
+    Get a user's events recorded after ``after_id``, oldest first.
+
+    Returns None if events after ``after_id`` may already have been pruned
+    (or ``after_id`` is from another database), in which case the caller
+    has to reload the user's state instead.
+    """
+    with get_db_connection() as conn:
+        oldest = conn.execute("SELECT MIN(id) FROM events").fetchone()[0]
+        last = get_last_event_id()
+        if after_id > last or after_id + 1 < (oldest or last + 1):
+            return None
+        rows = conn.execute(
+            """
+            SELECT id, user_id, type, data FROM events
+            WHERE user_id = ? AND id > ? ORDER BY id
+        """,
+            (user_id, after_id),
+        ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def prune_events(max_age_s: int = EVENTS_RETENTION_S) -> int:
+    """Delete events older than ``max_age_s`` seconds; returns the number deleted."""
+    with get_db_connection() as conn:
+        cursor = conn.execute(
+            "DELETE FROM events WHERE created_at < datetime('now', ?)",
+            (f"-{int(max_age_s)} seconds",),
+        )
+    return cursor.rowcount
+
+
+# The compaction job snapshots a user's status once this many events of
+# theirs have accumulated since the last snapshot
+STATUS_SNAPSHOT_EVERY = int(os.environ.get("STATUS_SNAPSHOT_EVERY", "100"))
+# Status history older than this is folded into a snapshot
+STATUS_HISTORY_DAYS = int(os.environ.get("STATUS_HISTORY_DAYS", "365"))
+
+# Restores a status row to logged values; bound as (user_id, is_complete,
+# completed_at, notes, due_date, is_complete, completed_at, document_id)
+_RESTORE_STATUS = _status_upsert(
+    ["is_complete", "completed_at", "notes", "due_date", "expires_at"],
+    [
+        "?",
+        "?",
+        "?",
+        "?",
+        f"CASE WHEN ? = 1 THEN {_expires_sql('?', 'validity_days')} END",
+    ],
+)
+
+_HISTORY_COLUMNS = """e.id, e.document_id, c.action, e.is_complete, e.completed_at,
+    e.notes, e.due_date, e.created_at, e.undone_by IS NOT NULL AS undone"""
+
+
+def _begin_change(conn: sqlite3.Connection, user_id: int, action: str) -> int:
+    """Open the change that the following status writes are logged under."""
+    cursor = conn.execute(
+        "INSERT INTO status_changes (user_id, action) VALUES (?, ?)",
+        (user_id, action),
+    )
+    return cursor.lastrowid
+
+
+def get_document_history(
+    document_id: str,
+    user_id: int = DEFAULT_USER_ID,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's logged states of one document, newest first.
+
+    Each entry is the document's status after a change, with the action
+    that made it. Pass the last id seen as ``before_id`` for the next page.
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {_HISTORY_COLUMNS}
+            FROM status_events e LEFT JOIN status_changes c ON c.id = e.change_id
+            WHERE e.user_id = ? AND e.document_id = ? AND e.id < ?
+            ORDER BY e.id DESC LIMIT ?
+        """,
+            (user_id, document_id, before_id or sys.maxsize, limit),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_timeline(
+    permit_type: str,
+    user_id: int = DEFAULT_USER_ID,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Get a user's logged status changes across a permit type, newest first."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {_HISTORY_COLUMNS}
+            FROM status_events e
+            JOIN documents d ON d.id = e.document_id
+            LEFT JOIN status_changes c ON c.id = e.change_id
+            WHERE e.user_id = ? AND d.permit_type = ? AND e.id < ?
+            ORDER BY e.id DESC LIMIT ?
+        """,
+            (user_id, permit_type, before_id or sys.maxsize, limit),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _parse_timestamp(value: str) -> str:
+    """Normalize an ISO timestamp (UTC unless it has an offset) to SQLite's format."""
+    try:
+        moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def get_statuses_at(
+    at: str, permit_type: str, user_id: int = DEFAULT_USER_ID
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's status of each document of a permit type as it was at ``at``.
+
+    Starts from the user's latest snapshot taken by then and replays only
+    the events logged after it. Raises ValueError if ``at`` is not a
+    timestamp or predates the history that is still kept.
+    """
+    at = _parse_timestamp(at)
+    with get_db_connection() as conn:
+        snapshot = conn.execute(
+            """
+            SELECT event_id, state FROM status_snapshots
+            WHERE user_id = ? AND created_at <= ?
+            ORDER BY event_id DESC LIMIT 1
+        """,
+            (user_id, at),
+        ).fetchone()
+        if snapshot is not None:
+            after_id, state = snapshot[0], json.loads(snapshot[1])
+        else:
+            # Replaying from nothing is only right if no event was compacted
+            # away and nothing predates the history
+            oldest = conn.execute(
+                """
+                SELECT event_id, created_at FROM status_snapshots
+                WHERE user_id = ? ORDER BY event_id LIMIT 1
+            """,
+                (user_id,),
+            ).fetchone()
+            if (
+                oldest is not None
+                and not conn.execute(
+                    "SELECT 1 FROM status_events WHERE user_id = ? AND id <= ? LIMIT 1",
+                    (user_id, oldest[0]),
+                ).fetchone()
+            ):
+                raise ValueError(f"No status history before {oldest[1]}")
+            after_id, state = 0, {}
+        for row in conn.execute(
+            """
+            SELECT document_id, is_complete, completed_at, notes, due_date
+            FROM status_events
+            WHERE user_id = ? AND id > ? AND created_at <= ?
+            ORDER BY id
+        """,
+            (user_id, after_id, at),
+        ):
+            state[row[0]] = list(row[1:])
+        documents = conn.execute(
+            "SELECT id FROM documents WHERE permit_type = ? ORDER BY sort_order",
+            (permit_type,),
+        ).fetchall()
+
+    fields = ("is_complete", "completed_at", "notes", "due_date")
+    return [
+        {"document_id": doc_id, **dict(zip(fields, state.get(doc_id, _NO_STATUS)))}
+        for (doc_id,) in documents
+    ]
+
+
+def undo_status_change(
+    user_id: int = DEFAULT_USER_ID, document_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Revert a user's most recent status change that is not undone yet.
+
+    A change is everything one mutation call wrote (e.g. a whole reset or
+    batch); with ``document_id``, only that document's most recent change
+    is reverted. The revert is itself logged as an 'undo' change, which is
+    not undone by later calls. Returns the reverted change's id, action and
+    documents, or None if there is nothing to undo.
+    """
+    with get_db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if document_id is None:
+            target = conn.execute(
+                """
+                SELECT c.id, c.action FROM status_changes c
+                WHERE c.user_id = ? AND c.action != 'undo' AND EXISTS (
+                    SELECT 1 FROM status_events e
+                    WHERE e.change_id = c.id AND e.undone_by IS NULL
+                )
+                ORDER BY c.id DESC LIMIT 1
+            """,
+                (user_id,),
+            ).fetchone()
+        else:
+            target = conn.execute(
+                """
+                SELECT c.id, c.action FROM status_events e
+                JOIN status_changes c ON c.id = e.change_id
+                WHERE e.user_id = ? AND e.document_id = ? AND e.undone_by IS NULL
+                  AND c.action != 'undo'
+                ORDER BY e.id DESC LIMIT 1
+            """,
+                (user_id, document_id),
+            ).fetchone()
+        if target is None:
+            return None
+        change_id, action = target
+
+        # Newest first, so a document changed twice ends at its oldest value
+        events = conn.execute(
+            """
+            SELECT id, document_id, previous FROM status_events
+            WHERE change_id = ? AND undone_by IS NULL
+              AND document_id = COALESCE(?, document_id)
+            ORDER BY id DESC
+        """,
+            (change_id, document_id),
+        ).fetchall()
+        undo_id = _begin_change(conn, user_id, "undo")
+        for _, doc_id, previous in events:
+            is_complete, completed_at, notes, due_date = (
+                json.loads(previous) if previous else _NO_STATUS[:4]
+            )
+            conn.execute(
+                _RESTORE_STATUS,
+                (
+                    user_id,
+                    is_complete,
+                    completed_at,
+                    notes,
+                    due_date,
+                    is_complete,
+                    completed_at,
+                    doc_id,
+                ),
+            )
+            conn.execute(_STATUS_EVENT, (user_id, doc_id))
+        conn.executemany(
+            "UPDATE status_events SET undone_by = ? WHERE id = ?",
+            [(undo_id, event_id) for event_id, _, _ in events],
+        )
+    _status_committed(user_id)
+    return {
+        "change_id": change_id,
+        "action": action,
+        "documents": sorted({doc_id for _, doc_id, _ in events}),
+    }
+
+
+def compact_status_history(
+    snapshot_every: int = STATUS_SNAPSHOT_EVERY,
+    keep_days: int = STATUS_HISTORY_DAYS,
+) -> Dict[str, int]:
+    """
+    Snapshot busy users and fold old status history into snapshots.
+
+    Users with at least ``snapshot_every`` events since their last
+    snapshot get a new one. For each user, everything up to their newest
+    snapshot older than ``keep_days`` is then deleted: older events and
+    snapshots, and changes left without events. Returns how many
+    snapshots were taken and how many rows were deleted.
+    """
+    horizon = f"-{int(keep_days)} days"
+    with get_db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        snapshots = conn.execute(
+            f"""
+            INSERT INTO status_snapshots (user_id, event_id, state)
+            SELECT user_id,
+                (SELECT seq FROM sqlite_sequence WHERE name = 'status_events'),
+                {_SNAPSHOT_STATE}
+            FROM document_status
+            WHERE user_id IN (
+                SELECT e.user_id FROM status_events e
+                WHERE e.id > COALESCE((
+                    SELECT MAX(s.event_id) FROM status_snapshots s
+                    WHERE s.user_id = e.user_id
+                ), 0)
+                GROUP BY e.user_id HAVING COUNT(*) >= ?
+            )
+            GROUP BY user_id
+        """,
+            (snapshot_every,),
+        ).rowcount
+
+        bases = conn.execute(
+            """
+            SELECT user_id, MAX(id), MAX(event_id) FROM status_snapshots
+            WHERE created_at <= datetime('now', ?)
+            GROUP BY user_id
+        """,
+            (horizon,),
+        ).fetchall()
+        events = conn.executemany(
+            "DELETE FROM status_events WHERE user_id = ? AND id <= ?",
+            [(user_id, event_id) for user_id, _, event_id in bases],
+        ).rowcount
+        old_snapshots = conn.executemany(
+            "DELETE FROM status_snapshots WHERE user_id = ? AND id < ?",
+            [(user_id, snapshot_id) for user_id, snapshot_id, _ in bases],
+        ).rowcount
+        changes = conn.execute("""
+            DELETE FROM status_changes WHERE NOT EXISTS (
+                SELECT 1 FROM status_events e WHERE e.change_id = status_changes.id
+            )
+        """).rowcount
+    return {
+        "snapshots": snapshots,
+        "events_deleted": events,
+        "snapshots_deleted": old_snapshots,
+        "changes_deleted": changes,
+    }
+
+
+EXPORT_FORMAT = "residence-export"
+EXPORT_VERSION = 1
+# Rows fetched / written per round trip when exporting and importing
+EXPORT_CHUNK_SIZE = 500
+
+_IMPORT_STATUS = _status_upsert(
+    ["is_complete", "completed_at", "notes", "due_date"], ["?", "?", "?", "?"]
+)
+
+
+def _ndjson(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def iter_export(
+    user_id: int = DEFAULT_USER_ID, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Yield a user's dossier as chunks of NDJSON.
+
+    Records are, in order: a header, the user's settings, one per permit
+    type, one per status row and an end record with the status count.
+    Status rows are read ``chunk_size`` at a time, after the last document
+    id sent, so memory use does not grow with the number of rows. Each
+    batch is read on its own pooled connection, which is returned before
+    the chunk is yielded: a slow download does not hold a connection or
+    an open read transaction.
+    """
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT selected_profiles, selected_permit_type FROM users WHERE id = ?",
+            (user_id,),
+        ).fetchone()
+        permits = conn.execute("SELECT * FROM permit_types ORDER BY id").fetchall()
+    profiles = row["selected_profiles"] if row else None
+    lines = [
+        _ndjson(
+            {
+                "type": "header",
+                "format": EXPORT_FORMAT,
+                "version": EXPORT_VERSION,
+                "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+        ),
+        _ndjson(
+            {
+                "type": "settings",
+                "selected_profiles": (profiles.split(",") if profiles else ["common"]),
+                "selected_permit_type": (row["selected_permit_type"] if row else None),
+            }
+        ),
+    ]
+    for permit in permits:
+        lines.append(_ndjson({"type": "permit_type", **dict(permit)}))
+    yield "".join(lines)
+
+    count = 0
+    last_id = ""
+    while True:
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT ds.document_id, d.permit_type, ds.is_complete,
+                       ds.completed_at, ds.notes, ds.due_date
+                FROM document_status ds
+                LEFT JOIN documents d ON d.id = ds.document_id
+                WHERE ds.user_id = ? AND ds.document_id > ?
+                ORDER BY ds.document_id
+                LIMIT ?
+            """,
+                (user_id, last_id, chunk_size),
+            ).fetchall()
+        if not rows:
+            break
+        count += len(rows)
+        last_id = rows[-1]["document_id"]
+        yield "".join(_ndjson({"type": "status", **dict(r)}) for r in rows)
+    yield _ndjson({"type": "end", "statuses": count})
+
+
+def import_dossier(
+    lines: Iterable[Any],
+    user_id: int = DEFAULT_USER_ID,
+    replace: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Apply an NDJSON export (as produced by iter_export) to a user.
+
+    ``lines`` may be any iterable of str/bytes lines, e.g. a request stream.
+    Status rows are written ``chunk_size`` at a time with executemany, all
+    in one transaction that is rolled back if the input is malformed or
+    truncated. With ``replace`` the user's existing statuses are deleted
+    first; otherwise imported rows are merged over them. Statuses of
+    documents that are not in the current config are skipped. Permit type
+    records are informational and ignored.
+
+    Raises ValueError on invalid input.
+    """
+    result = {"statuses": 0, "applied": 0, "settings": False}
+    header_seen = end_seen = False
+    batch: List[Tuple[Any, ...]] = []
+
+    def flush() -> None:
+        if batch:
+            cursor = conn.executemany(_IMPORT_STATUS, batch)
+            result["applied"] += max(cursor.rowcount, 0)
+            batch.clear()
+
+    with get_db_connection() as conn:
+        _begin_change(conn, user_id, "import")
+        if replace:
+            # trg_document_status_delete_sync bumps the status revision and
+            # sync floor, so cached statuses, ETags and synced clients all
+            # see the deletion
+            conn.execute("DELETE FROM document_status WHERE user_id = ?", (user_id,))
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(f"Line {number}: invalid JSON")
+            kind = record.get("type") if isinstance(record, dict) else None
+
+            if not header_seen:
+                if kind != "header" or record.get("format") != EXPORT_FORMAT:
+                    raise ValueError("Not a residence export (missing header)")
+                if record.get("version", 0) > EXPORT_VERSION:
+                    raise ValueError(f"Unsupported export version {record['version']}")
+                header_seen = True
+            elif end_seen:
+                raise ValueError(f"Line {number}: data after end record")
+            elif kind == "settings":
+                profiles = record.get("selected_profiles") or ["common"]
+                conn.execute(
+                    """
+                    UPDATE users SET selected_profiles = ?, selected_permit_type = ?
+                    WHERE id = ?
+                """,
+                    (",".join(profiles), record.get("selected_permit_type"), user_id),
+                )
+                result["settings"] = True
+            elif kind == "status":
+                document_id = record.get("document_id")
+                if not isinstance(document_id, str):
+                    raise ValueError(f"Line {number}: status without document_id")
+                try:
+                    due_date = _parse_due_date(record.get("due_date"))
+                except ValueError as e:
+                    raise ValueError(f"Line {number}: {e}")
+                batch.append(
+                    (
+                        user_id,
+                        1 if record.get("is_complete") else 0,
+                        record.get("completed_at"),
+                        record.get("notes"),
+                        due_date,
+                        document_id,
+                    )
+                )
+                result["statuses"] += 1
+                if len(batch) >= chunk_size:
+                    flush()
+            elif kind == "end":
+                if record.get("statuses") != result["statuses"]:
+                    raise ValueError("Status count does not match end record")
+                end_seen = True
+        if not end_seen:
+            raise ValueError("Export is truncated (no end record)")
+        flush()
+        expires = f"""CASE WHEN is_complete = 1 THEN (
+                SELECT {_expires_sql("document_status.completed_at", "d.validity_days")}
+                FROM documents d WHERE d.id = document_status.document_id
+            ) END"""
+        # Only rows whose expiry changes: any write bumps the status revision
+        # and would make clients resync rows the import left as they were
+        conn.execute(
+            f"""
+            UPDATE document_status SET expires_at = {expires}
+            WHERE user_id = ? AND expires_at IS NOT {expires}
+        """,
+            (user_id,),
+        )
+        # Too many rows for per-document events; clients reload instead
+        _record_event(conn, user_id, "resync", {})
+    _status_committed(user_id)
+
+    result["skipped"] = result["statuses"] - result["applied"]
+    return result
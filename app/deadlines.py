@@ -0,0 +1,78 @@
+"""
+Background scheduler for the deadline digest.
+
+A daemon thread, started once at boot by the launcher (see startup.py),
+recomputes the cross-user deadline digest at every UTC midnight and every
+DEADLINE_DIGEST_REFRESH_S seconds in between, and stores it in the
+database. Workers only read the stored digest, a single-row lookup, so
+dashboards can poll it without rerunning the aggregate in each worker.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from database import compute_deadline_digest, get_deadline_digest, save_deadline_digest
+from periodic import PeriodicWorker
+
+DIGEST_REFRESH_S = int(os.environ.get("DEADLINE_DIGEST_REFRESH_S", "3600"))
+
+
+def seconds_until_midnight(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return (midnight - now).total_seconds()
+
+
+class DigestScheduler:
+    """Keeps the stored deadline digest fresh from a daemon thread."""
+
+    def __init__(
+        self,
+        compute: Callable[[], Dict[str, Any]] = compute_deadline_digest,
+        refresh_s: int = DIGEST_REFRESH_S,
+        save: Callable[[Dict[str, Any]], None] = save_deadline_digest,
+        load: Callable[[], Optional[Dict[str, Any]]] = get_deadline_digest,
+    ):
+        self._compute = compute
+        self._save = save
+        self._load = load
+        self.refresh_s = refresh_s
+        self.runs = 0
+        # Refreshes right away, then one second past each midnight (so the
+        # new digest sees the new date) and every refresh_s in between
+        self._worker = PeriodicWorker(
+            "deadline-digest",
+            self.refresh,
+            lambda: min(self.refresh_s, seconds_until_midnight() + 1),
+            immediate=True,
+        )
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Why the last scheduled refresh failed; the previous digest is kept."""
+        return self._worker.last_error
+
+    def refresh(self) -> Dict[str, Any]:
+        """Recompute and store the digest now, and return it."""
+        digest = self._compute()
+        self._save(digest)
+        self.runs += 1
+        return digest
+
+    def get(self) -> Dict[str, Any]:
+        """Return the stored digest, computing one if none was stored yet."""
+        return self._load() or self.refresh()
+
+    def start(self) -> None:
+        """Start the refresh thread (idempotent)."""
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the refresh thread."""
+        self._worker.stop()
+
+
+digest_scheduler = DigestScheduler()
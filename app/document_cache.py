@@ -0,0 +1,123 @@
+"""
+In-process caches behind /api/documents for the residence permit tracker.
+
+The document list of a permit type only depends on the applied config
+and the selected profiles, so it is built once per (permit_type,
+profile set, config version) and kept as a "skeleton": the filtered,
+ordered documents together with their JSON pre-serialized. Requests then
+only overlay the user's status rows, which are cached per user and
+stamped with the user's status revision.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import metrics
+
+# Number of (permit type, profile set, config version) skeletons kept
+DOCUMENT_CACHE_SIZE = int(os.environ.get("DOCUMENT_CACHE_SIZE", "256"))
+# Number of users whose status rows are kept
+STATUS_CACHE_SIZE = int(os.environ.get("STATUS_CACHE_SIZE", "1024"))
+
+
+class LRUCache:
+    """
+    Thread-safe mapping that keeps at most ``max_entries`` entries.
+
+    The least recently used entry is evicted first. A size of 0 disables
+    the cache (every lookup misses and nothing is stored).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, version: Hashable = None) -> Optional[Any]:
+        """
+        Return the value cached for ``key`` if it was stored with ``version``.
+
+        An entry stored with another version is stale: it is dropped and
+        the lookup counts as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                    self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, version: Hashable = None) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop ``key`` if it is cached."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+skeleton_cache = LRUCache(DOCUMENT_CACHE_SIZE)
+status_cache = LRUCache(STATUS_CACHE_SIZE)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return the counters of both caches."""
+    return {"skeletons": skeleton_cache.stats(), "statuses": status_cache.stats()}
+
+
+for _name, _cache in (("document_skeleton", skeleton_cache), ("status", status_cache)):
+    metrics.gauge(
+        f"{_name}_cache_hit_ratio",
+        f"Share of {_name.replace('_', ' ')} cache lookups that hit.",
+        lambda cache=_cache: cache.hit_ratio,
+    )
+    metrics.gauge(
+        f"{_name}_cache_entries",
+        f"Entries in the {_name.replace('_', ' ')} cache.",
+        lambda cache=_cache: len(cache),
+    )
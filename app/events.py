@@ -0,0 +1,179 @@
+"""
+Publish/subscribe bus behind the /api/events server-sent event stream.
+
+Status mutations append a row to the ``events`` table in their own
+transaction. One relay thread per process tails that table and hands each
+new event to the subscribers of its user, so tabs served by different
+worker processes see each other's changes: a local commit wakes the relay
+at once, events written by other processes are picked up within
+EVENTS_POLL_S. Subscribers are plain callbacks that must not block (the
+ASGI endpoint enqueues onto its event loop), so idle connections cost no
+thread. The same table lets a reconnecting client resume from its
+Last-Event-ID.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import metrics
+from database import (
+    EVENTS_RETENTION_S,
+    add_event_listener,
+    get_events,
+    get_last_event_id,
+    get_user_events,
+    prune_events,
+)
+from periodic import PeriodicWorker
+
+EVENTS_POLL_S = float(os.environ.get("EVENTS_POLL_S", "0.25"))
+# Comment line sent on idle streams so proxies do not time them out
+EVENTS_KEEPALIVE_S = float(os.environ.get("EVENTS_KEEPALIVE_S", "15"))
+# Client reconnection delay announced in the stream
+EVENTS_RETRY_MS = 3000
+
+# (id, user_id, type, JSON data) as stored in the events table
+Event = Tuple[int, int, str, str]
+Subscriber = Callable[[Event], None]
+
+
+def format_event(event: Event) -> bytes:
+    """Encode an event as a server-sent event message."""
+    event_id, _, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n".encode()
+
+
+def stream_preamble() -> bytes:
+    return f"retry: {EVENTS_RETRY_MS}\n\n".encode()
+
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+class EventBus:
+    """Fans events out to per-user subscribers from a single relay thread."""
+
+    def __init__(
+        self, poll_s: float = EVENTS_POLL_S, retention_s: int = EVENTS_RETENTION_S
+    ):
+        self.poll_s = poll_s
+        self.retention_s = retention_s
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._last_prune = 0.0
+        self.delivered = 0
+        # Subscribers retry at a failed tick; they resume from the table
+        self._relay = PeriodicWorker("event-relay", self._relay_once, poll_s)
+
+    @property
+    def last_error(self) -> Optional[str]:
+        return self._relay.last_error
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def subscribe(self, user_id: int, deliver: Subscriber) -> None:
+        """Call ``deliver`` (from the relay thread) with each new event of a user."""
+        self.start()
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(deliver)
+
+    def unsubscribe(self, user_id: int, deliver: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(deliver)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def notify(self) -> None:
+        """Wake the relay after a local commit that recorded events."""
+        self._relay.wake()
+
+    def publish(self, events: List[Event]) -> int:
+        """Deliver events to their users' subscribers; returns deliveries made."""
+        delivered = 0
+        for event in events:
+            with self._lock:
+                subscribers = list(self._subscribers.get(event[1], ()))
+            for deliver in subscribers:
+                try:
+                    deliver(event)
+                except Exception:
+                    # A stream that is shutting down; it unsubscribes itself
+                    continue
+                delivered += 1
+        self.delivered += delivered
+        if delivered:
+            metrics.inc("events_delivered_total", value=delivered)
+        return delivered
+
+    def poll(self) -> int:
+        """Publish events recorded since the last poll; returns how many were read."""
+        # Read before checking, so a subscriber that joins in between (and
+        # starts from a later id) cannot miss anything
+        last_id = get_last_event_id()
+        if not self._subscribers:
+            # Nobody to deliver to; skip ahead instead of replaying later
+            self._last_id = last_id
+            return 0
+        total = 0
+        while True:
+            events = get_events(self._last_id)
+            if not events:
+                return total
+            self._last_id = events[-1][0]
+            total += len(events)
+            self.publish(events)
+
+    def start(self) -> None:
+        """Start the relay thread (idempotent)."""
+        with self._lock:
+            if self._relay.running:
+                return
+            self._last_id = get_last_event_id()
+            self._relay.start()
+
+    def stop(self) -> None:
+        """Stop the relay thread."""
+        self._relay.stop()
+
+    def _relay_once(self) -> None:
+        self.poll()
+        if time.monotonic() - self._last_prune > self.retention_s / 5:
+            self._last_prune = time.monotonic()
+            prune_events(self.retention_s)
+
+
+def replay(user_id: int, last_event_id: Optional[str]) -> Tuple[List[Event], int]:
+    """
+    Events to send a (re)connecting client before live ones.
+
+    Returns the events after ``last_event_id`` (the Last-Event-ID header),
+    or a single ``resync`` event if those can no longer be replayed, and
+    the id from which live events are new to the client.
+    """
+    if last_event_id is None or not last_event_id.strip().isdigit():
+        return [], get_last_event_id()
+    after_id = int(last_event_id)
+    events = get_user_events(user_id, after_id)
+    if events is None:
+        last = get_last_event_id()
+        return [(last, user_id, "resync", json.dumps({}))], last
+    return events, events[-1][0] if events else after_id
+
+
+event_bus = EventBus()
+add_event_listener(event_bus.notify)
+
+metrics.gauge(
+    "events_subscribers",
+    "Open /api/events streams.",
+    lambda: event_bus.subscriber_count,
+)
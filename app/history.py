@@ -0,0 +1,56 @@
+"""
+Background compaction of the status history.
+
+Every status change appends to status_events (see database.py). A daemon
+thread runs compact_status_history() every STATUS_COMPACT_INTERVAL_S
+seconds: it snapshots users whose events have piled up since their last
+snapshot, which keeps point-in-time reconstruction short, and folds
+history older than STATUS_HISTORY_DAYS into snapshots, which keeps the
+log's size bounded.
+"""
+
+import os
+from typing import Callable, Dict, Optional
+
+from database import compact_status_history
+from periodic import PeriodicWorker
+
+STATUS_COMPACT_INTERVAL_S = int(os.environ.get("STATUS_COMPACT_INTERVAL_S", "3600"))
+
+
+class HistoryCompactor:
+    """Runs the status history compaction from a daemon thread."""
+
+    def __init__(
+        self,
+        compact: Callable[[], Dict[str, int]] = compact_status_history,
+        interval_s: int = STATUS_COMPACT_INTERVAL_S,
+    ):
+        self._compact = compact
+        self.interval_s = interval_s
+        self.runs = 0
+        self.last_result: Optional[Dict[str, int]] = None
+        self._worker = PeriodicWorker("history-compactor", self.run, interval_s)
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Why the last scheduled run failed; the log only grows until the next."""
+        return self._worker.last_error
+
+    def run(self) -> Dict[str, int]:
+        """Compact now and return what was done."""
+        result = self._compact()
+        self.last_result = result
+        self.runs += 1
+        return result
+
+    def start(self) -> None:
+        """Start the compaction thread (idempotent)."""
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the compaction thread."""
+        self._worker.stop()
+
+
+history_compactor = HistoryCompactor()
@@ -0,0 +1,198 @@
+"""
+Request, SQL and config-load instrumentation for the residence permit tracker.
+Collects counters and latency histograms in-process and renders them in the
+Prometheus text format at /metrics. Disabled unless METRICS_ENABLED=1.
+"""
+
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+# Adds a Server-Timing header (total, db) to every API response
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+# Whether SQL timing has to be collected at all
+INSTRUMENT = ENABLED or SERVER_TIMING
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help)
+_DESCRIPTIONS = {
+    "http_requests_total": ("counter", "HTTP requests by route and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency."),
+    "sqlite_query_duration_seconds": ("histogram", "SQL statement execution time."),
+    "sqlite_connections_opened_total": ("counter", "SQLite connections opened."),
+    "sqlite_connections_closed_total": ("counter", "SQLite connections closed."),
+    "config_yaml_load_duration_seconds": ("histogram", "YAML config parse time."),
+    "events_delivered_total": ("counter", "Events handed to /api/events streams."),
+}
+
+
+class Registry:
+    """Thread-safe store of counters, histograms and callback gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            data = series.get(labels)
+            if data is None:
+                data = series[labels] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    data[i] += 1
+            data[-2] += seconds
+            data[-1] += 1
+
+    def gauge(self, name: str, help_text: str, func: Callable[[], float]) -> None:
+        self._gauges[name] = (help_text, func)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                _header(lines, name)
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                _header(lines, name)
+                for labels, data in series.items():
+                    for bound, count in zip(BUCKETS, data):
+                        le = labels + (("le", repr(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(le)} {count}")
+                    inf = labels + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(inf)} {data[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {data[-2]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {data[-1]}")
+        for name, (help_text, func) in sorted(self._gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {func()}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], name: str) -> None:
+    metric_type, help_text = _DESCRIPTIONS.get(name, ("untyped", name))
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + pairs + "}"
+
+
+registry = Registry()
+_local = threading.local()
+
+
+def inc(name: str, labels: Labels = (), value: float = 1) -> None:
+    """Increment a counter (no-op when metrics are disabled)."""
+    if ENABLED:
+        registry.inc(name, labels, value)
+
+
+def observe(name: str, seconds: float, labels: Labels = ()) -> None:
+    """Record a duration in a histogram (no-op when metrics are disabled)."""
+    if ENABLED:
+        registry.observe(name, seconds, labels)
+
+
+def gauge(name: str, help_text: str, func: Callable[[], float]) -> None:
+    """Register a gauge whose value is read from ``func`` at scrape time."""
+    registry.gauge(name, help_text, func)
+
+
+@lru_cache(maxsize=512)
+def statement_label(sql: str) -> str:
+    """Reduce a SQL statement to 'operation:table' for use as a label."""
+    flat = sql
+    while True:
+        stripped = re.sub(r"\([^()]*\)", "", flat)
+        if stripped == flat:
+            break
+        flat = stripped
+    op = re.match(r"\s*(\w+)", flat)
+    operation = op.group(1).lower() if op else "unknown"
+    table = re.search(
+        r"\b(?:FROM|INTO|UPDATE|TABLE|INDEX|TRIGGER|PRAGMA)\s+"
+        r"(?:IF\s+(?:NOT\s+)?EXISTS\s+)?(\w+)",
+        flat,
+        re.I,
+    )
+    return f"{operation}:{table.group(1)}" if table else operation
+
+
+def observe_query(sql: str, seconds: float) -> None:
+    """Record one SQL statement's execution time."""
+    if ENABLED:
+        registry.observe(
+            "sqlite_query_duration_seconds",
+            seconds,
+            (("statement", statement_label(sql)),),
+        )
+    if SERVER_TIMING and getattr(_local, "timing", None) is not None:
+        _local.timing[0] += seconds
+        _local.timing[1] += 1
+
+
+def init_app(app) -> None:
+    """Register request timing hooks and the /metrics endpoint on a Flask app."""
+    from flask import g, request
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        if not ENABLED:
+            return "metrics disabled\n", 404, {"Content-Type": "text/plain"}
+        return registry.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    if not INSTRUMENT:
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        _local.timing = [0.0, 0]
+
+    @app.after_request
+    def record_request_timing(response):
+        start: Optional[float] = g.pop("request_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        if ENABLED and route != "/metrics":
+            labels = (("route", route), ("method", request.method))
+            registry.observe("http_request_duration_seconds", elapsed, labels)
+            registry.inc(
+                "http_requests_total", labels + (("status", str(response.status_code)),)
+            )
+        if SERVER_TIMING:
+            db_time, queries = _local.timing
+            response.headers["Server-Timing"] = (
+                f"app;dur={elapsed * 1000:.2f}, "
+                f'db;dur={db_time * 1000:.2f};desc="{queries} queries"'
+            )
+        _local.timing = None
+        return response
@@ -0,0 +1,94 @@
+"""
+Daemon threads that call a function periodically.
+
+The background jobs (config watcher, history compaction, deadline digest,
+event relay and config seeding) each configure a PeriodicWorker with an
+interval and a callback rather than managing a thread of their own.
+"""
+
+import logging
+import threading
+from typing import Callable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds between calls, or a function returning the next delay
+Interval = Union[float, Callable[[], float]]
+
+
+class PeriodicWorker:
+    """
+    Calls ``callback`` from a daemon thread every ``interval_s`` seconds.
+
+    With ``immediate`` the first call is made as soon as the thread starts
+    instead of after one interval; an ``interval_s`` of None then makes it
+    the only call. An exception from ``callback`` is logged (once per
+    distinct message), kept in ``last_error`` and retried at the next tick.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        callback: Callable[[], object],
+        interval_s: Optional[Interval],
+        immediate: bool = False,
+    ):
+        self.name = name
+        self._callback = callback
+        self.interval_s = interval_s
+        self.immediate = immediate
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start the thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, waiting for a call in progress to finish."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+
+    def wake(self) -> None:
+        """Make the next call now rather than at the end of the interval."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        if self.immediate:
+            self._call()
+        while self.interval_s is not None:
+            interval = self.interval_s
+            self._wake.wait(interval() if callable(interval) else interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self._call()
+
+    def _call(self) -> None:
+        try:
+            self._callback()
+        except Exception as e:
+            if str(e) != self.last_error:
+                logger.warning("%s failed: %s", self.name, e)
+            self.last_error = str(e)
+        else:
+            self.last_error = None
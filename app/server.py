@@ -0,0 +1,49 @@
+"""
+Production launcher for the residence permit tracker.
+
+Creates the database schema, seeds the config in the background, then
+starts the background jobs that must run in one process only (see
+startup.py), and runs uvicorn with WEB_WORKERS workers serving
+asgi:application. This process does not import the Flask app: that would
+delay the first worker by as long as the workers take to start.
+
+    python server.py
+"""
+
+import os
+import sys
+
+import uvicorn
+
+import database
+from startup import config_seeder
+
+WEB_HOST = os.environ.get("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.environ.get("WEB_PORT", "5000"))
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "2"))
+WEB_ACCESS_LOG = os.environ.get("WEB_ACCESS_LOG", "1") != "0"
+
+
+def main() -> None:
+    # Ensure data directory exists
+    os.makedirs(os.path.dirname(database.DATABASE_PATH), exist_ok=True)
+
+    # Workers need the tables; the config is seeded while they start
+    database.init_schema()
+    config_seeder.start()
+
+    uvicorn.run(
+        "asgi:application",
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        lifespan="off",
+        access_log=WEB_ACCESS_LOG,
+    )
+    if config_seeder.error is not None:
+        # The seeder stopped the server: the config is invalid
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
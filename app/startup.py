@@ -0,0 +1,104 @@
+"""
+Deferred startup: serve as soon as the schema exists.
+
+The launcher only creates (or migrates) the schema before it starts the
+server, which takes milliseconds. ConfigSeeder then seeds permit types and
+documents from the config, served from the precompiled bundle, on a
+background thread while the workers boot. Each worker tracks its own
+Readiness: it is ready once the config it loaded is the one seeded in the
+database. Until a first config has been seeded at all, the routes reading
+the seeded tables answer 503 (see app.py); after a restart they keep
+serving the previously seeded config while the new one is applied.
+
+Once seeded, the launcher also starts the jobs that must run in a single
+process rather than in every worker: the deadline digest and the status
+history compaction.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+from database import has_seeded_config, is_config_applied, seed_config
+from deadlines import digest_scheduler
+from history import STATUS_COMPACT_INTERVAL_S, history_compactor
+from periodic import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+
+def seed_and_schedule() -> None:
+    """Seed the config, then start the single-process background jobs."""
+    seed_config()
+    digest_scheduler.start()
+    if STATUS_COMPACT_INTERVAL_S > 0:
+        history_compactor.start()
+
+
+def _terminate(error: Exception) -> None:
+    """Stop the server, as a synchronous seeding failure used to."""
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class ConfigSeeder:
+    """Seeds the config once, from a daemon thread."""
+
+    def __init__(
+        self,
+        seed: Callable[[], None] = seed_config,
+        on_error: Callable[[Exception], None] = _terminate,
+    ):
+        self._seed = seed
+        self._on_error = on_error
+        self._done = threading.Event()
+        self._worker = PeriodicWorker(
+            "config-seeder", self._run, interval_s=None, immediate=True
+        )
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        """Start seeding in the background (idempotent)."""
+        self._worker.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for seeding to finish; returns whether it has."""
+        return self._done.wait(timeout)
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._seed()
+        except Exception as e:
+            # An invalid config: nothing can be served correctly
+            self.error = str(e)
+            logger.exception("Seeding the config failed")
+            self._on_error(e)
+        else:
+            self.seconds = time.perf_counter() - start
+        finally:
+            self._done.set()
+
+
+class Readiness:
+    """Whether this worker's config is seeded; once ready, it stays ready."""
+
+    def __init__(self, check: Callable[[], bool] = is_config_applied):
+        self._check = check
+        self._ready = False
+
+    def ready(self) -> bool:
+        if not self._ready:
+            self._ready = self._check()
+        return self._ready
+
+    def serving(self) -> bool:
+        """Whether the seeded tables hold a config, the current one or not."""
+        return self.ready() or has_seeded_config()
+
+
+config_seeder = ConfigSeeder(seed_and_schedule)
+readiness = Readiness()
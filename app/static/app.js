@@ -13,6 +13,94 @@ let categories = {};
 let profiles = {};
 let selectedProfiles = ['common'];
 let currentEditingDocId = null;
+// Ranked document ids of the active search, or null to show the full checklist
+let searchResults = null;
+let searchTimer = null;
+
+// Last GET response bodies keyed by URL, revalidated with ETags
+const responseCache = new Map();
+
+// The user's statuses by document id, mirrored in localStore, and the
+// status revision and config version of the last sync (null: never synced)
+let statuses = new Map();
+let syncRevision = 0;
+let configVersion = null;
+// Status mutations not yet acknowledged by the server, oldest first
+let pendingQueue = [];
+let pendingSaved = Promise.resolve();
+let syncPromise = null;
+let syncQueued = false;
+// Bootstrap payload without the checklist, kept for the next visit
+let bootData = null;
+
+// Status fields of a document, and their values without a status row
+const STATUS_KEYS = ['is_complete', 'completed_at', 'notes', 'due_date', 'expires_at'];
+const NO_STATUS = { is_complete: 0, completed_at: null, notes: null, due_date: null, expires_at: null };
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// The user's data kept in IndexedDB between visits: 'meta' (bootstrap
+// payload and sync state), 'lists' (document lists by permit type and
+// profiles), 'statuses' (status rows by document id) and 'pending'
+// (queued mutations). Without IndexedDB every method does nothing.
+const localStore = {
+    db: null,
+
+    open() {
+        return new Promise(resolve => {
+            if (!window.indexedDB) {
+                resolve();
+                return;
+            }
+            const request = indexedDB.open('residence-tracker', 1);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                db.createObjectStore('meta');
+                db.createObjectStore('lists');
+                db.createObjectStore('statuses', { keyPath: 'document_id' });
+                db.createObjectStore('pending', { keyPath: 'id', autoIncrement: true });
+            };
+            request.onsuccess = () => {
+                this.db = request.result;
+                resolve();
+            };
+            // Private browsing and the like: work online only
+            request.onerror = () => resolve();
+        });
+    },
+
+    // Run fn(tx) in one transaction; resolves once it commits, with the
+    // value of the function fn returned (if any)
+    transaction(stores, fn, mode = 'readwrite') {
+        if (!this.db) return Promise.resolve(undefined);
+        return new Promise((resolve, reject) => {
+            const tx = this.db.transaction(stores, mode);
+            const result = fn(tx);
+            tx.oncomplete = () => resolve(result ? result() : undefined);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+    },
+
+    get(store, key) {
+        return this.transaction(store, tx => {
+            const request = tx.objectStore(store).get(key);
+            return () => request.result;
+        }, 'readonly');
+    },
+
+    getAll(store) {
+        return this.transaction(store, tx => {
+            const request = tx.objectStore(store).getAll();
+            return () => request.result;
+        }, 'readonly');
+    },
+
+    put(store, value, key) {
+        return this.transaction(store, tx => {
+            tx.objectStore(store).put(value, key);
+        });
+    }
+};
 
 // DOM Elements
 const permitTypeSelect = document.getElementById('permitTypeSelect');
@@ -24,8 +112,11 @@ const progressBar = document.getElementById('progressBar');
 const progressPercentage = document.getElementById('progressPercentage');
 const progressStats = document.getElementById('progressStats');
 const resetButton = document.getElementById('resetButton');
+const printLink = document.getElementById('printLink');
+const pdfLink = document.getElementById('pdfLink');
 const documentsSection = document.getElementById('documentsSection');
 const documentsList = document.getElementById('documentsList');
+const documentSearch = document.getElementById('documentSearch');
 const linksSection = document.getElementById('linksSection');
 const importantLinks = document.getElementById('importantLinks');
 const lastVerified = document.getElementById('lastVerified');
@@ -38,109 +129,117 @@ const clearDueDateBtn = document.getElementById('clearDueDate');
 // Initialize the application
 async function init() {
     try {
-        // Load categories and profiles
-        await Promise.all([
-            loadCategories(),
-            loadProfiles(),
-            loadMetadata()
-        ]);
-
-        // Load permit types
-        await loadPermitTypes();
-
-        // Load important links
-        await loadImportantLinks();
-
-        // Load user settings
-        await loadUserSettings();
+        // Render from the local copy of a previous visit when there is one,
+        // then catch up with the server
+        await restoreLocalState();
+        const boot = bootData || await fetchBootstrap();
+
+        categories = boot.categories;
+        profiles = boot.profiles;
+        selectedProfiles = boot.user_settings.selected_profiles || ['common'];
+        renderMetadata(boot.metadata);
+        renderPermitTypes(boot.permit_types);
+        renderImportantLinks(boot.important_links);
 
         // Set up event listeners
         setupEventListeners();
+        connectEvents();
+        window.addEventListener('online', sync);
+
+        // Restore the last selected permit type
+        if (boot.permit_type) {
+            permitTypeSelect.value = boot.permit_type;
+            showPermitType(boot.permit_type);
+            if (boot.documents) {
+                documents = boot.documents;
+                updatePrintLinks(boot.permit_type);
+                renderDocuments();
+            } else {
+                await loadDocuments(boot.permit_type);
+            }
+            updateProgress();
+            showChecklist();
+        }
+        sync();
     } catch (error) {
         console.error('Failed to initialize application:', error);
         showError('Failed to load application. Please refresh the page.');
     }
 }
 
-// Load categories
-async function loadCategories() {
-    const response = await fetch(`${API_BASE}/categories`);
-    const data = await response.json();
-    if (data.success) {
-        categories = data.data;
+// Load the local copy kept by previous visits
+async function restoreLocalState() {
+    await localStore.open();
+    const [boot, syncState, rows, pending] = await Promise.all([
+        localStore.get('meta', 'bootstrap'),
+        localStore.get('meta', 'sync'),
+        localStore.getAll('statuses'),
+        localStore.getAll('pending')
+    ]);
+    bootData = boot || null;
+    if (syncState) {
+        ({ revision: syncRevision, config_version: configVersion } = syncState);
     }
+    statuses = new Map((rows || []).map(row => [row.document_id, row]));
+    pendingQueue = pending || [];
 }
 
-// Load profiles
-async function loadProfiles() {
-    const response = await fetch(`${API_BASE}/profiles`);
-    const data = await response.json();
-    if (data.success) {
-        profiles = data.data;
+// Load config, settings and the saved permit type's checklist in one request
+async function fetchBootstrap() {
+    const data = await getJSON(`${API_BASE}/bootstrap`);
+    if (!data.success) {
+        throw new Error(data.error);
     }
-}
-
-// Load metadata (last verified date)
-async function loadMetadata() {
-    try {
-        const response = await fetch(`${API_BASE}/metadata`);
-        const data = await response.json();
-        if (data.success && data.data.last_verified) {
-            lastVerified.textContent = `Requirements last verified: ${data.data.last_verified}`;
-            lastVerified.style.display = 'block';
-        }
-    } catch (e) {
-        // Metadata is optional
+    const { documents: docs, progress, ...boot } = data.data;
+    bootData = boot;
+    localStore.put('meta', boot, 'bootstrap');
+    if (boot.permit_type && docs) {
+        const profiles = boot.user_settings.selected_profiles || ['common'];
+        localStore.put('lists', docs, listKey(boot.permit_type, profiles));
     }
+    return data.data;
 }
 
-// Load user settings
-async function loadUserSettings() {
-    try {
-        const response = await fetch(`${API_BASE}/user-settings`);
-        const data = await response.json();
-        if (data.success) {
-            selectedProfiles = data.data.selected_profiles || ['common'];
-        }
-    } catch (e) {
-        selectedProfiles = ['common'];
-    }
+// Keep the stored bootstrap payload in step with the user's settings
+function rememberSettings() {
+    if (!bootData) return;
+    bootData.user_settings = { ...bootData.user_settings, selected_profiles: selectedProfiles };
+    bootData.permit_type = currentPermitType;
+    localStore.put('meta', bootData, 'bootstrap');
 }
 
-// Load permit types into dropdown
-async function loadPermitTypes() {
-    const response = await fetch(`${API_BASE}/permit-types`);
-    const data = await response.json();
-
-    if (data.success) {
-        data.data.forEach(permit => {
-            const option = document.createElement('option');
-            option.value = permit.id;
-            option.textContent = `${permit.name_en} (${permit.name_fr})`;
-            option.dataset.description = permit.description;
-            option.dataset.url = permit.official_url;
-            option.dataset.lastVerified = permit.last_verified || '';
-            permitTypeSelect.appendChild(option);
-        });
+// Render metadata (last verified date)
+function renderMetadata(metadata) {
+    if (metadata && metadata.last_verified) {
+        lastVerified.textContent = `Requirements last verified: ${metadata.last_verified}`;
+        lastVerified.style.display = 'block';
     }
 }
 
-// Load important links
-async function loadImportantLinks() {
-    const response = await fetch(`${API_BASE}/important-links`);
-    const data = await response.json();
+// Render permit types into dropdown
+function renderPermitTypes(permitTypes) {
+    permitTypes.forEach(permit => {
+        const option = document.createElement('option');
+        option.value = permit.id;
+        option.textContent = `${permit.name_en} (${permit.name_fr})`;
+        option.dataset.description = permit.description;
+        option.dataset.url = permit.official_url;
+        option.dataset.lastVerified = permit.last_verified || '';
+        permitTypeSelect.appendChild(option);
+    });
+}
 
-    if (data.success) {
-        importantLinks.innerHTML = data.data.map(link => `
-            <a href="${link.url}" target="_blank" rel="noopener" class="link-item">
-                <div class="link-title">
-                    <span class="link-name-fr">${link.name_fr}</span>
-                    <span class="link-name-en">${link.name_en}</span>
-                </div>
-                <p class="link-description">${link.description}</p>
-            </a>
-        `).join('');
-    }
+// Render important links
+function renderImportantLinks(links) {
+    importantLinks.innerHTML = links.map(link => `
+        <a href="${link.url}" target="_blank" rel="noopener" class="link-item">
+            <div class="link-title">
+                <span class="link-name-fr">${link.name_fr}</span>
+                <span class="link-name-en">${link.name_en}</span>
+            </div>
+            <p class="link-description">${link.description}</p>
+        </a>
+    `).join('');
 }
 
 // Render profile selector
@@ -185,6 +284,7 @@ async function handleProfileToggle(event) {
     if (!selectedProfiles.includes('common')) {
         selectedProfiles.push('common');
     }
+    rememberSettings();
 
     // Save to server
     try {
@@ -200,7 +300,7 @@ async function handleProfileToggle(event) {
     // Reload documents with new profile filter
     if (currentPermitType) {
         await loadDocuments(currentPermitType);
-        await updateProgress();
+        updateProgress();
     }
 }
 
@@ -208,6 +308,7 @@ async function handleProfileToggle(event) {
 function setupEventListeners() {
     permitTypeSelect.addEventListener('change', handlePermitTypeChange);
     resetButton.addEventListener('click', handleResetProgress);
+    documentSearch.addEventListener('input', handleSearchInput);
     clearDueDateBtn.addEventListener('click', () => {
         dueDateInput.value = '';
     });
@@ -231,15 +332,35 @@ function setupEventListeners() {
 async function handlePermitTypeChange(event) {
     const permitType = event.target.value;
 
+    // Remember the selection for the next visit
+    fetch(`${API_BASE}/user-settings/permit-type`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ permit_type: permitType || null })
+    }).catch(e => console.error('Failed to save permit type:', e));
+
+    clearSearch();
     if (!permitType) {
         hideApplication();
+        rememberSettings();
         return;
     }
 
+    showPermitType(permitType);
+    rememberSettings();
+
+    // Load documents and show sections
+    await loadDocuments(permitType);
+    updateProgress();
+    showChecklist();
+}
+
+// Show the description and profile selector for a permit type
+function showPermitType(permitType) {
     currentPermitType = permitType;
 
     // Show description
-    const selectedOption = event.target.selectedOptions[0];
+    const selectedOption = permitTypeSelect.selectedOptions[0];
     const description = selectedOption.dataset.description;
     const url = selectedOption.dataset.url;
 
@@ -253,30 +374,54 @@ async function handlePermitTypeChange(event) {
     // Show and render profile selector
     renderProfiles();
     profileSection.classList.remove('hidden');
+}
 
-    // Load documents and show sections
-    await loadDocuments(permitType);
-    await updateProgress();
-
+// Show progress, documents and links sections
+function showChecklist() {
     progressSection.classList.remove('hidden');
     documentsSection.classList.remove('hidden');
     linksSection.classList.remove('hidden');
 }
 
-// Load documents for a permit type
-async function loadDocuments(permitType) {
-    const profilesParam = selectedProfiles.join(',');
-    const response = await fetch(`${API_BASE}/documents/${permitType}?profiles=${profilesParam}`);
-    const data = await response.json();
+// Key of a document list in localStore
+function listKey(permitType, profiles = selectedProfiles) {
+    return `${permitType}|${[...profiles].sort().join(',')}`;
+}
 
-    if (data.success) {
-        documents = data.data;
-        renderDocuments();
+// Point the print links at the server-rendered checklist
+function updatePrintLinks(permitType) {
+    const query = `?profiles=${selectedProfiles.join(',')}`;
+    printLink.href = `${API_BASE}/checklist/${permitType}.html${query}`;
+    pdfLink.href = `${API_BASE}/checklist/${permitType}.pdf${query}`;
+}
+
+// Load documents for a permit type, from the local copy when there is one
+async function loadDocuments(permitType) {
+    const key = listKey(permitType);
+    updatePrintLinks(permitType);
+    let list = await localStore.get('lists', key);
+
+    if (!list) {
+        const profilesParam = selectedProfiles.join(',');
+        const data = await getJSON(`${API_BASE}/documents/${permitType}?profiles=${profilesParam}`);
+        if (!data.success) return;
+        list = data.data;
+        localStore.put('lists', list, key);
+        // The local statuses may be older than this list
+        sync();
     }
+    documents = list;
+    applyLocalStatuses();
+    renderDocuments();
 }
 
 // Render documents grouped by category
 function renderDocuments() {
+    if (searchResults) {
+        renderSearchResults();
+        return;
+    }
+
     // Group documents by category
     const grouped = {};
     documents.forEach(doc => {
@@ -302,7 +447,10 @@ function renderDocuments() {
                     <div class="category-header">
                         <span class="category-icon">${categoryInfo.icon}</span>
                         <span class="category-title">${categoryInfo.name_en}</span>
-                        <span class="category-subtitle">${completedCount}/${docs.length}</span>
+                        <button class="category-subtitle category-toggle" data-category="${cat}"
+                            title="${completedCount === docs.length ? 'Mark all as incomplete' : 'Mark all as complete'}">
+                            ${completedCount}/${docs.length}
+                        </button>
                     </div>
                     <div class="category-documents">
                         ${docs.map(doc => renderDocumentItem(doc)).join('')}
@@ -311,11 +459,40 @@ function renderDocuments() {
             `;
         }).join('');
 
+    bindDocumentHandlers();
+}
+
+// Render the documents matching the active search, best match first
+function renderSearchResults() {
+    const hits = searchResults
+        .map(id => documents.find(d => d.id === id))
+        .filter(Boolean);
+
+    documentsList.innerHTML = hits.length
+        ? `
+            <div class="document-category">
+                <div class="category-documents">
+                    ${hits.map(doc => renderDocumentItem(doc)).join('')}
+                </div>
+            </div>
+        `
+        : '<p class="search-empty">No documents match your search</p>';
+
+    bindDocumentHandlers();
+}
+
+// Attach handlers to the rendered document items
+function bindDocumentHandlers() {
     // Add click handlers for checkboxes
     document.querySelectorAll('.document-checkbox-area').forEach(item => {
         item.addEventListener('click', handleDocumentClick);
     });
 
+    // Add click handlers for category toggles
+    document.querySelectorAll('.category-toggle').forEach(btn => {
+        btn.addEventListener('click', handleCategoryToggle);
+    });
+
     // Add click handlers for notes button
     document.querySelectorAll('.notes-btn').forEach(btn => {
         btn.addEventListener('click', handleNotesClick);
@@ -352,9 +529,18 @@ function renderDocumentItem(doc) {
         ? `<span class="due-date-badge ${dueDateClass}">📅 ${formatDate(doc.due_date)}</span>`
         : '';
 
-    const validityHint = doc.validity_days
-        ? `<span class="validity-hint">Valid for ${doc.validity_days} days</span>`
+    // expires_at is a UTC "YYYY-MM-DD HH:MM:SS" timestamp
+    const expiresOn = doc.expires_at
+        ? formatDate(doc.expires_at.replace(' ', 'T') + 'Z')
         : '';
+    let validityHint = '';
+    if (doc.expired) {
+        validityHint = `<span class="validity-hint expired">⚠️ Expired ${expiresOn}</span>`;
+    } else if (doc.is_complete && doc.expires_at) {
+        validityHint = `<span class="validity-hint">Valid until ${expiresOn}</span>`;
+    } else if (doc.validity_days) {
+        validityHint = `<span class="validity-hint">Valid for ${doc.validity_days} days</span>`;
+    }
 
     return `
         <div class="document-item ${completedClass}" data-id="${doc.id}">
@@ -383,45 +569,68 @@ function renderDocumentItem(doc) {
     `;
 }
 
-// Handle document checkbox click
-async function handleDocumentClick(event) {
-    event.stopPropagation();
-    const area = event.currentTarget;
-    const docId = area.dataset.id;
-    const item = area.closest('.document-item');
-    const isCompleted = item.classList.contains('completed');
+// Search as the user types, once they pause
+function handleSearchInput() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, 200);
+}
 
-    // Optimistic update
-    item.classList.toggle('completed');
+async function runSearch() {
+    const query = documentSearch.value.trim();
+    if (!query || !currentPermitType) {
+        searchResults = null;
+        renderDocuments();
+        return;
+    }
 
+    const params = new URLSearchParams({
+        q: query,
+        permit_type: currentPermitType,
+        profiles: selectedProfiles.join(','),
+        limit: 100
+    });
     try {
-        const endpoint = isCompleted ? 'incomplete' : 'complete';
-        const response = await fetch(`${API_BASE}/documents/${docId}/${endpoint}`, {
-            method: 'POST'
-        });
-
+        const response = await fetch(`${API_BASE}/search?${params}`);
         const data = await response.json();
-
-        if (!data.success) {
-            item.classList.toggle('completed');
-            showError('Failed to update document status');
-        } else {
-            // Update local state
-            const doc = documents.find(d => d.id === docId);
-            if (doc) {
-                doc.is_complete = !isCompleted;
-            }
-            // Update progress and re-render
-            await updateProgress();
-            renderDocuments();
-        }
+        // Ignore results of a query the user has since changed
+        if (documentSearch.value.trim() !== query) return;
+        searchResults = data.success ? data.data.map(hit => hit.id) : [];
+        renderDocuments();
     } catch (error) {
-        item.classList.toggle('completed');
-        console.error('Failed to update document:', error);
-        showError('Failed to update document status');
+        console.error('Search failed:', error);
     }
 }
 
+function clearSearch() {
+    clearTimeout(searchTimer);
+    documentSearch.value = '';
+    searchResults = null;
+}
+
+// Handle document checkbox click
+function handleDocumentClick(event) {
+    event.stopPropagation();
+    const docId = event.currentTarget.dataset.id;
+    const doc = documents.find(d => d.id === docId);
+    if (!doc) return;
+
+    queueOperations([{ document_id: docId, action: doc.is_complete ? 'incomplete' : 'complete' }]);
+}
+
+// Mark every document in a category complete (or incomplete if all are done)
+function handleCategoryToggle(event) {
+    const category = event.currentTarget.dataset.category;
+    const docs = documents.filter(d => (d.category || 'other') === category);
+    const markComplete = docs.some(d => !d.is_complete);
+    const action = markComplete ? 'complete' : 'incomplete';
+
+    const operations = docs
+        .filter(d => Boolean(d.is_complete) !== markComplete)
+        .map(d => ({ document_id: d.id, action }));
+
+    queueOperations(operations);
+}
+
 // Handle notes button click
 function handleNotesClick(event) {
     event.stopPropagation();
@@ -446,95 +655,292 @@ function closeNotesModal() {
 }
 
 // Save notes
-async function saveNotes() {
+function saveNotes() {
     if (!currentEditingDocId) return;
 
     const notes = notesInput.value.trim();
     const dueDate = dueDateInput.value || null;
 
-    try {
-        // Save notes
-        await fetch(`${API_BASE}/documents/${currentEditingDocId}/notes`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ notes })
-        });
+    // Save notes and due date together
+    queueOperations([
+        { document_id: currentEditingDocId, action: 'notes', notes },
+        { document_id: currentEditingDocId, action: 'due_date', due_date: dueDate }
+    ]);
+    closeNotesModal();
+}
 
-        // Save due date
-        await fetch(`${API_BASE}/documents/${currentEditingDocId}/due-date`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ due_date: dueDate })
-        });
+// Update progress display from the loaded documents
+function updateProgress() {
+    const total = documents.length;
+    const completed = documents.filter(d => d.is_complete).length;
+    const percentage = total > 0 ? Math.round(completed / total * 1000) / 10 : 0;
+    renderProgress({ completed, total, percentage });
+}
 
-        // Update local state
-        const doc = documents.find(d => d.id === currentEditingDocId);
-        if (doc) {
-            doc.notes = notes;
-            doc.due_date = dueDate;
-        }
+// Render progress bar and stats
+function renderProgress(progress) {
+    const { completed, total, percentage } = progress;
 
-        closeNotesModal();
-        renderDocuments();
+    progressBar.style.width = `${percentage}%`;
+    progressPercentage.textContent = `${percentage}%`;
+    progressStats.textContent = `${completed} of ${total} documents completed`;
 
-    } catch (error) {
-        console.error('Failed to save notes:', error);
-        showError('Failed to save notes');
+    // Change color based on progress
+    if (percentage === 100) {
+        progressPercentage.style.color = '#3fb950';
+    } else if (percentage >= 50) {
+        progressPercentage.style.color = '#58a6ff';
+    } else {
+        progressPercentage.style.color = '#d29922';
     }
 }
 
-// Update progress display
-async function updateProgress() {
+// Handle reset progress
+async function handleResetProgress() {
     if (!currentPermitType) return;
 
-    const profilesParam = selectedProfiles.join(',');
-    const response = await fetch(`${API_BASE}/progress/${currentPermitType}?profiles=${profilesParam}`);
-    const data = await response.json();
+    const confirmed = confirm(
+        'Are you sure you want to reset all progress? This will clear all checkmarks, notes, and due dates. You can undo it right after.'
+    );
 
-    if (data.success) {
-        const { completed, total, percentage } = data.data;
+    if (!confirmed) return;
 
-        progressBar.style.width = `${percentage}%`;
-        progressPercentage.textContent = `${percentage}%`;
-        progressStats.textContent = `${completed} of ${total} documents completed`;
+    const reset = { action: 'reset', permit_type: currentPermitType };
+    queueOperations([reset]);
 
-        // Change color based on progress
-        if (percentage === 100) {
-            progressPercentage.style.color = '#3fb950';
-        } else if (percentage >= 50) {
-            progressPercentage.style.color = '#58a6ff';
-        } else {
-            progressPercentage.style.color = '#d29922';
+    // Offer to undo it once the server has applied it (not while offline)
+    await sync();
+    while (pendingQueue.includes(reset) && syncPromise) {
+        await syncPromise;
+    }
+    if (pendingQueue.includes(reset) || !confirm('Progress reset. Undo?')) return;
+    try {
+        const data = await postJSON(`${API_BASE}/undo`);
+        if (!data.success) {
+            throw new Error(data.error);
         }
+    } catch (error) {
+        console.error('Failed to undo the reset:', error);
+        showError('Failed to undo the reset');
     }
+    sync();
 }
 
-// Handle reset progress
-async function handleResetProgress() {
-    if (!currentPermitType) return;
+// Apply changes made in other tabs and devices as they happen
+function connectEvents() {
+    if (!window.EventSource) return;
 
-    const confirmed = confirm(
-        'Are you sure you want to reset all progress? This will clear all checkmarks, notes, and due dates. This cannot be undone.'
-    );
+    // Reconnects on its own. Status changes (and reconnects, which may
+    // have missed some) are pulled through sync()
+    const source = new EventSource(`${API_BASE}/events`);
+    ['open', 'status', 'reset', 'resync'].forEach(type => source.addEventListener(type, sync));
+    source.addEventListener('settings', (e) => applySettingsEvent(JSON.parse(e.data)));
+}
 
-    if (!confirmed) return;
+// Apply status mutations locally right away and queue them for the server
+function queueOperations(operations) {
+    if (!operations.length) return;
+
+    const rows = operations.flatMap(applyOperationLocally);
+    renderDocuments();
+    updateProgress();
+
+    // Queued before they are stored, so a sync in progress leaves the
+    // optimistic statuses alone
+    pendingQueue.push(...operations);
+    pendingSaved = pendingSaved
+        .then(() => localStore.transaction(['statuses', 'pending'], tx => {
+            rows.forEach(row => tx.objectStore('statuses').put(row));
+            const requests = operations.map(op => tx.objectStore('pending').add(op));
+            return () => requests.map(request => request.result);
+        }))
+        .then(keys => (keys || []).forEach((key, i) => { operations[i].id = key; }))
+        .catch(error => console.warn('Failed to store pending changes:', error));
+    sync();
+}
+
+// Apply a mutation to the local statuses; returns the status rows it changed
+function applyOperationLocally(op) {
+    if (op.action === 'reset') {
+        // Documents of other profiles are cleared by the next sync
+        return documents.map(doc => setLocalStatus(doc.id, NO_STATUS));
+    }
+
+    const doc = documents.find(d => d.id === op.document_id);
+    const status = { ...(statuses.get(op.document_id) || doc || NO_STATUS) };
+    if (op.action === 'complete') {
+        const now = Date.now();
+        status.is_complete = 1;
+        status.completed_at = utcTimestamp(now);
+        status.expires_at = doc && doc.validity_days
+            ? utcTimestamp(now + doc.validity_days * DAY_MS)
+            : null;
+    } else if (op.action === 'incomplete') {
+        status.is_complete = 0;
+        status.completed_at = null;
+        status.expires_at = null;
+    } else {
+        // 'notes' and 'due_date' carry the value under the action's name
+        status[op.action] = op[op.action];
+    }
+    return [setLocalStatus(op.document_id, status)];
+}
+
+// Record a document's status locally and on the loaded document
+function setLocalStatus(documentId, status) {
+    const row = { document_id: documentId };
+    STATUS_KEYS.forEach(key => {
+        row[key] = status[key] ?? null;
+    });
+    statuses.set(documentId, row);
+    const doc = documents.find(d => d.id === documentId);
+    if (doc) {
+        applyStatus(doc, row);
+    }
+    return row;
+}
+
+function applyStatus(doc, row) {
+    STATUS_KEYS.forEach(key => {
+        doc[key] = row[key];
+    });
+    doc.expired = row.expires_at && parseUTC(row.expires_at) <= Date.now() ? 1 : 0;
+}
+
+// Overlay the local statuses on the loaded documents
+function applyLocalStatuses() {
+    // Before the first sync the loaded documents are the freshest copy
+    if (configVersion === null) return;
+    documents.forEach(doc => applyStatus(doc, statuses.get(doc.id) || NO_STATUS));
+}
+
+// Send the pending mutations, then pull the status rows changed since the
+// last sync. One sync runs at a time; calls meanwhile run one more after it.
+function sync() {
+    if (syncPromise) {
+        syncQueued = true;
+        return syncPromise;
+    }
+    syncPromise = runSync().finally(() => {
+        syncPromise = null;
+        if (syncQueued) {
+            syncQueued = false;
+            sync();
+        }
+    });
+    return syncPromise;
+}
 
+async function runSync() {
     try {
-        const response = await fetch(`${API_BASE}/reset/${currentPermitType}`, {
-            method: 'POST'
+        if (await flushPending()) {
+            // The server refused some of them: take its state wholesale
+            syncRevision = 0;
+            showError('Failed to update document status');
+        }
+        await pullChanges();
+    } catch (error) {
+        // Offline: pending mutations stay applied locally and are sent
+        // on the next sync ('online', or the next change)
+        console.warn('Sync failed:', error);
+    }
+}
+
+// Send the pending mutations in order; true if the server refused any.
+// Throws on network errors, leaving the rest queued.
+async function flushPending() {
+    let refused = false;
+    while (pendingQueue.length) {
+        await pendingSaved;
+        const head = pendingQueue[0];
+        let sent;
+        let data;
+        if (head.action === 'reset') {
+            sent = [head];
+            data = await postJSON(`${API_BASE}/reset/${head.permit_type}`);
+        } else {
+            // Consecutive document updates travel in one batch
+            const end = pendingQueue.findIndex(op => op.action === 'reset');
+            sent = pendingQueue.slice(0, end === -1 ? pendingQueue.length : end);
+            data = await postJSON(`${API_BASE}/documents/batch`, {
+                operations: sent.map(({ id, ...op }) => op)
+            });
+        }
+        pendingQueue.splice(0, sent.length);
+        await localStore.transaction('pending', tx => {
+            sent.filter(op => op.id !== undefined)
+                .forEach(op => tx.objectStore('pending').delete(op.id));
         });
+        refused = refused || !data.success;
+    }
+    return refused;
+}
 
-        const data = await response.json();
+// Pull the status rows changed since the last sync into the local copy
+async function pullChanges() {
+    const response = await fetch(`${API_BASE}/sync?since=${syncRevision}`, { cache: 'no-store' });
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error);
+    }
+    // Mutations queued meanwhile are sent, and pulled, by the next sync
+    if (pendingQueue.length) return;
+
+    const delta = data.data;
+    const configChanged = configVersion !== null && delta.config_version !== configVersion;
+    if (delta.full) {
+        statuses = new Map();
+    }
+    delta.statuses.forEach(row => statuses.set(row.document_id, row));
+    syncRevision = delta.revision;
+    configVersion = delta.config_version;
+
+    await localStore.transaction(['meta', 'lists', 'statuses'], tx => {
+        const store = tx.objectStore('statuses');
+        if (delta.full) {
+            store.clear();
+        }
+        delta.statuses.forEach(row => store.put(row));
+        tx.objectStore('meta').put({ revision: syncRevision, config_version: configVersion }, 'sync');
+        // The config changed: drop the stored copies
+        if (configChanged) {
+            tx.objectStore('lists').clear();
+            tx.objectStore('meta').delete('bootstrap');
+        }
+    });
 
-        if (data.success) {
+    if (configChanged) {
+        // Profiles, categories and metadata may have changed as well
+        const boot = await fetchBootstrap();
+        categories = boot.categories;
+        profiles = boot.profiles;
+        renderMetadata(boot.metadata);
+        if (currentPermitType) {
+            renderProfiles();
             await loadDocuments(currentPermitType);
-            await updateProgress();
-        } else {
-            showError('Failed to reset progress');
         }
-    } catch (error) {
-        console.error('Failed to reset progress:', error);
-        showError('Failed to reset progress');
+    }
+    await applySettingsEvent(delta.user_settings);
+    if (configChanged || delta.full || delta.statuses.length) {
+        applyLocalStatuses();
+        renderDocuments();
+        updateProgress();
+    }
+}
+
+// Follow a profile selection changed elsewhere
+async function applySettingsEvent(settings) {
+    const incoming = settings.selected_profiles || ['common'];
+    const unchanged = incoming.length === selectedProfiles.length &&
+        incoming.every(p => selectedProfiles.includes(p));
+    if (unchanged) return;
+
+    selectedProfiles = incoming;
+    rememberSettings();
+    renderProfiles();
+    if (currentPermitType) {
+        await loadDocuments(currentPermitType);
+        updateProgress();
     }
 }
 
@@ -550,6 +956,51 @@ function hideApplication() {
 }
 
 // Utility functions
+
+// GET a JSON endpoint, answering from responseCache when the server replies 304
+async function getJSON(url, retries = 10) {
+    const cached = responseCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers, cache: 'no-store' });
+
+    // A freshly started server is still seeding its config
+    if (response.status === 503 && retries > 0) {
+        const delay = Number(response.headers.get('Retry-After')) || 1;
+        await new Promise(resolve => setTimeout(resolve, delay * 1000));
+        return getJSON(url, retries - 1);
+    }
+
+    if (response.status === 304 && cached) {
+        return JSON.parse(cached.body);
+    }
+
+    const body = await response.text();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        responseCache.set(url, { etag, body });
+    }
+    return JSON.parse(body);
+}
+
+// POST a JSON body; throws on network errors
+async function postJSON(url, body = {}) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    return response.json();
+}
+
+// Timestamps formatted like the server's: UTC "YYYY-MM-DD HH:MM:SS"
+function utcTimestamp(ms) {
+    return new Date(ms).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+function parseUTC(timestamp) {
+    return new Date(timestamp.replace(' ', 'T') + 'Z').getTime();
+}
+
 function showError(message) {
     alert(message);
 }
@@ -0,0 +1,146 @@
+"""
+Benchmark: printable checklist rendering, cached downloads and API latency.
+
+Seeds a synthetic config and database, then through the Flask test client:
+
+* downloads the HTML and PDF checklist of random users twice each, the
+  first time rendered (after a status change) and the second from the
+  disk cache;
+* times GET /api/documents alone, then again while --downloaders threads
+  keep downloading freshly invalidated PDFs, to show what rendering costs
+  the rest of the API.
+
+    python benchmarks/bench_checklist.py --documents 200
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--downloaders", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_checklist_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    os.environ["CONFIG_WATCH_S"] = "0"
+    permits = synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+    profiles = synthetic.profile_ids(args.profiles)
+
+    import app as app_module
+    import database
+    from checklist import checklist_renderer
+
+    rng = random.Random(args.seed)
+    results = {}
+
+    def checklist_url(fmt: str) -> str:
+        selected = ",".join(["common"] + rng.sample(profiles[1:], 2))
+        return f"/api/checklist/{rng.choice(permits)}.{fmt}?profiles={selected}"
+
+    def change(client, user: str) -> None:
+        doc = f"{rng.choice(permits)}_doc_{rng.randrange(args.documents)}"
+        client.post(f"/api/documents/{doc}/complete", headers={"X-User-Id": user})
+
+    try:
+        database.init_db()
+        synthetic.populate(database, args.users, args.statuses, args.seed)
+        client = app_module.app.test_client()
+
+        for fmt in ("html", "pdf"):
+            samples = {"rendered": [], "cached": []}
+            size = 0
+            for _ in range(args.iterations):
+                user = f"user-{rng.randrange(args.users)}"
+                change(client, user)
+                url = checklist_url(fmt)
+                for mode in ("rendered", "cached"):
+                    t0 = time.perf_counter()
+                    r = client.get(url, headers={"X-User-Id": user})
+                    samples[mode].append((time.perf_counter() - t0) * 1000)
+                    assert r.status_code == 200, r.data
+                    size += len(r.data)
+                    r.close()
+            for mode, values in samples.items():
+                results[f"{fmt}_{mode}"] = {
+                    "avg_bytes": size // (2 * args.iterations),
+                    **summarize(values, sum(values) / 1000),
+                }
+
+        def documents_latency() -> dict:
+            samples = []
+            start = time.perf_counter()
+            for _ in range(args.iterations * 4):
+                user = f"user-{rng.randrange(args.users)}"
+                url = f"/api/documents/{rng.choice(permits)}?profiles=common"
+                t0 = time.perf_counter()
+                r = client.get(url, headers={"X-User-Id": user})
+                samples.append((time.perf_counter() - t0) * 1000)
+                assert r.status_code == 200, r.data
+            return summarize(samples, time.perf_counter() - start)
+
+        results["documents_idle"] = documents_latency()
+
+        stop = threading.Event()
+
+        def download() -> None:
+            own = app_module.app.test_client()
+            while not stop.is_set():
+                user = f"user-{rng.randrange(args.users)}"
+                change(own, user)
+                own.get(checklist_url("pdf"), headers={"X-User-Id": user}).close()
+
+        threads = [threading.Thread(target=download) for _ in range(args.downloaders)]
+        for thread in threads:
+            thread.start()
+        try:
+            results["documents_while_rendering"] = documents_latency()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        results["renders"] = checklist_renderer.renders
+    finally:
+        checklist_renderer.shutdown()
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "documents_per_permit": args.documents,
+                "checklist_workers": checklist_renderer.workers,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: latency under concurrent clients, dev server vs. ASGI mode.
+
+Starts the app as a real HTTP server in each mode (Flask's development
+server as used by `python app.py`, and `python server.py`), then has
+--clients concurrent clients issue a mixed read/write workload and reports
+throughput and p50/p99 latency as JSON.
+
+    python benchmarks/bench_concurrency.py --clients 200 --requests 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+
+DEV_SERVER = (
+    "import sys, app, database; database.init_db(); "
+    "app.app.run(host='127.0.0.1', port=int(sys.argv[1]), debug=False)"
+)
+
+# (method, path) pairs; one in five requests writes
+WORKLOAD = [
+    ("GET", "/api/documents/titre_sejour?profiles=worker"),
+    ("GET", "/api/progress/titre_sejour?profiles=worker"),
+    ("GET", "/api/documents/carte_resident?profiles=spouse_french"),
+    ("GET", "/api/progress/carte_resident?profiles=spouse_french"),
+    ("POST", "/api/documents/ts_passport/complete"),
+]
+
+
+def start_server(mode: str, port: int, workdir: str, workers: int):
+    env = dict(
+        os.environ,
+        DATABASE_PATH=os.path.join(workdir, f"{mode}.db"),
+        CONFIG_DIR=os.path.join(ROOT, "config"),
+        WEB_HOST="127.0.0.1",
+        WEB_PORT=str(port),
+        WEB_WORKERS=str(workers),
+        WEB_ACCESS_LOG="0",
+    )
+    if mode == "dev":
+        cmd = [sys.executable, "-c", DEV_SERVER, str(port)]
+    else:
+        cmd = [sys.executable, "server.py"]
+    proc = subprocess.Popen(
+        cmd, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz/ready")
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def client(port: int, requests: int, user: str, latencies: list, errors: list):
+    for _ in range(requests):
+        method, path = random.choice(WORKLOAD)
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request(method, path, headers={"X-User-Id": user})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                errors.append(response.status)
+        except OSError as e:
+            errors.append(str(e))
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def run(mode: str, port: int, clients: int, requests: int, workers: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench_conc_")
+    proc = start_server(mode, port, workdir, workers)
+    latencies: list = []
+    errors: list = []
+    try:
+        threads = [
+            threading.Thread(
+                target=client, args=(port, requests, f"user-{i}", latencies, errors)
+            )
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    results = [
+        run(mode, args.port + i, args.clients, args.requests, args.workers)
+        for i, mode in enumerate(("dev", "asgi"))
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
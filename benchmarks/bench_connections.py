@@ -0,0 +1,95 @@
+"""
+Benchmark: pooled WAL connections vs. a fresh connect per call.
+
+Drives GET /api/documents/<permit_type> through the Flask test client from
+several threads and reports requests per second for both modes as JSON.
+
+    python benchmarks/bench_connections.py --requests 2000 --threads 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+os.environ.setdefault("CONFIG_DIR", os.path.join(ROOT, "config"))
+
+
+@contextmanager
+def legacy_connection():
+    """The pre-pool behaviour: connect, use once, close."""
+    import database
+
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def run(mode: str, requests: int, threads: int, permit_type: str) -> dict:
+    import app as app_module
+    import database
+
+    workdir = tempfile.mkdtemp(prefix="bench_conn_")
+    database.DATABASE_PATH = os.path.join(workdir, "residence.db")
+    database.close_pool()
+    original = database.get_db_connection
+    if mode == "legacy":
+        database.get_db_connection = legacy_connection
+    try:
+        database.init_db()
+        client = app_module.app.test_client()
+        url = f"/api/documents/{permit_type}?profiles=worker,spouse_french"
+
+        def hit(_):
+            response = client.get(url)
+            assert response.status_code == 200
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(hit, range(min(50, requests))))  # warm-up
+            start = time.perf_counter()
+            list(executor.map(hit, range(requests)))
+            elapsed = time.perf_counter() - start
+    finally:
+        database.get_db_connection = original
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "threads": threads,
+        "seconds": round(elapsed, 4),
+        "req_per_s": round(requests / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--permit-type", default="titre_sejour")
+    args = parser.parse_args()
+
+    results = [
+        run(mode, args.requests, args.threads, args.permit_type)
+        for mode in ("legacy", "pooled")
+    ]
+    results.append(
+        {"speedup": round(results[1]["req_per_s"] / results[0]["req_per_s"], 2)}
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
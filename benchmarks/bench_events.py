@@ -0,0 +1,165 @@
+"""
+Benchmark: many idle /api/events streams on the ASGI server.
+
+Starts `python server.py`, opens --streams server-sent event connections
+spread over --users users (non-blocking sockets, so the client needs no
+thread per stream either), then makes --writes note updates and measures
+how long each takes to reach every stream of its user. Reports delivery
+latency percentiles together with the server's thread count and RSS,
+which should not grow with the number of streams.
+
+    python benchmarks/bench_events.py --streams 2000 --users 500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import selectors
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_concurrency import start_server  # noqa: E402
+
+
+def server_processes(pid: int) -> list:
+    """The server process and its uvicorn workers."""
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [pid] + [int(p) for p in f.read().split()]
+
+
+def process_stats(pids: list) -> dict:
+    threads = rss_kb = 0
+    for pid in pids:
+        threads += len(os.listdir(f"/proc/{pid}/task"))
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_kb += int(line.split()[1])
+    return {"threads": threads, "rss_kb": rss_kb}
+
+
+def open_stream(port: int, user: str) -> socket.socket:
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(
+        f"GET /api/events HTTP/1.1\r\nHost: localhost\r\nX-User-Id: {user}\r\n"
+        "Accept: text/event-stream\r\n\r\n".encode()
+    )
+    sock.setblocking(False)
+    return sock
+
+
+def pump(selector, buffers: dict, timeout: float) -> None:
+    """Read whatever the streams have sent within ``timeout``."""
+    for key, _ in selector.select(timeout):
+        try:
+            data = key.fileobj.recv(65536)
+        except BlockingIOError:
+            continue
+        if data:
+            buffers[key.fileobj] += data
+        else:
+            selector.unregister(key.fileobj)
+
+
+def update_notes(port: int, user: str, document_id: str, notes: str) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request(
+        "POST",
+        f"/api/documents/{document_id}/notes",
+        body=json.dumps({"notes": notes}),
+        headers={"X-User-Id": user, "Content-Type": "application/json"},
+    )
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    assert response.status == 200, response.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5199)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_events_")
+    proc = start_server("asgi", args.port, workdir, args.workers)
+    selector = selectors.DefaultSelector()
+    streams: dict = {}
+    buffers: dict = {}
+    try:
+        pids = server_processes(proc.pid)
+        idle = process_stats(pids)
+
+        start = time.perf_counter()
+        for i in range(args.streams):
+            user = f"user-{i % args.users}"
+            sock = open_stream(args.port, user)
+            streams.setdefault(user, []).append(sock)
+            buffers[sock] = b""
+            selector.register(sock, selectors.EVENT_READ)
+        deadline = time.time() + 60
+        while time.time() < deadline and not all(
+            b"retry:" in b for b in buffers.values()
+        ):
+            pump(selector, buffers, 0.1)
+        connect_s = time.perf_counter() - start
+        connected = sum(b"retry:" in b for b in buffers.values())
+        # Let the streams sit idle before measuring what they cost
+        time.sleep(1)
+        loaded = process_stats(pids)
+
+        latencies = []
+        missed = 0
+        for k in range(args.writes):
+            user = f"user-{random.randrange(min(args.users, args.streams))}"
+            marker = f"bench-{k}".encode()
+            t0 = time.perf_counter()
+            update_notes(args.port, user, "ts_passport", marker.decode())
+            waiting = set(streams[user])
+            deadline = time.time() + 5
+            while waiting and time.time() < deadline:
+                pump(selector, buffers, 0.05)
+                waiting = {s for s in waiting if marker not in buffers[s]}
+            if waiting:
+                missed += 1
+            else:
+                latencies.append((time.perf_counter() - t0) * 1000)
+    finally:
+        for sock in buffers:
+            sock.close()
+        proc.terminate()
+        proc.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "streams": args.streams,
+                "connected": connected,
+                "connect_s": round(connect_s, 2),
+                "workers": args.workers,
+                "idle_server": idle,
+                "with_streams": loaded,
+                "writes": args.writes,
+                "missed": missed,
+                "delivery_p50_ms": round(latencies[len(latencies) // 2], 2),
+                "delivery_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
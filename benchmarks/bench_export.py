@@ -0,0 +1,152 @@
+"""
+Benchmark: NDJSON export/import round trip on a large multi-user database.
+
+Seeds a synthetic config of --permits x --documents documents, gives one
+user a status row for every document (plus --users background users),
+then streams GET /api/export, POSTs the result to /api/import for a fresh
+user, exports that user and checks both exports carry the same statuses.
+Reports rows/s and the Python heap growth (tracemalloc peak over the
+starting point) for each side, which should stay flat as the row count
+grows.
+
+    python benchmarks/bench_export.py --permits 10 --documents 5000
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+
+def status_records(blob: bytes) -> list:
+    """The status records of an export, without the user-specific parts."""
+    records = [json.loads(line) for line in blob.splitlines() if line.strip()]
+    return [r for r in records if r["type"] == "status"]
+
+
+def export(client, user: str, keep: bool) -> tuple:
+    """Stream an export; the body is only kept (and counted) if ``keep``."""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    response = client.get("/api/export", headers={"X-User-Id": user}, buffered=False)
+    out = io.BytesIO()
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+        if keep:
+            out.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+    response.close()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    return out.getvalue(), size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=10)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--statuses", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_export_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    synthetic.write_config(os.environ["CONFIG_DIR"], args.permits, args.documents, 8)
+
+    import app as app_module
+    import database
+
+    try:
+        database.init_db()
+        synthetic.populate(database, args.users, args.statuses)
+        source = database.get_or_create_user("export-source")
+        with database.get_db_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO document_status
+                    (user_id, document_id, is_complete, completed_at, notes, due_date)
+                SELECT ?, id, rowid % 2, datetime('now'), 'note ' || id, '2026-12-31'
+                FROM documents
+            """,
+                (source,),
+            )
+        client = app_module.app.test_client()
+        tracemalloc.start()
+
+        _, size, export_s, export_peak = export(client, "export-source", False)
+        blob = export(client, "export-source", True)[0]
+        rows = len(status_records(blob))
+
+        upload = io.BytesIO(blob)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        response = client.post(
+            "/api/import",
+            input_stream=upload,
+            content_length=len(blob),
+            content_type="application/x-ndjson",
+            headers={"X-User-Id": "import-target"},
+        )
+        import_s = time.perf_counter() - start
+        import_peak = tracemalloc.get_traced_memory()[1] - baseline
+        assert response.status_code == 200, response.data
+        imported = response.get_json()["data"]
+
+        again = export(client, "import-target", True)[0]
+        round_trip_ok = status_records(again) == status_records(blob)
+
+        # Replacing deletes the target's rows first, which must bump its
+        # status revision like any other change
+        target = database.get_or_create_user("import-target")
+        revision = database.get_status_revision(target)
+        response = client.post(
+            "/api/import?mode=replace",
+            data=blob,
+            content_type="application/x-ndjson",
+            headers={"X-User-Id": "import-target"},
+        )
+        assert response.status_code == 200, response.data
+        assert database.get_status_revision(target) > revision
+        again = export(client, "import-target", True)[0]
+        round_trip_ok = round_trip_ok and (
+            status_records(again) == status_records(blob)
+        )
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "status_rows": rows,
+                "export_bytes": size,
+                "export_rows_per_s": round(rows / export_s),
+                "export_heap_growth_kb": export_peak // 1024,
+                "import_rows_per_s": round(rows / import_s),
+                "import_heap_growth_kb": import_peak // 1024,
+                "imported": imported,
+                "round_trip_ok": round_trip_ok,
+            },
+            indent=2,
+        )
+    )
+    if not round_trip_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
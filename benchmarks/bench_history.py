@@ -0,0 +1,165 @@
+"""
+Benchmark: cost of the status history log, reconstruction and compaction.
+
+Seeds a synthetic config and database, then:
+
+* applies --mutations random status mutations twice, once with the
+  history triggers dropped and once with them, and reports the latency
+  and database growth per mutation (the log's write amplification);
+* gives --busy-users users --events-per-user more changes each and times
+  get_statuses_at() before and after compact_status_history() took
+  snapshots (a full replay against a replay from the latest snapshot);
+* times a compaction that folds all history into snapshots.
+
+    python benchmarks/bench_history.py --mutations 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+
+def db_bytes(database) -> int:
+    with database.get_db_connection() as conn:
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return (pages - free) * size
+
+
+def mutate(database, rng: random.Random, doc_ids: list, user_ids: list) -> None:
+    user_id = rng.choice(user_ids)
+    doc = rng.choice(doc_ids)
+    kind = rng.randrange(4)
+    if kind == 0:
+        database.mark_document_complete(doc, user_id)
+    elif kind == 1:
+        database.mark_document_incomplete(doc, user_id)
+    elif kind == 2:
+        database.update_document_notes(doc, f"note {rng.random()}", user_id)
+    else:
+        database.update_document_due_date(
+            doc, f"2026-12-{rng.randint(1, 28):02d}", user_id
+        )
+
+
+def run_mutations(database, rng, doc_ids, user_ids, count: int) -> dict:
+    before = db_bytes(database)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        mutate(database, rng, doc_ids, user_ids)
+        samples.append((time.perf_counter() - t0) * 1000)
+    result = summarize(samples, time.perf_counter() - start)
+    result["bytes_per_mutation"] = round((db_bytes(database) - before) / count, 1)
+    return result
+
+
+def time_reconstruction(database, permits, user_ids, iterations: int) -> dict:
+    rng = random.Random(1)
+    now = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        database.get_statuses_at(now, rng.choice(permits), rng.choice(user_ids))
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--mutations", type=int, default=5000)
+    parser.add_argument("--busy-users", type=int, default=20)
+    parser.add_argument("--events-per-user", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_history_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    permits = synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+
+    import database
+
+    rng = random.Random(args.seed)
+    try:
+        database.init_db()
+        synthetic.populate(database, args.users, args.statuses, args.seed)
+        doc_ids = [f"{p}_doc_{i}" for p in permits for i in range(args.documents)]
+        user_ids = [database.get_or_create_user(f"user-{i}") for i in range(100)]
+
+        with database.get_db_connection() as conn:
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER trg_status_events_{event}")
+        without_log = run_mutations(database, rng, doc_ids, user_ids, args.mutations)
+        # Recreates the triggers
+        database.init_db()
+        with_log = run_mutations(database, rng, doc_ids, user_ids, args.mutations)
+
+        busy = [
+            database.get_or_create_user(f"user-{i}") for i in range(args.busy_users)
+        ]
+        for user_id in busy:
+            for _ in range(args.events_per_user):
+                mutate(database, rng, doc_ids, [user_id])
+        full_replay = time_reconstruction(database, permits, busy, args.iterations)
+        start = time.perf_counter()
+        snapshot_run = database.compact_status_history()
+        snapshot_s = time.perf_counter() - start
+        from_snapshot = time_reconstruction(database, permits, busy, args.iterations)
+
+        before = db_bytes(database)
+        start = time.perf_counter()
+        fold_run = database.compact_status_history(keep_days=0)
+        fold_s = time.perf_counter() - start
+        reclaimed = before - db_bytes(database)
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "mutations_without_log": without_log,
+                "mutations_with_log": with_log,
+                "reconstruct_full_replay": full_replay,
+                "reconstruct_from_snapshot": from_snapshot,
+                "snapshot_compaction": {
+                    "seconds": round(snapshot_s, 3),
+                    **snapshot_run,
+                },
+                "fold_compaction": {
+                    "seconds": round(fold_s, 3),
+                    "bytes_reclaimed": reclaimed,
+                    **fold_run,
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test: per-user endpoints against databases with many users.
+
+Fills a database with --users users (each with --statuses status rows),
+then times document, progress and mutation requests for random users via
+the Flask test client. Latency should stay flat as the user count grows,
+since every query is bounded by the rows it returns.
+
+    python benchmarks/bench_multi_user.py --users 1000,100000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+os.environ.setdefault("CONFIG_DIR", os.path.join(ROOT, "config"))
+
+
+def populate(database, users: int, statuses: int) -> None:
+    """Insert users and status rows directly, bypassing the API."""
+    with database.get_db_connection() as conn:
+        doc_ids = [row[0] for row in conn.execute("SELECT id FROM documents")]
+        conn.executemany(
+            "INSERT INTO users (external_id) VALUES (?)",
+            ((f"user-{i}",) for i in range(users)),
+        )
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO document_status
+                (user_id, document_id, is_complete, notes)
+            SELECT id, ?, ?, 'synthetic' FROM users WHERE external_id = ?
+        """,
+            (
+                (random.choice(doc_ids), random.randint(0, 1), f"user-{i}")
+                for i in range(users)
+                for _ in range(statuses)
+            ),
+        )
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+    }
+
+
+def run(users: int, statuses: int, requests: int) -> dict:
+    import app as app_module
+    import database
+
+    workdir = tempfile.mkdtemp(prefix="bench_users_")
+    database.DATABASE_PATH = os.path.join(workdir, "residence.db")
+    try:
+        database.init_db()
+        start = time.perf_counter()
+        populate(database, users, statuses)
+        populate_s = time.perf_counter() - start
+
+        client = app_module.app.test_client()
+        endpoints = {
+            "documents": ("GET", "/api/documents/titre_sejour?profiles=worker"),
+            "progress": ("GET", "/api/progress/titre_sejour?profiles=worker"),
+            "complete": ("POST", "/api/documents/ts_passport/complete"),
+        }
+        timings = {name: [] for name in endpoints}
+        for _ in range(requests):
+            headers = {"X-User-Id": f"user-{random.randrange(users)}"}
+            for name, (method, url) in endpoints.items():
+                t0 = time.perf_counter()
+                response = client.open(url, method=method, headers=headers)
+                timings[name].append((time.perf_counter() - t0) * 1000)
+                assert response.status_code == 200, response.data
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "users": users,
+        "status_rows": users * statuses,
+        "populate_s": round(populate_s, 2),
+        **{name: percentiles(samples) for name, samples in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", default="1000,100000")
+    parser.add_argument("--statuses", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(0)
+    results = [
+        run(int(users), args.statuses, args.requests) for users in args.users.split(",")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: /api/documents payload size and time per response mode.
+
+Seeds a synthetic config and database, then requests the document list of
+random users through the Flask test client in each mode (every field,
+one language, a few fields, the status-only view) and with each content
+encoding the server offers. Reports the body size, the request latency
+and the time spent building the JSON alone.
+
+    python benchmarks/bench_payload.py --documents 200
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+# Query parameters of each mode
+MODES = {
+    "full": {},
+    "lang_fr": {"lang": "fr"},
+    "fields": {"fields": "name_fr,category,is_complete,due_date"},
+    "status": {"view": "status"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_payload_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    os.environ["CONFIG_WATCH_S"] = "0"
+    permits = synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+    profiles = synthetic.profile_ids(args.profiles)
+
+    import app as app_module
+    import compression
+    import database
+
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        database.init_db()
+        synthetic.populate(database, args.users, args.statuses, args.seed)
+        client = app_module.app.test_client()
+        encodings = ("identity", *compression.available_encodings())
+
+        for mode, params in MODES.items():
+            query = "".join(f"&{k}={v}" for k, v in params.items())
+            if params.get("view") == "status":
+                fields = database.STATUS_VIEW_FIELDS
+            else:
+                fields = database.select_document_fields(
+                    params["fields"].split(",") if "fields" in params else None,
+                    params.get("lang"),
+                )
+            for encoding in encodings:
+                samples = []
+                size = 0
+                start = time.perf_counter()
+                for _ in range(args.iterations):
+                    user = f"user-{rng.randrange(args.users)}"
+                    selected = ",".join(["common"] + rng.sample(profiles[1:], 2))
+                    url = f"/api/documents/{rng.choice(permits)}?profiles={selected}"
+                    t0 = time.perf_counter()
+                    r = client.get(
+                        url + query,
+                        headers={"X-User-Id": user, "Accept-Encoding": encoding},
+                    )
+                    samples.append((time.perf_counter() - t0) * 1000)
+                    assert r.status_code == 200, r.data
+                    size += len(r.data)
+                result = summarize(samples, time.perf_counter() - start)
+                results.append(
+                    {
+                        "mode": mode,
+                        "encoding": encoding,
+                        "avg_bytes": size // args.iterations,
+                        **result,
+                    }
+                )
+
+            # Building the JSON body alone, without the HTTP layer
+            user_ids = [database.get_or_create_user(f"user-{i}") for i in range(100)]
+            samples = []
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                selected = ["common"] + rng.sample(profiles[1:], 2)
+                t0 = time.perf_counter()
+                database.get_documents_json(
+                    rng.choice(permits), selected, rng.choice(user_ids), fields
+                )
+                samples.append((time.perf_counter() - t0) * 1000)
+            build = summarize(samples, time.perf_counter() - start)
+            results.append({"mode": mode, "encoding": "build_only", **build})
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {"documents_per_permit": args.documents, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
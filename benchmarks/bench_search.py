@@ -0,0 +1,123 @@
+"""
+Benchmark: /api/search latency on a large synthetic config.
+
+Seeds --permits x --documents documents with French/English names and
+descriptions, gives --users users --statuses notes each, then runs
+search_documents() for random users with several kinds of query (whole
+words, short prefixes, several words, accent-free spellings) scoped to a
+permit type and profile subset, plus whole words across every permit
+type. Reports the seed time (which includes building the indexes) and
+latency percentiles per query kind.
+
+    python benchmarks/bench_search.py --permits 10 --documents 1500
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+
+def strip_accents(text: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c)
+    )
+
+
+def queries(rng: random.Random) -> dict:
+    """One query generator per kind."""
+    words = synthetic.WORDS_FR + synthetic.WORDS_EN
+    return {
+        "word": lambda: rng.choice(words),
+        "prefix_2": lambda: rng.choice(words)[:2],
+        "prefix_4": lambda: rng.choice(words)[:4],
+        "three_words": lambda: " ".join(rng.sample(words, 3)),
+        "unaccented": lambda: strip_accents(
+            rng.choice([w for w in synthetic.WORDS_FR if strip_accents(w) != w])
+        ),
+        "all_permits": lambda: rng.choice(words),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=10)
+    parser.add_argument("--documents", type=int, default=1500)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--statuses", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_search_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    permits = synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+    profiles = synthetic.profile_ids(args.profiles)
+
+    import database
+
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        start = time.perf_counter()
+        database.init_db()
+        seed_s = time.perf_counter() - start
+        start = time.perf_counter()
+        synthetic.populate(database, args.users, args.statuses, args.seed)
+        populate_s = time.perf_counter() - start
+        user_ids = [database.get_or_create_user(f"user-{i}") for i in range(100)]
+
+        for kind, make_query in queries(rng).items():
+            samples = []
+            hits = 0
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                query = make_query()
+                selected = ["common"] + rng.sample(profiles[1:], 2)
+                permit = None if kind == "all_permits" else rng.choice(permits)
+                t0 = time.perf_counter()
+                found = database.search_documents(
+                    query, permit, selected, rng.choice(user_ids)
+                )
+                samples.append((time.perf_counter() - t0) * 1000)
+                hits += len(found)
+            result = summarize(samples, time.perf_counter() - start)
+            results.append(
+                {"kind": kind, "avg_hits": round(hits / args.iterations, 1), **result}
+            )
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "documents": args.permits * args.documents,
+                "notes": args.users * args.statuses,
+                "seed_s": round(seed_s, 2),
+                "populate_s": round(populate_s, 2),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: init_db() seeding on a cold database vs. a warm restart.
+
+Writes a synthetic profiles.yaml and permit YAML files with --documents
+entries each, then times init_db() against an empty database (cold), again
+with unchanged config (warm) and once after editing one document (changed).
+
+    python benchmarks/bench_seed.py --documents 2000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+
+def write_profiles(config_dir: str):
+    """Write the profiles and category the synthetic documents use."""
+    data = {
+        "metadata": {"last_verified": "2026-01-01", "notes": "Synthetic"},
+        "profiles": {
+            p: {
+                "id": p,
+                "name_en": p,
+                "name_fr": p,
+                "description_en": f"Synthetic profile {p}",
+                "description_fr": f"Profil synthétique {p}",
+                "icon": "📋",
+            }
+            for p in ("common", "worker", "self_employed")
+        },
+        "categories": {
+            "identity": {"name_en": "Identity", "name_fr": "Identité", "icon": "🪪"}
+        },
+    }
+    with open(os.path.join(config_dir, "profiles.yaml"), "w") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+
+
+def write_permit(config_dir: str, permit_type: str, documents: int, tag: str = ""):
+    data = {
+        "permit_type": {
+            "id": permit_type,
+            "name_en": permit_type,
+            "name_fr": permit_type,
+            "description": "Synthetic permit type",
+            "cost": 225,
+        },
+        "documents": [
+            {
+                "id": f"{permit_type}_{i}",
+                "profiles": ["common"] if i % 3 else ["worker", "self_employed"],
+                "category": "identity",
+                "name_fr": f"Document {i}{tag if i == 0 else ''}",
+                "name_en": f"Document {i}",
+                "description": "Synthetic document " * 5,
+                "link": None,
+                "link_text": "n/a",
+                "validity_days": 90 if i % 5 == 0 else None,
+            }
+            for i in range(documents)
+        ],
+    }
+    with open(os.path.join(config_dir, f"{permit_type}.yaml"), "w") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_seed_")
+    config_dir = os.path.join(workdir, "config")
+    os.makedirs(config_dir)
+    os.environ["CONFIG_DIR"] = config_dir
+    write_profiles(config_dir)
+    permit_types = ["carte_resident", "titre_sejour"]
+    for permit_type in permit_types:
+        write_permit(config_dir, permit_type, args.documents)
+
+    import database
+
+    database.DATABASE_PATH = os.path.join(workdir, "residence.db")
+    try:
+        cold_ms = timed(database.init_db)
+        warm_ms = timed(database.init_db)
+        write_permit(config_dir, permit_types[0], args.documents, tag=" (edited)")
+        changed_ms = timed(database.init_db)
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "documents_per_permit": args.documents,
+                "cold_ms": cold_ms,
+                "warm_ms": warm_ms,
+                "changed_ms": changed_ms,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark: server startup, from process start to the first 200.
+
+Writes a synthetic config and compiles its bundle (as the Docker build
+does, together with the app's bytecode), then:
+
+* runs ``python -X importtime`` for what each process imports: asgi (every
+  uvicorn worker) and server (the launcher), and reports the total and the
+  slowest direct imports;
+* starts ``python server.py`` --runs times on a new database and --runs
+  times on one already seeded (a restart), polling /healthz/live,
+  /healthz/ready and /api/bootstrap, and reports how long after the
+  process started each first answered 200.
+
+    python benchmarks/bench_startup.py --workers 2 --runs 5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+PATHS = {
+    "live": "/healthz/live",
+    "ready": "/healthz/ready",
+    "bootstrap": "/api/bootstrap",
+}
+
+
+def import_times(module: str, env: dict) -> dict:
+    """Import ``module`` under -X importtime; return total and slowest imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    direct = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        ms = int(cumulative) / 1000
+        if depth == 0 and name.strip() == module:
+            total = ms
+        elif depth == 1:
+            direct[name.strip()] = ms
+    slowest = sorted(direct.items(), key=lambda item: -item[1])[:8]
+    return {
+        "total_ms": round(total, 1),
+        "slowest_ms": {name: round(ms, 1) for name, ms in slowest},
+    }
+
+
+def describe(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "min_ms": round(samples[0], 1),
+        "p50_ms": round(samples[len(samples) // 2], 1),
+        "max_ms": round(samples[-1], 1),
+    }
+
+
+def status(port: int, path: str) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def time_to_first_200(port: int, env: dict) -> dict:
+    """Start server.py and time each path's first 200, in milliseconds."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "server.py"],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    first = {}
+    try:
+        deadline = start + 30
+        while len(first) < len(PATHS):
+            if time.perf_counter() > deadline:
+                raise RuntimeError("server did not become ready")
+            for key, path in PATHS.items():
+                if key in first:
+                    continue
+                try:
+                    ok = status(port, path) == 200
+                except OSError:
+                    break
+                if ok:
+                    first[key] = (time.perf_counter() - start) * 1000
+            time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5299)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    config_dir = os.path.join(workdir, "config")
+    synthetic.write_config(config_dir, args.permits, args.documents, args.profiles)
+    env = dict(
+        os.environ,
+        CONFIG_DIR=config_dir,
+        WEB_HOST="127.0.0.1",
+        WEB_PORT=str(args.port),
+        WEB_WORKERS=str(args.workers),
+        WEB_ACCESS_LOG="0",
+    )
+    results = {}
+    try:
+        for cmd in (["config_compiler.py"], ["-m", "compileall", "-q", "."]):
+            subprocess.run(
+                [sys.executable, *cmd],
+                cwd=APP_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+        env["DATABASE_PATH"] = os.path.join(workdir, "imports.db")
+        results["imports"] = {
+            module: import_times(module, env) for module in ("asgi", "server")
+        }
+
+        samples = {"new_database": [], "restart": []}
+        for run in range(args.runs):
+            env["DATABASE_PATH"] = os.path.join(workdir, f"run-{run}.db")
+            samples["new_database"].append(time_to_first_200(args.port, env))
+            samples["restart"].append(time_to_first_200(args.port, env))
+        results["first_200"] = {
+            mode: {key: describe([run[key] for run in runs]) for key in PATHS}
+            for mode, runs in samples.items()
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "documents": args.permits * args.documents,
+                "workers": args.workers,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
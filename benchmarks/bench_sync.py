@@ -0,0 +1,116 @@
+"""
+Benchmark: what a returning client downloads, full reload against delta sync.
+
+Seeds a synthetic config and database, then for random users makes
+--changes status changes (as another device would) and compares the two
+ways a client can catch up: reloading the document list of a permit type
+(GET /api/documents) and pulling the changes since its last revision
+(GET /api/sync?since=). Reports the body size and request latency of
+each, identity-encoded and with the server's preferred encoding.
+
+    python benchmarks/bench_sync.py --changes 5
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from run_suite import summarize  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sync_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    os.environ["CONFIG_WATCH_S"] = "0"
+    permits = synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+    profiles = synthetic.profile_ids(args.profiles)
+
+    import app as app_module
+    import compression
+    import database
+
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        database.init_db()
+        synthetic.populate(database, args.users, args.statuses, args.seed)
+        client = app_module.app.test_client()
+        doc_ids = [f"{p}_doc_{i}" for p in permits for i in range(args.documents)]
+
+        for encoding in ("identity", compression.available_encodings()[0]):
+            sizes = {"reload": 0, "delta": 0}
+            samples = {"reload": [], "delta": []}
+            elapsed = {"reload": 0.0, "delta": 0.0}
+            for _ in range(args.iterations):
+                user = f"user-{rng.randrange(args.users)}"
+                user_id = database.get_or_create_user(user)
+                headers = {"X-User-Id": user, "Accept-Encoding": encoding}
+                since = database.get_status_revision(user_id)
+                for _ in range(args.changes):
+                    database.mark_document_complete(rng.choice(doc_ids), user_id)
+
+                selected = ",".join(["common"] + rng.sample(profiles[1:], 2))
+                urls = {
+                    "reload": f"/api/documents/{rng.choice(permits)}"
+                    f"?profiles={selected}",
+                    "delta": f"/api/sync?since={since}",
+                }
+                for mode, url in urls.items():
+                    t0 = time.perf_counter()
+                    r = client.get(url, headers=headers)
+                    took = time.perf_counter() - t0
+                    assert r.status_code == 200, r.data
+                    samples[mode].append(took * 1000)
+                    elapsed[mode] += took
+                    sizes[mode] += len(r.data)
+            for mode in ("reload", "delta"):
+                results.append(
+                    {
+                        "mode": mode,
+                        "encoding": encoding,
+                        "avg_bytes": sizes[mode] // args.iterations,
+                        **summarize(samples[mode], elapsed[mode]),
+                    }
+                )
+    finally:
+        database.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        json.dumps(
+            {
+                "documents_per_permit": args.documents,
+                "changes_since_last_sync": args.changes,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Benchmark suite: data layer and API on a synthetic config and database.
+
+Builds a config with --permits permit types, --documents documents per
+permit and --profiles profiles, seeds a database with --users users
+holding --statuses status rows each, then runs every scenario in its own
+process (so peak RSS is per scenario) and prints one JSON report with
+throughput, latency percentiles and peak RSS. Save reports from two
+commits with --output and diff them to spot regressions.
+
+    python benchmarks/run_suite.py --users 10000 --output before.json
+    python benchmarks/run_suite.py --only db_documents,api_bootstrap
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+SCENARIOS: Dict[str, Callable] = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def summarize(samples: List[float], elapsed: float) -> dict:
+    samples = sorted(samples)
+
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))], 3)
+
+    return {
+        "ops": len(samples),
+        "ops_per_s": round(len(samples) / elapsed, 1),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def measure(func: Callable[[], None], iterations: int) -> dict:
+    """Call ``func`` ``iterations`` times and summarize its latency."""
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples, time.perf_counter() - start)
+
+
+class Context:
+    """Shared state handed to each scenario."""
+
+    def __init__(self, args, workdir: str):
+        import database
+
+        self.args = args
+        self.workdir = workdir
+        self.rng = random.Random(args.seed)
+        self.database = database
+        self.permits = synthetic.permit_ids(args.permits)
+        self.profiles = synthetic.profile_ids(args.profiles)
+
+    def user(self) -> str:
+        return f"user-{self.rng.randrange(self.args.users)}"
+
+    def profile_subset(self) -> List[str]:
+        extra = self.profiles[1:]
+        return self.rng.sample(extra, min(len(extra), 2)) if extra else ["common"]
+
+    def client(self):
+        import app as app_module
+
+        return app_module.app.test_client()
+
+
+@scenario
+def seed_cold(ctx: Context) -> dict:
+    """init_db() against an empty database file."""
+    database = ctx.database
+    paths = iter(
+        os.path.join(ctx.workdir, f"cold_{i}.db") for i in range(ctx.args.seed_runs)
+    )
+
+    def run():
+        database.DATABASE_PATH = next(paths)
+        database.init_db()
+
+    return measure(run, ctx.args.seed_runs)
+
+
+@scenario
+def seed_warm(ctx: Context) -> dict:
+    """init_db() on an already seeded database with unchanged config."""
+    return measure(ctx.database.init_db, ctx.args.seed_runs)
+
+
+@scenario
+def db_documents(ctx: Context) -> dict:
+    """get_documents_with_status() for random users, permits and profiles."""
+    database = ctx.database
+    user_ids = [database.get_or_create_user(f"user-{i}") for i in range(100)]
+
+    def run():
+        database.get_documents_with_status(
+            ctx.rng.choice(ctx.permits), ctx.profile_subset(), ctx.rng.choice(user_ids)
+        )
+
+    return measure(run, ctx.args.iterations)
+
+
+@scenario
+def db_progress(ctx: Context) -> dict:
+    """get_progress() with and without the category/profile breakdown."""
+    database = ctx.database
+    user_ids = [database.get_or_create_user(f"user-{i}") for i in range(100)]
+
+    def run():
+        database.get_progress(
+            ctx.rng.choice(ctx.permits),
+            ctx.profile_subset(),
+            ctx.rng.random() < 0.5,
+            ctx.rng.choice(user_ids),
+        )
+
+    return measure(run, ctx.args.iterations)
+
+
+@scenario
+def api_mutations(ctx: Context) -> dict:
+    """Single-document and batch POSTs through the Flask test client."""
+    client = ctx.client()
+    doc_ids = [f"{p}_doc_{i}" for p in ctx.permits for i in range(ctx.args.documents)]
+
+    def run():
+        doc = ctx.rng.choice(doc_ids)
+        headers = {"X-User-Id": ctx.user()}
+        kind = ctx.rng.randrange(5)
+        if kind == 0:
+            r = client.post(f"/api/documents/{doc}/complete", headers=headers)
+        elif kind == 1:
+            r = client.post(f"/api/documents/{doc}/incomplete", headers=headers)
+        elif kind == 2:
+            r = client.post(
+                f"/api/documents/{doc}/notes", json={"notes": "x"}, headers=headers
+            )
+        elif kind == 3:
+            r = client.post(
+                f"/api/documents/{doc}/due-date",
+                json={"due_date": "2026-12-31"},
+                headers=headers,
+            )
+        else:
+            operations = [
+                {"document_id": d, "action": "complete"}
+                for d in ctx.rng.sample(doc_ids, min(5, len(doc_ids)))
+            ]
+            r = client.post(
+                "/api/documents/batch", json={"operations": operations}, headers=headers
+            )
+        assert r.status_code == 200, r.data
+
+    return measure(run, ctx.args.iterations)
+
+
+@scenario
+def api_documents(ctx: Context) -> dict:
+    """
+    GET /api/documents for 100 returning users; every fifth load follows a
+    status change of that user, so its status rows are no longer cached.
+    """
+    client = ctx.client()
+    users = [f"user-{i}" for i in range(100)]
+
+    def run():
+        headers = {"X-User-Id": ctx.rng.choice(users)}
+        permit = ctx.rng.choice(ctx.permits)
+        if ctx.rng.randrange(5) == 0:
+            doc = f"{permit}_doc_{ctx.rng.randrange(ctx.args.documents)}"
+            client.post(f"/api/documents/{doc}/complete", headers=headers)
+        profiles = ",".join(["common"] + ctx.profile_subset())
+        r = client.get(f"/api/documents/{permit}?profiles={profiles}", headers=headers)
+        assert r.status_code == 200, r.data
+
+    result = measure(run, ctx.args.iterations)
+    try:
+        from document_cache import get_cache_stats
+    except ImportError:
+        # Revisions before the document cache
+        return result
+    return {**result, "cache": get_cache_stats()}
+
+
+@scenario
+def api_bootstrap(ctx: Context) -> dict:
+    """
+    The request sequence app.js performs for a returning user: bootstrap,
+    pick a permit type, load documents and progress, tick a document,
+    refresh progress, then revalidate the bootstrap payload.
+    """
+    client = ctx.client()
+
+    def run():
+        headers = {"X-User-Id": ctx.user()}
+        permit = ctx.rng.choice(ctx.permits)
+        profiles = ",".join(["common"] + ctx.profile_subset())
+        r = client.get("/api/bootstrap", headers=headers)
+        assert r.status_code == 200, r.data
+        etag = r.headers.get("ETag")
+        client.post(
+            "/api/user-settings/permit-type",
+            json={"permit_type": permit},
+            headers=headers,
+        )
+        client.get(f"/api/documents/{permit}?profiles={profiles}", headers=headers)
+        client.get(f"/api/progress/{permit}?profiles={profiles}", headers=headers)
+        client.post(
+            f"/api/documents/{permit}_doc_{ctx.rng.randrange(ctx.args.documents)}"
+            "/complete",
+            headers=headers,
+        )
+        client.get(f"/api/progress/{permit}?profiles={profiles}", headers=headers)
+        client.get("/api/bootstrap", headers={**headers, "If-None-Match": etag or ""})
+
+    return measure(run, ctx.args.iterations // 5 or 1)
+
+
+def prepare(args, workdir: str) -> None:
+    """Write the synthetic config and build the shared database."""
+    synthetic.write_config(
+        os.environ["CONFIG_DIR"], args.permits, args.documents, args.profiles
+    )
+    import database
+
+    database.init_db()
+    synthetic.populate(database, args.users, args.statuses, args.seed)
+    database.close_pool()
+
+
+def run_scenario(name: str, args, workdir: str) -> dict:
+    """Run one scenario on a private copy of the database (child process)."""
+    import database
+
+    db_path = os.path.join(workdir, f"{name}.db")
+    shutil.copy(os.environ["DATABASE_PATH"], db_path)
+    database.DATABASE_PATH = db_path
+    ctx = Context(args, workdir)
+    try:
+        result = SCENARIOS[name](ctx)
+    finally:
+        database.close_pool()
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"scenario": name, **result}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--permits", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed-runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args, args.workdir)))
+        return
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    os.environ["CONFIG_DIR"] = os.path.join(workdir, "config")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "residence.db")
+    os.environ.pop("METRICS_ENABLED", None)
+    os.environ.pop("SERVER_TIMING", None)
+    try:
+        start = time.perf_counter()
+        prepare(args, workdir)
+        prepare_s = round(time.perf_counter() - start, 2)
+
+        results = []
+        for name in names:
+            out = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:], "--scenario", name]
+                + ["--workdir", workdir],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {
+        k: v
+        for k, v in vars(args).items()
+        if k not in ("only", "output", "scenario", "workdir")
+    }
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "params": params,
+        "prepare_s": prepare_s,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Synthetic config and database generators shared by the benchmark suite.
+
+    write_config(config_dir, permits=4, documents=200, profiles=8)
+    populate(database, users=10000, statuses=20)
+"""
+
+import os
+import random
+from typing import List
+
+import yaml
+
+CATEGORIES = ["identity", "residence", "financial", "administrative", "payment"]
+
+# Vocabulary for document names, descriptions and notes, so search has
+# realistic (accented) text to index
+WORDS_FR = (
+    "acte attestation assurance bancaire bulletin certificat contrat déclaration "
+    "diplôme domicile électricité facture fiscal français hébergement identité "
+    "impôts intégration justificatif maladie mariage naissance passeport "
+    "photographie préfecture relevé ressources salaire séjour timbre travail"
+).split()
+WORDS_EN = (
+    "birth certificate contract declaration degree electricity employment "
+    "health housing identity income insurance integration marriage passport "
+    "payslip photo proof receipt residence statement stamp tax utility"
+).split()
+
+
+def phrase(rng: random.Random, words: List[str], length: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+def permit_ids(permits: int) -> List[str]:
+    """The real permit ids first, then synthetic ``permit_<n>`` ids."""
+    base = ["carte_resident", "titre_sejour"]
+    return (base + [f"permit_{i}" for i in range(permits)])[:permits]
+
+
+def profile_ids(profiles: int) -> List[str]:
+    return ["common"] + [f"profile_{i}" for i in range(1, profiles)]
+
+
+def write_config(
+    config_dir: str, permits: int, documents: int, profiles: int, seed: int = 0
+) -> List[str]:
+    """Write profiles.yaml and one YAML file per permit; return the permit ids."""
+    rng = random.Random(seed)
+    # Separate stream, so adding text did not change the generated layout
+    text_rng = random.Random(seed + 1)
+    os.makedirs(config_dir, exist_ok=True)
+    profile_list = profile_ids(profiles)
+
+    shared = {
+        "metadata": {
+            "last_verified": "2026-01-01",
+            "source_url": "https://www.service-public.fr/",
+            "notes": "Synthetic benchmark configuration",
+        },
+        "profiles": {
+            p: {
+                "id": p,
+                "name_en": p,
+                "name_fr": p,
+                "description_en": f"Synthetic profile {p}",
+                "description_fr": f"Profil synthétique {p}",
+                "icon": "📋",
+            }
+            for p in profile_list
+        },
+        "categories": {
+            c: {"name_en": c.title(), "name_fr": c.title(), "icon": "📁"}
+            for c in CATEGORIES
+        },
+    }
+    with open(os.path.join(config_dir, "profiles.yaml"), "w") as f:
+        yaml.safe_dump(shared, f, allow_unicode=True)
+
+    ids = permit_ids(permits)
+    for permit_type in ids:
+        data = {
+            "permit_type": {
+                "id": permit_type,
+                "name_en": permit_type,
+                "name_fr": permit_type,
+                "description": "Synthetic permit type",
+                "cost": 225,
+            },
+            "documents": [
+                {
+                    "id": f"{permit_type}_doc_{i}",
+                    # About half the documents are common, the rest belong
+                    # to one or two other profiles
+                    "profiles": (
+                        ["common"]
+                        if i % 2 == 0 or profiles == 1
+                        else rng.sample(profile_list[1:], min(2, profiles - 1))
+                    ),
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "name_fr": phrase(text_rng, WORDS_FR, 3),
+                    "name_en": phrase(text_rng, WORDS_EN, 3),
+                    "description": phrase(text_rng, WORDS_FR + WORDS_EN, 24),
+                    "link": f"https://example.org/{permit_type}/{i}",
+                    "link_text": "Reference",
+                    "validity_days": 90 if i % 5 == 0 else None,
+                }
+                for i in range(documents)
+            ],
+        }
+        with open(os.path.join(config_dir, f"{permit_type}.yaml"), "w") as f:
+            yaml.safe_dump(data, f, allow_unicode=True)
+    return ids
+
+
+def populate(database, users: int, statuses: int, seed: int = 0) -> None:
+    """Insert ``users`` users with up to ``statuses`` status rows each."""
+    rng = random.Random(seed)
+    text_rng = random.Random(seed + 1)
+    with database.get_db_connection() as conn:
+        doc_ids = [row[0] for row in conn.execute("SELECT id FROM documents")]
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (external_id) VALUES (?)",
+            ((f"user-{i}",) for i in range(users)),
+        )
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO document_status
+                (user_id, document_id, is_complete, notes, due_date)
+            SELECT id, ?, ?, ?, ? FROM users WHERE external_id = ?
+        """,
+            (
+                (
+                    rng.choice(doc_ids),
+                    rng.randint(0, 1),
+                    phrase(text_rng, WORDS_FR, 4),
+                    f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    f"user-{i}",
+                )
+                for i in range(users)
+                for _ in range(statuses)
+            ),
+        )
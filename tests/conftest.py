@@ -0,0 +1,38 @@
+"""
+Shared fixtures: the app modules from app/, run against the repo's config
+and a fresh database per test module.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+os.environ.setdefault("CONFIG_DIR", os.path.join(ROOT, "config"))
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    """The database module, seeded into a temporary file."""
+    import database
+    from document_cache import skeleton_cache, status_cache
+
+    path = tmp_path_factory.mktemp("db") / "residence.db"
+    original = database.DATABASE_PATH
+    database.DATABASE_PATH = str(path)
+    database.init_db()
+    yield database
+    database.close_pool()
+    database.DATABASE_PATH = original
+    skeleton_cache.clear()
+    status_cache.clear()
+
+
+@pytest.fixture
+def client(database):
+    """A test client of the Flask app on the seeded database."""
+    from app import app
+
+    return app.test_client()
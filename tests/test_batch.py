@@ -0,0 +1,29 @@
+"""POST /api/documents/batch."""
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "body", [{"operations": [1]}, {"operations": "complete"}, [{"action": "complete"}]]
+)
+def test_rejects_malformed_operations(client, body):
+    response = client.post("/api/documents/batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_reports_each_operation(client):
+    response = client.post(
+        "/api/documents/batch",
+        json={
+            "operations": [
+                {"document_id": "ts_passport", "action": "complete"},
+                {"document_id": "ts_passport", "action": "notes", "notes": "Done"},
+                {"document_id": "ts_passport", "action": "shred"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.get_json()["data"]
+    assert [r["success"] for r in results] == [True, True, False]
+    assert results[2]["error"] == "Unknown action: shred"
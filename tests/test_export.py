@@ -0,0 +1,102 @@
+"""Round trips of a user's dossier through /api/export and /api/import."""
+
+import json
+
+
+def export(client, user):
+    response = client.get("/api/export", headers={"X-User-Id": user})
+    assert response.status_code == 200
+    return response.data
+
+
+def records(blob, kind):
+    lines = [json.loads(line) for line in blob.splitlines() if line.strip()]
+    return [r for r in lines if r["type"] == kind]
+
+
+def import_(client, user, blob, mode=None):
+    return client.post(
+        "/api/import" + (f"?mode={mode}" if mode else ""),
+        data=blob,
+        content_type="application/x-ndjson",
+        headers={"X-User-Id": user},
+    )
+
+
+def test_round_trip(database, client):
+    source = database.get_or_create_user("source")
+    database.update_user_profiles(["common", "worker"], source)
+    database.mark_document_complete("ts_passport", source)
+    database.update_document_notes("ts_passport", "Renewed in March", source)
+    database.update_document_due_date("ts_photos", "2026-12-31", source)
+    database.update_document_notes("ts_photos", "Photo booth, 2 copies", source)
+    # Another user's statuses stay out of the export
+    other = database.get_or_create_user("other")
+    database.mark_document_complete("ts_proof_of_address", other)
+
+    blob = export(client, "source")
+    statuses = {r["document_id"]: r for r in records(blob, "status")}
+    assert set(statuses) == {"ts_passport", "ts_photos"}
+    assert statuses["ts_passport"]["is_complete"] == 1
+    assert statuses["ts_passport"]["notes"] == "Renewed in March"
+    assert statuses["ts_passport"]["completed_at"]
+    assert statuses["ts_photos"]["is_complete"] == 0
+    assert statuses["ts_photos"]["due_date"] == "2026-12-31"
+    assert records(blob, "end") == [{"type": "end", "statuses": 2}]
+
+    response = import_(client, "target", blob)
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {
+        "statuses": 2,
+        "applied": 2,
+        "settings": True,
+        "skipped": 0,
+    }
+    again = export(client, "target")
+    assert records(again, "status") == records(blob, "status")
+    assert records(again, "settings") == records(blob, "settings")
+    target = database.get_or_create_user("target")
+    assert database.get_user_settings(target)["selected_profiles"] == [
+        "common",
+        "worker",
+    ]
+
+    # Neither the source nor the other user was touched
+    assert records(export(client, "source"), "status") == records(blob, "status")
+    assert [r["document_id"] for r in records(export(client, "other"), "status")] == [
+        "ts_proof_of_address"
+    ]
+
+
+def test_replace(database, client):
+    blob = export(client, "source")
+    user = database.get_or_create_user("replaced")
+    database.mark_document_complete("ts_proof_of_address", user)
+    revision = database.get_status_revision(user)
+
+    # Merging keeps statuses the export does not mention
+    assert import_(client, "replaced", blob).status_code == 200
+    documents = [
+        r["document_id"] for r in records(export(client, "replaced"), "status")
+    ]
+    assert "ts_proof_of_address" in documents
+
+    response = import_(client, "replaced", blob, mode="replace")
+    assert response.status_code == 200
+    assert records(export(client, "replaced"), "status") == records(blob, "status")
+    assert database.get_status_revision(user) > revision
+
+
+def test_invalid_import_changes_nothing(database, client):
+    blob = export(client, "source")
+    user = database.get_or_create_user("untouched")
+    database.mark_document_complete("ts_proof_of_address", user)
+    before = export(client, "untouched")
+
+    # Truncated: no end record
+    truncated = b"\n".join(blob.splitlines()[:-1])
+    response = import_(client, "untouched", truncated, mode="replace")
+    assert response.status_code == 400
+    response = import_(client, "untouched", b'{"type": "status"}\n')
+    assert response.status_code == 400
+    assert records(export(client, "untouched"), "status") == records(before, "status")